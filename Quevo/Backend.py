@@ -0,0 +1,699 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+from typing import List, Union
+
+import numpy as np
+
+from .Chromosome import Chromosome
+from .DensityMatrix import DensityMatrix
+from .GateCache import GateCache
+from .NoiseModel import NoiseModel
+from .OperatorProducts import OperatorProducts
+from .Statevector import Statevector
+from .Tableau import Tableau
+
+
+class Backend(object):
+    """
+    Base class for the simulation engines a Circuit or Generation can be evaluated with.
+
+    An engine is created once and keeps its simulator handle for the whole run. Every engine
+    reports its capabilities, so a run can pick the cheapest engine that handles its gate set
+    and noise requirements with select_backend().
+
+    Attributes
+    ----------
+    _shots: int
+        Number of runs in the simulator for each circuit. Ignored by exact engines.
+    _NAME: str
+        The name the engine is registered with.
+    _GATE_TYPES: List[str]
+        The gates the engine can simulate, None if it can simulate all of them.
+    _EXACT: bool
+        True if the engine returns exact probabilities instead of sampled ones.
+    _NOISE: bool
+        True if the engine can simulate noise.
+    _COST: int
+        Relative cost of the engine, lower is cheaper.
+    _BATCHED: bool
+        True if the engine can simulate a whole population of chromosomes with find_population_probabilities().
+    """
+
+    _NAME: str = ''
+    _GATE_TYPES: List[str] = None
+    _EXACT: bool = False
+    _NOISE: bool = False
+    _COST: int = 0
+    _BATCHED: bool = False
+
+    def __init__(self, shots: int = 2048) -> None:
+        """
+        Backend constructor.
+
+        Parameters
+        ----------
+        shots: (int) optional
+            Number of runs in the simulator for each circuit.
+        """
+        self._shots = shots
+
+    def __repr__(self) -> str:
+        """Returns the name of the engine"""
+        return self._NAME
+
+    @classmethod
+    def get_capabilities(cls) -> dict:
+        """Returns a dict describing what the engine can simulate"""
+        return {'name': cls._NAME,
+                'gate_types': cls._GATE_TYPES,
+                'exact': cls._EXACT,
+                'noise': cls._NOISE,
+                'cost': cls._COST,
+                'batched': cls._BATCHED}
+
+    @classmethod
+    def supports(cls, gate_types: List[str], noise: bool = False, exact: bool = False) -> bool:
+        """
+        Checks if the engine can handle a run.
+
+        Parameters
+        ----------
+        gate_types: List[str]
+            The gates the chromosomes of the run are built from.
+        noise: (bool) optional
+            True if the run needs noisy simulation.
+        exact: (bool) optional
+            True if the run needs exact probabilities.
+
+        Returns
+        -------
+        supported: bool
+            True if the engine can simulate the run.
+        """
+        if cls._GATE_TYPES is not None and not set(gate_types).issubset(cls._GATE_TYPES):
+            return False
+        if noise and not cls._NOISE:
+            return False
+        if exact and not cls._EXACT:
+            return False
+        return True
+
+    def get_shots(self) -> int:
+        """Returns the number of shots for each circuit"""
+        return self._shots
+
+    def run(self, circuits: list) -> List[dict]:
+        """Runs Qiskit QuantumCircuits and returns their counts. Only engines built on Qiskit implement this."""
+        raise NotImplementedError(self._NAME + " can not run Qiskit circuits!")
+
+    def find_init_state_probability(self, circuit, state: List[int]) -> float:
+        """
+        Finds the probability of measuring one for the circuit's chromosome started in the given state.
+
+        Parameters
+        ----------
+        circuit: (Circuit)
+            The circuit to simulate.
+        state: (List[int])
+            A list with a binary triplet describing the initial state.
+
+        Returns
+        -------
+        chance_of_one: (float)
+            The probability of measuring one.
+        """
+        raise NotImplementedError
+
+    def find_probabilities(self, circuit) -> List[float]:
+        """Returns the probability of one for all of the circuit's CA initial states"""
+        probabilities = []
+        for state in circuit.get_starting_states():
+            probabilities.append(self.find_init_state_probability(circuit, state))
+        return probabilities
+
+    def find_generation_probabilities(self, circuits: list) -> List[List[float]]:
+        """Returns the probabilities of one for all the CA initial states of several circuits"""
+        return [self.find_probabilities(circuit) for circuit in circuits]
+
+    def find_population_probabilities(self, chromosome_list: List[Chromosome]) -> np.ndarray:
+        """
+        Finds the probabilities of one for a whole population at once, without creating circuits.
+        Only supported by engines with the batched capability.
+
+        Parameters
+        ----------
+        chromosome_list: List[Chromosome]
+            The chromosomes to simulate, all with the same gate set and number of qubits.
+
+        Returns
+        -------
+        probabilities: np.ndarray
+            The probabilities with shape (population, 2^n), one row per chromosome.
+        """
+        raise NotImplementedError
+
+
+class StatevectorBackend(Backend):
+    """
+    Exact engine using the built-in NumPy statevector simulator. All the CA initial states are
+    read from the columns of one circuit unitary, built from precomputed gate operators.
+
+    In incremental mode the chromosomes keep their prefix and suffix operator products (see
+    OperatorProducts.py). Offspring copied by Generation.select_parent() are then evaluated by only
+    multiplying the gates that differ from their parent. Chromosomes with only Clifford gates are
+    routed to the Tableau simulator.
+
+    Attributes
+    ----------
+    _gate_caches: dict
+        One GateCache per gate set, keyed by the tuple of gate types and the number of qubits.
+    _incremental: bool
+        True if offspring are evaluated from their parent's cached products.
+    _clifford: bool
+        True if Clifford-only chromosomes are simulated with the Tableau.
+    """
+
+    _NAME = 'statevector'
+    _EXACT = True
+    _BATCHED = True
+    _COST = 1
+
+    def __init__(self, shots: int = 2048, incremental: bool = True, clifford: bool = True) -> None:
+        """
+        StatevectorBackend constructor.
+
+        Parameters
+        ----------
+        shots: (int) optional
+            Not used, the engine is exact.
+        incremental: (bool) optional
+            Evaluate offspring from their parent's cached operator products.
+        clifford: (bool) optional
+            Simulate Clifford-only chromosomes with the Tableau.
+        """
+        super().__init__(shots)
+        self._gate_caches: dict = {}
+        self._incremental = incremental
+        self._clifford = clifford
+
+    def __getstate__(self) -> dict:
+        """Returns the state for pickling, i.e. to a worker process, leaving out the gate caches"""
+        state = self.__dict__.copy()
+        state['_gate_caches'] = {}
+        return state
+
+    def get_gate_cache(self, chromosome: Chromosome) -> GateCache:
+        """Returns the GateCache for the chromosome's gate set, building it the first time the gate set is seen"""
+        key = (tuple(chromosome.get_gate_types()), chromosome.get_qubits())
+        if key not in self._gate_caches:
+            self._gate_caches[key] = GateCache(chromosome.get_gate_types(), chromosome.get_qubits())
+        return self._gate_caches[key]
+
+    def find_init_state_probability(self, circuit, state: List[int]) -> float:
+        statevector = Statevector(circuit.chromosome.get_qubits())
+        statevector.initialize_initial_states(state)
+        statevector.apply_chromosome(circuit.chromosome)
+        return statevector.probability_of_one()
+
+    def find_probabilities(self, circuit) -> List[float]:
+        if self._clifford and circuit.is_clifford():
+            tableau = Tableau(circuit.chromosome.get_qubits())
+            tableau.apply_chromosome(circuit.chromosome)
+            return tableau.probabilities_of_one()
+
+        gate_cache = self.get_gate_cache(circuit.chromosome)
+        unitary = self.find_unitary(gate_cache, circuit.chromosome)
+        return gate_cache.probabilities_of_one(unitary)
+
+    def find_population_probabilities(self, chromosome_list: List[Chromosome]) -> np.ndarray:
+        if not chromosome_list:
+            return np.zeros((0, 0))
+        gate_cache = self.get_gate_cache(chromosome_list[0])
+        return gate_cache.population_probabilities_of_one(gate_cache.get_population_unitaries(chromosome_list))
+
+    def find_unitary(self, gate_cache: GateCache, chromosome: Chromosome):
+        """
+        Returns the circuit unitary of a chromosome. In incremental mode the chromosome's own products
+        are used if they are up to date, else the products of the parent it was copied from.
+
+        Parameters
+        ----------
+        gate_cache: (GateCache)
+            The cached gate operators of the chromosome's gate set.
+        chromosome: (Chromosome)
+            The chromosome that describes the circuit.
+
+        Returns
+        -------
+        unitary: np.ndarray
+            The circuit unitary.
+        """
+        if not self._incremental:
+            return gate_cache.get_chromosome_unitary(chromosome)
+
+        products = chromosome.get_products()
+        if products is not None and products.is_valid_for(chromosome):
+            return products.get_unitary()
+
+        parent = chromosome.get_parent()
+        chromosome.set_parent(None)
+        if parent is None:
+            return gate_cache.get_chromosome_unitary(chromosome)
+
+        parent_products = parent.get_products()
+        if parent_products is None or not parent_products.is_valid_for(parent):
+            parent_products = OperatorProducts(gate_cache, parent)
+            parent.set_products(parent_products)
+            parent.set_parent(None)
+
+        return parent_products.get_offspring_unitary(gate_cache, chromosome)
+
+
+class TableauBackend(Backend):
+    """Exact engine using the built-in stabilizer Tableau simulator. Only supports Clifford gates."""
+
+    _NAME = 'tableau'
+    _GATE_TYPES = Tableau.CLIFFORD_GATES
+    _EXACT = True
+    _COST = 0
+
+    def find_init_state_probability(self, circuit, state: List[int]) -> float:
+        index = 0
+        for bit in state:
+            index = index * 2 + bit
+        return self.find_probabilities(circuit)[index]
+
+    def find_probabilities(self, circuit) -> List[float]:
+        tableau = Tableau(circuit.chromosome.get_qubits())
+        tableau.apply_chromosome(circuit.chromosome)
+        return tableau.probabilities_of_one()
+
+
+class SampledBackend(StatevectorBackend):
+    """
+    Shot-sampled engine emulating finite shot noise from exact probabilities. The exact probabilities
+    of a whole generation are found with the statevector engine, and the shot counts for all chromosomes
+    and all CA initial states are drawn with one binomial NumPy call. The probability of one is the
+    number of ones divided by the number of shots, as in Circuit.calculate_probability_of_one().
+
+    Attributes
+    ----------
+    _random_generator: np.random.Generator
+        The generator the shot counts are drawn from.
+    """
+
+    _NAME = 'sampled'
+    _EXACT = False
+    _COST = 2
+
+    def __init__(self, shots: int = 2048, seed: int = None, incremental: bool = True, clifford: bool = True) -> None:
+        """
+        SampledBackend constructor.
+
+        Parameters
+        ----------
+        shots: (int) optional
+            Number of shots drawn for each circuit.
+        seed: (int) optional
+            Seed for the shot noise, None for a random seed.
+        incremental: (bool) optional
+            Evaluate offspring from their parent's cached operator products.
+        clifford: (bool) optional
+            Simulate Clifford-only chromosomes with the Tableau.
+        """
+        super().__init__(shots, incremental, clifford)
+        self._random_generator = np.random.default_rng(seed)
+
+    def set_seed(self, seed: int = None) -> None:
+        """Restarts the shot noise from a seed, None for a random seed"""
+        self._random_generator = np.random.default_rng(seed)
+
+    def get_random_state(self) -> dict:
+        """Returns the state of the shot noise generator, e.g. for a checkpoint"""
+        return self._random_generator.bit_generator.state
+
+    def set_random_state(self, state: dict) -> None:
+        """Continues the shot noise from a state returned by get_random_state()"""
+        self._random_generator.bit_generator.state = state
+
+    def sample_ones(self, probabilities, shots: int = None) -> np.ndarray:
+        """
+        Draws the number of measured ones for exact probabilities of one.
+
+        Parameters
+        ----------
+        probabilities: (array_like)
+            Exact probabilities of one, of any shape.
+        shots: (int) optional
+            Number of shots drawn for each probability. Defaults to the backend's shots.
+
+        Returns
+        -------
+        ones: np.ndarray
+            The number of ones, same shape as probabilities.
+        """
+        if shots is None:
+            shots = self._shots
+        probabilities = np.clip(np.asarray(probabilities, dtype=float), 0.0, 1.0)
+        return self._random_generator.binomial(shots, probabilities)
+
+    def sample_probabilities(self, probabilities) -> np.ndarray:
+        """
+        Draws shot counts for exact probabilities and returns the measured chances of one.
+
+        Parameters
+        ----------
+        probabilities: (array_like)
+            Exact probabilities of one, of any shape.
+
+        Returns
+        -------
+        chance_of_one: np.ndarray
+            The number of ones divided by the number of shots, same shape as probabilities.
+        """
+        return self.sample_ones(probabilities) / self._shots
+
+    def find_exact_probabilities(self, circuits: list) -> np.ndarray:
+        """Returns the exact probabilities of one for all the CA initial states of several circuits"""
+        return np.array([super(SampledBackend, self).find_probabilities(circuit) for circuit in circuits], dtype=float)
+
+    def find_init_state_probability(self, circuit, state: List[int]) -> float:
+        return float(self.sample_probabilities(super().find_init_state_probability(circuit, state)))
+
+    def find_probabilities(self, circuit) -> List[float]:
+        return self.find_generation_probabilities([circuit])[0]
+
+    def find_generation_probabilities(self, circuits: list) -> List[List[float]]:
+        if not circuits:
+            return []
+        return self.sample_probabilities(self.find_exact_probabilities(circuits)).tolist()
+
+    def find_population_probabilities(self, chromosome_list: List[Chromosome]) -> np.ndarray:
+        return self.sample_probabilities(super().find_population_probabilities(chromosome_list))
+
+
+class NoisyBackend(StatevectorBackend):
+    """
+    Built-in noisy engine, evolving density matrices with the channels of a NoiseModel (see DensityMatrix.py).
+    The probabilities are exact for the noisy circuit, and the circuits of a whole generation are simulated
+    as one batch.
+
+    Attributes
+    ----------
+    _noise_model: (NoiseModel)
+        The noise applied after every gate and at readout.
+    """
+
+    _NAME = 'noisy'
+    _NOISE = True
+    _COST = 3
+
+    def __init__(self, shots: int = 2048, noise_model: NoiseModel = None) -> None:
+        """
+        NoisyBackend constructor.
+
+        Parameters
+        ----------
+        shots: (int) optional
+            Not used, the engine is exact.
+        noise_model: (NoiseModel) optional
+            The noise of the simulation. Defaults to no noise.
+        """
+        super().__init__(shots, incremental=False, clifford=False)
+        self._noise_model = noise_model if noise_model is not None else NoiseModel()
+
+    def get_noise_model(self) -> NoiseModel:
+        """Returns the noise model of the engine"""
+        return self._noise_model
+
+    def find_init_state_probability(self, circuit, state: List[int]) -> float:
+        state_index = int(''.join(str(bit) for bit in state), 2)
+        return self.find_probabilities(circuit)[state_index]
+
+    def find_probabilities(self, circuit) -> List[float]:
+        return self.find_generation_probabilities([circuit])[0]
+
+    def find_generation_probabilities(self, circuits: list) -> List[List[float]]:
+        if not circuits:
+            return []
+        return self.find_population_probabilities([circuit.chromosome for circuit in circuits]).tolist()
+
+    def find_population_probabilities(self, chromosome_list: List[Chromosome]) -> np.ndarray:
+        if not chromosome_list:
+            return np.zeros((0, 0))
+        density_matrix = DensityMatrix(self.get_gate_cache(chromosome_list[0]), self._noise_model,
+                                       len(chromosome_list))
+        density_matrix.apply_chromosomes(chromosome_list)
+        return density_matrix.probabilities_of_one()
+
+
+class AerBackend(Backend):
+    """
+    Shot-sampled engine running on the Qiskit AER simulator, qiskit_aer.AerSimulator. The circuits for all
+    initial states, and for a whole generation, are submitted as one batched multi-experiment job.
+
+    Attributes
+    ----------
+    _METHOD: str
+        The simulation method of the AerSimulator.
+    _simulator:
+        The AerSimulator, created once with the engine. Qiskit is imported there, so runs on the NumPy
+        engines never load it.
+    """
+
+    _NAME = 'aer'
+    _METHOD = 'automatic'
+    _COST = 5
+
+    def __init__(self, shots: int = 2048) -> None:
+        """
+        AerBackend constructor.
+
+        Parameters
+        ----------
+        shots: (int) optional
+            Number of runs in the simulator for each circuit.
+        """
+        super().__init__(shots)
+        self._simulator = self._get_simulator()
+
+    def _get_simulator(self):
+        """Imports Qiskit AER and creates the simulator"""
+        from qiskit_aer import AerSimulator
+        return AerSimulator(method=self._METHOD)
+
+    def __getstate__(self) -> dict:
+        """Returns the state for pickling, leaving out the simulator handle"""
+        state = self.__dict__.copy()
+        del state['_simulator']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restores a pickled engine and looks up a new simulator handle"""
+        self.__dict__.update(state)
+        self._simulator = self._get_simulator()
+
+    def run(self, circuits: list) -> List[dict]:
+        """
+        Runs several circuits as one multi-experiment job on the simulator.
+
+        Parameters
+        ----------
+        circuits: List[QuantumCircuit]
+            The circuits to simulate.
+
+        Returns
+        -------
+        counts: List[dict]
+            The results from the AER simulation, one dictionary for each circuit in the same order.
+        """
+        job = self._simulator.run(circuits, shots=self._shots)
+        result = job.result()
+        return [result.get_counts(i) for i in range(0, len(circuits))]
+
+    def find_init_state_probability(self, circuit, state: List[int]) -> float:
+        circuit.clear_circuit()
+        circuit.initialize_initial_states(state)
+        circuit.generate_circuit()
+        return circuit.find_probability_from_counts(self.run([circuit.get_circuit()])[0])
+
+    def find_probabilities(self, circuit) -> List[float]:
+        return self.find_generation_probabilities([circuit])[0]
+
+    def find_generation_probabilities(self, circuits: list) -> List[List[float]]:
+        if not circuits:
+            return []
+
+        experiments = []
+        for circuit in circuits:
+            experiments.extend(circuit.generate_initial_state_circuits())
+        counts = self.run(experiments)
+
+        generation_probabilities = []
+        states = int(len(experiments) / len(circuits))
+        for i in range(0, len(circuits)):
+            chromosome_counts = counts[i * states:(i + 1) * states]
+            probabilities = [circuits[i].find_probability_from_counts(state_counts)
+                             for state_counts in chromosome_counts]
+            generation_probabilities.append(probabilities)
+
+        return generation_probabilities
+
+
+class DensityMatrixBackend(AerBackend):
+    """
+    Shot-sampled engine running on the Qiskit AER density matrix simulator, with an optional noise model.
+
+    Attributes
+    ----------
+    _noise_model: (NoiseModel)
+        The Qiskit AER noise model applied to every run, None for noiseless simulation.
+    """
+
+    _NAME = 'density_matrix'
+    _METHOD = 'density_matrix'
+    _NOISE = True
+    _COST = 6
+
+    def __init__(self, shots: int = 2048, noise_model=None) -> None:
+        """
+        DensityMatrixBackend constructor.
+
+        Parameters
+        ----------
+        shots: (int) optional
+            Number of runs in the simulator for each circuit.
+        noise_model: (NoiseModel) optional
+            A Qiskit AER noise model.
+        """
+        super().__init__(shots)
+        self._noise_model = noise_model
+
+    def run(self, circuits: list) -> List[dict]:
+        if self._noise_model is None:
+            job = self._simulator.run(circuits, shots=self._shots)
+        else:
+            job = self._simulator.run(circuits, shots=self._shots, noise_model=self._noise_model)
+        result = job.result()
+        return [result.get_counts(i) for i in range(0, len(circuits))]
+
+
+class StabilizerBackend(AerBackend):
+    """Shot-sampled engine running on the Qiskit AER stabilizer simulator. Only supports Clifford gates."""
+
+    _NAME = 'stabilizer'
+    _METHOD = 'stabilizer'
+    _GATE_TYPES = ['h', 'x', 'y', 'z', 'cx', 'swap']
+    _COST = 4
+
+
+_BACKENDS: dict = {}
+_ALIASES: dict = {'unitary': 'statevector'}
+_DEFAULT_BACKEND = 'aer'
+_default_backend: Backend = None
+
+
+def register_backend(backend_class: type) -> None:
+    """
+    Registers an engine so it can be found by name and by select_backend().
+
+    Parameters
+    ----------
+    backend_class: type
+        A subclass of Backend.
+    """
+    _BACKENDS[backend_class.get_capabilities()['name']] = backend_class
+
+
+def get_backend_names() -> List[str]:
+    """Returns the names of all registered engines"""
+    return list(_BACKENDS.keys())
+
+
+def get_default_backend() -> Backend:
+    """Returns the engine used when none is given, created the first time it is needed and shared after that"""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = get_backend(_DEFAULT_BACKEND)
+    return _default_backend
+
+
+def get_backend(backend: Union[str, Backend, None], **options) -> Backend:
+    """
+    Returns an engine. Names are looked up in the registry and a new engine is created,
+    engines that are already created are returned as they are, and None gives the shared
+    default engine, see get_default_backend().
+
+    Parameters
+    ----------
+    backend: (str, Backend or None)
+        The name of a registered engine, an engine, or None for the default engine.
+    options:
+        Keyword arguments given to the engine constructor, i.e. shots.
+
+    Returns
+    -------
+    backend: (Backend)
+        The engine.
+    """
+    if isinstance(backend, Backend):
+        return backend
+    if backend is None:
+        if not options:
+            return get_default_backend()
+        backend = _DEFAULT_BACKEND
+
+    name = _ALIASES.get(backend, backend)
+    if name not in _BACKENDS:
+        raise ValueError(str(backend) + " is not a valid backend!")
+    return _BACKENDS[name](**options)
+
+
+def select_backend(gate_types: List[str], noise: bool = False, exact: bool = False, **options) -> Backend:
+    """
+    Creates the cheapest registered engine that can handle the run.
+
+    Parameters
+    ----------
+    gate_types: List[str]
+        The gates the chromosomes of the run are built from.
+    noise: (bool) optional
+        True if the run needs noisy simulation.
+    exact: (bool) optional
+        True if the run needs exact probabilities.
+    options:
+        Keyword arguments given to the engine constructor.
+
+    Returns
+    -------
+    backend: (Backend)
+        The cheapest engine supporting the run.
+    """
+    candidates = [backend_class for backend_class in _BACKENDS.values()
+                  if backend_class.supports(gate_types, noise, exact)]
+    if not candidates:
+        raise ValueError("No backend supports the gates " + str(gate_types))
+
+    candidates.sort(key=lambda backend_class: backend_class.get_capabilities()['cost'])
+    return candidates[0](**options)
+
+
+register_backend(StatevectorBackend)
+register_backend(TableauBackend)
+register_backend(SampledBackend)
+register_backend(NoisyBackend)
+register_backend(AerBackend)
+register_backend(DensityMatrixBackend)
+register_backend(StabilizerBackend)
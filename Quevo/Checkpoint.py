@@ -0,0 +1,233 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import json
+import os
+import random
+import struct
+from typing import List
+
+import numpy as np
+
+from .Chromosome import Chromosome
+from .Generation import Generation
+from .Population import Population
+
+
+class Checkpoint(object):
+    """
+    A binary snapshot of an evolution run: the genotypes and fitness of the population, the parent list,
+    the state of the random number generators, the generation number, the best chromosome so far and the
+    generation's best ever chromosome.
+
+    The file is a short JSON header followed by the raw arrays, each aligned to 64 bytes:
+
+    | magic b'QUEVOCKP' | version (uint32) | header length (uint32) | JSON header | arrays ... |
+
+    The header holds the gate types, the scalar state and the dtype, shape and offset of every array.
+    load() memory-maps the file, so the arrays are views of the page cache and nothing is parsed until
+    restore() builds the chromosomes. save() writes to a temporary file and renames it, so a crash
+    during a save leaves the previous checkpoint intact.
+
+    The fitness cache is not saved. Exact engines find the same fitness again, and sampled engines
+    have the cache disabled, so a restored run goes on exactly like the one that was saved.
+
+    Attributes
+    ----------
+    _gate_types: List[str]
+        The gate set of the chromosomes.
+    _qubits: int
+        The number of qubits of the chromosomes.
+    _arrays: dict
+        The arrays of the checkpoint by name: 'lengths' (gates per chromosome), 'integers' and 'thetas'
+        (all genotypes, concatenated), 'fitness', 'parents' (indices of the parents) and 'random_state'
+        (the Mersenne Twister state of the random module).
+    _scalars: dict
+        The rest of the state: generation number, index of the best chromosome and of the generation's best
+        ever chromosome (-1 for none), the Gaussian of the random module and the state of the engine's generator.
+    """
+
+    _MAGIC = b'QUEVOCKP'
+    _VERSION = 1
+    _ALIGNMENT = 64
+
+    def __init__(self, gate_types: List[str], qubits: int, arrays: dict, scalars: dict) -> None:
+        """
+        Checkpoint constructor. Use from_generation() or load() to make a checkpoint.
+
+        Parameters
+        ----------
+        gate_types: (List[str])
+            The gate set of the chromosomes.
+        qubits: (int)
+            The number of qubits of the chromosomes.
+        arrays: (dict)
+            The arrays of the checkpoint by name.
+        scalars: (dict)
+            The rest of the state.
+        """
+        self._gate_types = gate_types
+        self._qubits = qubits
+        self._arrays = arrays
+        self._scalars = scalars
+
+    @classmethod
+    def from_generation(cls, generation: Generation, generation_number: int = 0,
+                        best_chromosome: Chromosome = None) -> 'Checkpoint':
+        """
+        Takes a snapshot of a generation and of the random number generators.
+
+        Parameters
+        ----------
+        generation: (Generation)
+            The generation to save.
+        generation_number: (int) optional
+            The number of generations evolved so far.
+        best_chromosome: (Chromosome) optional
+            The best chromosome found so far.
+        """
+        best_ever_chromosome = generation.get_best_ever_chromosome()
+        population = list(generation.get_chromosome_list())
+        indices = {id(chromosome): i for i, chromosome in enumerate(population)}
+        extra_list = [chromosome for chromosome in [best_chromosome, best_ever_chromosome] if chromosome is not None]
+        for chromosome in generation.get_parent_list() + extra_list:
+            if id(chromosome) not in indices:
+                indices[id(chromosome)] = len(population)
+                population.append(chromosome)
+
+        version, mersenne_state, gauss_next = random.getstate()
+        backend = generation.get_backend()
+        genes, thetas, lengths = Population.gather(population)
+        used = np.arange(genes.shape[1]) < lengths[:, None]
+        arrays = {
+            'lengths': lengths.astype(np.int32),
+            'integers': genes[used].astype(np.int16).ravel(),
+            'thetas': thetas[used].astype(np.float64),
+            'fitness': np.array([chromosome.get_fitness_score() for chromosome in population], dtype=np.float64),
+            'parents': np.array([indices[id(chromosome)] for chromosome in generation.get_parent_list()],
+                                dtype=np.int32),
+            'random_state': np.array(mersenne_state, dtype=np.uint32),
+        }
+        scalars = {
+            'generation_number': generation_number,
+            'population': len(generation.get_chromosome_list()),
+            'best': indices[id(best_chromosome)] if best_chromosome is not None else -1,
+            'best_ever': indices[id(best_ever_chromosome)] if best_ever_chromosome is not None else -1,
+            'random_version': version,
+            'gauss_next': gauss_next,
+            'backend_random_state': backend.get_random_state() if hasattr(backend, 'get_random_state') else None,
+        }
+        gate_types = population[0].get_gate_types() if population else []
+        return cls(gate_types, generation.get_qubits(), arrays, scalars)
+
+    def save(self, path: str) -> None:
+        """Writes the checkpoint to a file, replacing the old file only when the new one is complete"""
+        header = {'gate_types': self._gate_types, 'qubits': self._qubits, 'scalars': self._scalars, 'arrays': {}}
+        array_list = [(name, np.ascontiguousarray(array)) for name, array in self._arrays.items()]
+
+        offset = 0
+        for name, array in array_list:
+            header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset = offset + -(-array.nbytes // self._ALIGNMENT) * self._ALIGNMENT
+        header_bytes = json.dumps(header).encode('utf-8')
+        data_start = -(-(len(self._MAGIC) + 8 + len(header_bytes)) // self._ALIGNMENT) * self._ALIGNMENT
+
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as file:
+            file.write(self._MAGIC + struct.pack('<II', self._VERSION, len(header_bytes)) + header_bytes)
+            for name, array in array_list:
+                file.seek(data_start + header['arrays'][name]['offset'])
+                file.write(array.tobytes())
+            file.truncate(data_start + offset)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'Checkpoint':
+        """Memory-maps a checkpoint file"""
+        with open(path, 'rb') as file:
+            prefix = file.read(len(cls._MAGIC) + 8)
+            if prefix[:len(cls._MAGIC)] != cls._MAGIC:
+                raise ValueError(path + " is not a Quevo checkpoint")
+            version, header_length = struct.unpack('<II', prefix[len(cls._MAGIC):])
+            if version != cls._VERSION:
+                raise ValueError("Unsupported checkpoint version " + str(version))
+            header = json.loads(file.read(header_length).decode('utf-8'))
+
+        data_start = -(-(len(prefix) + header_length) // cls._ALIGNMENT) * cls._ALIGNMENT
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        arrays = {}
+        for name, layout in header['arrays'].items():
+            dtype = np.dtype(layout['dtype'])
+            count = int(np.prod(layout['shape']))
+            arrays[name] = np.frombuffer(data, dtype=dtype, count=count,
+                                         offset=data_start + layout['offset']).reshape(layout['shape'])
+        return cls(header['gate_types'], header['qubits'], arrays, header['scalars'])
+
+    def get_generation_number(self) -> int:
+        """Returns the number of generations evolved when the checkpoint was taken"""
+        return self._scalars['generation_number']
+
+    def get_chromosome_list(self) -> List[Chromosome]:
+        """Returns new chromosomes with the saved genotypes and fitness, the population followed by the
+        parents and the best chromosomes if they are not in it"""
+        lengths = np.asarray(self._arrays['lengths'], dtype=np.intp)
+        population = Population(self._gate_types, self._qubits, int(lengths.max()) if len(lengths) > 0 else 0,
+                                len(lengths))
+        chromosome_list = [Chromosome(self._gate_types, self._qubits, population) for i in range(0, len(lengths))]
+
+        rows = np.array([chromosome.get_row() for chromosome in chromosome_list], dtype=np.intp)
+        starts = np.cumsum(lengths) - lengths
+        row_index = np.repeat(rows, lengths)
+        gate_index = np.arange(int(lengths.sum())) - np.repeat(starts, lengths)
+        population.get_genes()[row_index, gate_index] = np.reshape(self._arrays['integers'], (-1, 3))
+        population.get_thetas()[row_index, gate_index] = self._arrays['thetas']
+        population.get_lengths()[rows] = lengths
+        population.get_fitness()[rows] = self._arrays['fitness']
+        return chromosome_list
+
+    def restore(self, generation: Generation) -> Chromosome:
+        """
+        Puts the saved population, parents, best ever chromosome and random number generator states back.
+
+        Parameters
+        ----------
+        generation: (Generation)
+            A generation with the same settings as the saved one.
+
+        Returns
+        -------
+        best_chromosome: Chromosome
+            The best chromosome so far, None if the checkpoint has none.
+        """
+        if generation.get_qubits() != self._qubits:
+            raise ValueError("The checkpoint has " + str(self._qubits) + " qubits, the generation "
+                             + str(generation.get_qubits()))
+
+        chromosome_list = self.get_chromosome_list()
+        parent_list = [chromosome_list[i] for i in self._arrays['parents'].tolist()]
+        generation.set_population(chromosome_list[:self._scalars['population']], parent_list)
+        best_ever = self._scalars.get('best_ever', -1)
+        generation.set_best_ever_chromosome(chromosome_list[best_ever] if best_ever >= 0 else None)
+
+        random.setstate((self._scalars['random_version'], tuple(self._arrays['random_state'].tolist()),
+                         self._scalars['gauss_next']))
+        backend = generation.get_backend()
+        if self._scalars['backend_random_state'] is not None and hasattr(backend, 'set_random_state'):
+            backend.set_random_state(self._scalars['backend_random_state'])
+
+        if self._scalars['best'] < 0:
+            return None
+        return chromosome_list[self._scalars['best']]
@@ -12,11 +12,81 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import copy
 import math
 import random
+import warnings
 from typing import List
 
+import numpy as np
+
+from .GateSet import GateSet
+from .Population import Population
+
+
+class GenotypeList(list):
+    """
+    The list returned by Chromosome.get_integer_list() and get_theta_list(). It is a copy of the genotype,
+    so changing it does not change the chromosome. Before the genotype was stored in a Population these
+    methods returned the chromosome's own lists, so every change warns, pointing to set_genotype().
+    """
+
+    def __reduce__(self) -> tuple:
+        """Pickles as a plain list, so unpickling does not warn"""
+        return list, (list(self),)
+
+    def _warn(self) -> None:
+        """Warns that the change does not reach the chromosome"""
+        warnings.warn("The list is a copy of the chromosome's genotype, changing it does not change the "
+                      "chromosome. Use Chromosome.set_genotype() or set_integer_list() instead.", stacklevel=3)
+
+    def __setitem__(self, index, value) -> None:
+        self._warn()
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index) -> None:
+        self._warn()
+        super().__delitem__(index)
+
+    def __iadd__(self, other):
+        self._warn()
+        return super().__iadd__(other)
+
+    def __imul__(self, other):
+        self._warn()
+        return super().__imul__(other)
+
+    def append(self, value) -> None:
+        self._warn()
+        super().append(value)
+
+    def extend(self, values) -> None:
+        self._warn()
+        super().extend(values)
+
+    def insert(self, index, value) -> None:
+        self._warn()
+        super().insert(index, value)
+
+    def pop(self, index=-1):
+        self._warn()
+        return super().pop(index)
+
+    def remove(self, value) -> None:
+        self._warn()
+        super().remove(value)
+
+    def clear(self) -> None:
+        self._warn()
+        super().clear()
+
+    def sort(self, *args, **kwargs) -> None:
+        self._warn()
+        super().sort(*args, **kwargs)
+
+    def reverse(self) -> None:
+        self._warn()
+        super().reverse()
+
 
 class Chromosome(object):
     """
@@ -53,51 +123,134 @@ class Chromosome(object):
 
     Some gates (RZZ, RXX) also need an angle value (theta) stored in a separate list.
 
+    The first int of a gate is an opcode of the chromosome's GateSet, which holds the properties of every
+    gate type in arrays indexed by the opcode.
+
+    The genotype is stored in a row of a Population, a structure of arrays store shared by all the chromosomes
+    of a generation, and the chromosome is a light view of that row. A chromosome made without a population
+    gets a store of its own.
+
     Attributes
     ----------
-    _integer_list: List[int]
-        List of integers representing the quantum _circuit.
-    _theta_list: List[float]
-        A list of angle values for the gates. This list is the same length as number of gates (len(_integer_list) / 3).
-    _length: int
-        The number of integers in the integer representation
-    _gate_types: List[str]
-        A list of all the gates the chromosome is allowed to operate with.
-    _gate_dict: dict
-        The table that holds gates and integers
+    _population: Population
+        The store that holds the integer list, theta list and fitness of the chromosome, and the gate set.
+    _row: int
+        The chromosome's row in the store.
+    _products: OperatorProducts
+        Cached operator products from the last exact evaluation, used to evaluate offspring incrementally.
+    _parent: Chromosome
+        The chromosome this one was copied from, until it has been evaluated.
     """
 
-    def __init__(self, gate_types: List[str]) -> None:
-        """The Chromosome constructor"""
-        self._integer_list: List[int] = []
-        self._theta_list: List[float] = []
-        self._fitness_score: float = 0
-        self._length: int = 0
-        self._gate_types = gate_types
-        self._gate_dict: dict = self._create_gate_dict()
+    __slots__ = ('_population', '_row', '_products', '_parent', '__weakref__')
+
+    def __init__(self, gate_types: List[str], qubits: int = 3, population: Population = None) -> None:
+        """
+        The Chromosome constructor
+
+        Parameters
+        ----------
+        gate_types : List[str]
+            A list of all the gates the chromosome is allowed to operate with.
+        qubits : (int) optional
+            The number of qubits in the _circuit, at least 3.
+        population : (Population) optional
+            The store to keep the chromosome in, with the same gate types and qubits. Defaults to a new store.
+        """
+        if qubits < 3:
+            raise ValueError("A chromosome needs at least 3 qubits, got " + str(qubits))
+        if population is None:
+            population = Population(gate_types, qubits, capacity=1)
+        elif GateSet.get(gate_types) is not population.get_gate_set() or qubits != population.get_qubits():
+            raise ValueError("The chromosome must have the gate types and qubits of its population")
+
+        self._population: Population = population
+        self._row: int = population.allocate()
+        self._products = None
+        self._parent = None
+
+    def __del__(self) -> None:
+        """Gives the chromosome's row back to its store"""
+        population = getattr(self, '_population', None)
+        if population is not None:
+            population.release(self._row)
 
     def __repr__(self) -> str:
         """Returns desired for printing == print(_integer_list)"""
-        return str(self._integer_list)
+        return str(self.get_integer_list())
 
     def __len__(self) -> int:
         """Returns the number of int in _integer_list"""
-        return self._length
+        return self.get_length()
 
     def __iter__(self) -> List[int]:
         """Returns the iterable _integer_list"""
-        yield from self._integer_list
+        yield from self.get_integer_list()
 
     def __lt__(self, other):
-        return self._fitness_score < other.get_fitness_score()
+        return self.get_fitness_score() < other.get_fitness_score()
 
-    def _create_gate_dict(self) -> dict:
-        """Creates and return a dict of the _gate_types"""
-        gate_dict: dict = {}
-        for j in range(0, len(self._gate_types)):
-            gate_dict[str(j)] = self._gate_types[j]
+    def __deepcopy__(self, memo: dict) -> 'Chromosome':
+        """
+        Returns a copy of the chromosome with a row of its own in the same store, without the evaluation
+        caches. Unlike a clone, the copy never shares its fitness with this chromosome.
+        """
+        row = self._population.allocate()
+        self._population.copy_row(self._row, row)
+        return Chromosome.from_row(self._population, row)
 
-        return gate_dict
+    def clone(self) -> 'Chromosome':
+        """
+        Returns a copy of the chromosome without the evaluation caches. The copy shares the row of this
+        chromosome, and gets a row of its own the first time either of them writes a gene or angle. Until
+        then a fitness set on one of them is the fitness of both.
+        """
+        clone = Chromosome.__new__(Chromosome)
+        clone._population = self._population
+        clone._row = self._population.share(self._row)
+        clone._products = None
+        clone._parent = None
+        return clone
+
+    def detach(self) -> 'Chromosome':
+        """
+        Returns a copy of the chromosome, with its fitness, in a store of its own. The copy shares no row
+        with this chromosome, so later writes to either do not reach the other.
+        """
+        chromosome = Chromosome(self.get_gate_types(), self.get_qubits())
+        chromosome.set_genotype(self.get_gene_array(), self.get_theta_array())
+        chromosome.set_fitness_score(self.get_fitness_score())
+        return chromosome
+
+    @staticmethod
+    def from_row(population: Population, row: int) -> 'Chromosome':
+        """Returns a chromosome for a row allocated in a store, which the chromosome then owns"""
+        chromosome = Chromosome.__new__(Chromosome)
+        chromosome._population = population
+        chromosome._row = row
+        chromosome._products = None
+        chromosome._parent = None
+        return chromosome
+
+    def _get_writable_row(self) -> int:
+        """Returns the chromosome's row, after copying it if it is shared with a clone"""
+        self._row = self._population.make_writable(self._row)
+        return self._row
+
+    def __getstate__(self) -> dict:
+        """Returns the state for copying and pickling, leaving out the evaluation caches"""
+        return {'gate_types': self.get_gate_types(), 'qubits': self.get_qubits(),
+                'integer_list': list(self.get_integer_list()), 'theta_list': list(self.get_theta_list()),
+                'fitness_score': self.get_fitness_score()}
+
+    def __setstate__(self, state: dict) -> None:
+        """Rebuilds an unpickled chromosome in a store of its own"""
+        self._population = Population(state['gate_types'], state['qubits'], capacity=1)
+        self._row = self._population.allocate()
+        self._products = None
+        self._parent = None
+        self.set_genotype(state['integer_list'], state['theta_list'])
+        self.set_fitness_score(state['fitness_score'])
 
     def set_integer_list(self, integer_list: List[int]) -> None:
         """
@@ -106,59 +259,137 @@ class Chromosome(object):
         Parameters:
            integer_list (List[int]): Quantum _circuit integer representation as list.
         """
-        old_integer_list = copy.copy(self._integer_list)
-        self.clear()
-        for integer in integer_list:
-            self._integer_list.append(integer)
-        self._update_length()
+        old_integer_list = self.get_integer_list()
+        new_integer_list = list(integer_list)
         if not old_integer_list:
-            self._generate_theta_list()
+            self.set_genotype(new_integer_list, self._generate_theta_list(new_integer_list))
         else:
-            self._update_theta_list(old_integer_list, self._integer_list)
+            self.set_genotype(new_integer_list, self._update_theta_list(old_integer_list, new_integer_list))
+
+    def set_genotype(self, integer_list: List[int], theta_list: List[float]) -> None:
+        """
+        Changes both the chromosome's integer list and theta list, without generating new angles.
+
+        Parameters
+        ----------
+        integer_list : List[int]
+            Quantum _circuit integer representation as list.
+        theta_list : List[float]
+            The angle of each gate, one per three integers.
+        """
+        self._population.set_genotype(self._get_writable_row(), integer_list, theta_list)
+
+    def get_population(self) -> Population:
+        """Returns the store that holds the chromosome"""
+        return self._population
+
+    def get_row(self) -> int:
+        """Returns the chromosome's row in its store"""
+        return self._row
+
+    def get_gate_types(self) -> List[str]:
+        """Returns the list of gates the chromosome is allowed to operate with"""
+        return self._population.get_gate_types()
+
+    def get_qubits(self) -> int:
+        """Returns the number of qubits in the _circuit"""
+        return self._population.get_qubits()
+
+    def get_gate_set(self) -> GateSet:
+        """Returns the compiled gate set, shared with the chromosome's store"""
+        return self._population.get_gate_set()
 
     def get_gate_dict(self) -> dict:
-        """Returns the chromosome's _gate_dict attribute"""
-        return self._gate_dict
+        """Returns the table that holds gates and integers"""
+        return self._population.get_gate_dict()
 
     def get_integer_list(self) -> List[int]:
-        """Returns the list of integers representing the _circuit"""
-        return self._integer_list
+        """
+        Returns a list of integers representing the _circuit.
 
-    def _update_length(self) -> None:
-        """Sets _length to the number of integers in _integer_list"""
-        self._length = len(self._integer_list)
+        The list is built from the chromosome's row on every call, so changing it does not change the
+        chromosome, and warns, see GenotypeList. Use set_genotype() or set_integer_list() to change the
+        chromosome, and get_gene_array() to read the gates without the copy.
+        """
+        gates = self._population.get_lengths()[self._row]
+        return GenotypeList(self._population.get_genes()[self._row, :gates].ravel().tolist())
+
+    def get_gene_array(self) -> np.ndarray:
+        """
+        Returns a read-only view of the gates in the chromosome's row, with shape (gates, 3).
+
+        The view is only valid until the chromosome, or its store, is next changed.
+        """
+        gates = self._population.get_lengths()[self._row]
+        genes = self._population.get_genes()[self._row, :gates]
+        genes.flags.writeable = False
+        return genes
 
     def get_length(self) -> int:
         """Returns the number of integers in _integer_list."""
-        return self._length
+        return 3 * int(self._population.get_lengths()[self._row])
 
     def get_theta_list(self) -> List[float]:
-        """Returns the list of angles in the _circuit"""
-        return self._theta_list
+        """
+        Returns a list of the angles in the _circuit.
+
+        Like get_integer_list(), the list is a new copy on every call, and warns when it is changed. Use
+        set_genotype() to change the angles, and get_theta_array() to read them without the copy.
+        """
+        gates = self._population.get_lengths()[self._row]
+        return GenotypeList(self._population.get_thetas()[self._row, :gates].tolist())
+
+    def get_theta_array(self) -> np.ndarray:
+        """
+        Returns a read-only view of the angles in the chromosome's row, with one angle per gate.
+
+        The view is only valid until the chromosome, or its store, is next changed.
+        """
+        gates = self._population.get_lengths()[self._row]
+        thetas = self._population.get_thetas()[self._row, :gates]
+        thetas.flags.writeable = False
+        return thetas
 
     def set_fitness_score(self, score: float) -> None:
-        self._fitness_score = score
+        self._population.set_fitness(self._row, score)
 
     def get_fitness_score(self) -> float:
-        return self._fitness_score
+        return float(self._population.get_fitness()[self._row])
+
+    def set_products(self, products) -> None:
+        """Stores the cached operator products of the chromosome"""
+        self._products = products
+
+    def get_products(self):
+        """Returns the cached operator products of the chromosome, None if there are none"""
+        return self._products
 
-    def _generate_theta_list(self) -> None:
-        """Generates a list of angles based on the current list of integers"""
-        self._theta_list.clear()
-        gates = int(self._length / 3)
+    def set_parent(self, parent) -> None:
+        """Sets the chromosome this one was copied from"""
+        self._parent = parent
+
+    def get_parent(self):
+        """Returns the chromosome this one was copied from, None if there is none"""
+        return self._parent
+
+    def _generate_theta_list(self, integer_list: List[int]) -> List[float]:
+        """Generates a list of angles based on a list of integers"""
+        parametric = self.get_gate_set().get_parametric()
+        theta_list = []
+        gates = int(len(integer_list) / 3)
 
         for i in range(0, gates):
             int_index = i * 3
-            gate = self._gate_dict[str(self._integer_list[int_index])]
-            if gate in ['rzz', 'rxx']:
+            if parametric[integer_list[int_index]]:
                 theta = random.uniform(0, 2 * math.pi)
-                self._theta_list.append(theta)
+                theta_list.append(theta)
             else:
-                self._theta_list.append(0)
+                theta_list.append(0)
+        return theta_list
 
-    def _update_theta_list(self, old_list: List[int], new_list: List[int]) -> None:
+    def _update_theta_list(self, old_list: List[int], new_list: List[int]) -> List[float]:
         """
-        Updates the list of theta values. Used when a _integer_list is changed.
+        Returns the updated list of theta values. Used when a _integer_list is changed.
         Takes the _integer.list before the change as old_list, and the _integer_list
         after the change as new_list.
 
@@ -169,19 +400,21 @@ class Chromosome(object):
         new_list : List[int]
             The new_list list with one or more changed integers.
         """
-        gates = int(self._length / 3)
+        parametric = self.get_gate_set().get_parametric()
+        theta_list = self.get_theta_array().tolist()
+        gates = int(len(new_list) / 3)
         change_list = self._change_in_theta(old_list, new_list)
 
         for i in range(0, gates):
             int_index = i * 3
-            gate = self._gate_dict[str(self._integer_list[int_index])]
-            if change_list[i] == 1 and gate in ['rzz', 'rxx']:
+            if change_list[i] == 1 and parametric[new_list[int_index]]:
                 theta = random.uniform(0, 2 * math.pi)
-                self._theta_list[i] = theta
-            elif gate in ['rzz', 'rxx']:
+                theta_list[i] = theta
+            elif parametric[new_list[int_index]]:
                 continue
             else:
-                self._theta_list[i] = 0
+                theta_list[i] = 0
+        return theta_list
 
     def _change_in_theta(self, old_list, new_list) -> List[int]:
         """
@@ -203,18 +436,17 @@ class Chromosome(object):
         """
 
         binary_list = []
-        for i in range(0, self._length):
-            if old_list[i] == new_list[i]:
+        for i in range(0, len(new_list), 3):
+            if old_list[i:i + 3] == new_list[i:i + 3]:
                 binary_list.append(0)
             else:
                 binary_list.append(1)
         return binary_list
 
     def clear(self) -> None:
-        """Clears chromosome's lists and resets _length"""
-        self._integer_list.clear()
-        self._theta_list.clear()
-        self._length = 0
+        """Clears chromosome's lists"""
+        row = self._get_writable_row()
+        self._population.get_lengths()[row] = 0
 
     def generate_random_chromosome(self, gates: int) -> None:
         """
@@ -226,93 +458,111 @@ class Chromosome(object):
         gates : int
             The number of gates in the generated _circuit representation.
         """
+        gate_types = self.get_gate_types()
+        qubits = self.get_qubits()
 
-        self.clear()
+        integer_list = []
         for i in range(gates * 3):
             if i % 3 == 0:
-                self._integer_list.append(random.randrange(0, len(self._gate_types)))
+                integer_list.append(random.randrange(0, len(gate_types)))
             else:
-                self._integer_list.append(random.randrange(0, 3))
+                integer_list.append(random.randrange(0, qubits))
 
-        self._update_length()
-        self._fix_duplicate_qubit_assignment()
-        self._generate_theta_list()
+        self._fix_duplicate_qubit_assignment(integer_list)
+        self.set_genotype(integer_list, self._generate_theta_list(integer_list))
 
     def mutate_chromosome(self, probability: int) -> None:
         """
         Mutates the chromosome. Mutation can be of either replacing a random gate in the chromosome
-        with a randomly generated new one, or replacing the chromosome by a randomly generated new one.
+        with a randomly generated new one, or changing the qubit connections of a random gate.
         Type of mutation is selected by probability.
 
+        Only the mutated gate is read and written, so the cost does not depend on the number of gates.
+        A parametric gate gets a new angle if the gate changed.
+
         Parameters
         ----------
         probability : (int) optional
             Value Between 0 and 100. The probability of replacing a gate.
-            The probability of replacing the whole chromosome is 1-probability
+            The probability of changing the qubit connections is 1-probability
         """
+        gates = self.get_length() // 3
+        replace = random.randrange(0, 100) <= probability
+        gate_index = random.randrange(0, gates)
 
-        old_integer_list = copy.copy(self._integer_list)
+        row = self._get_writable_row()
+        genes = self._population.get_genes()
+        old_gene = genes[row, gate_index].tolist()
+        gene = old_gene.copy()
 
-        if random.randrange(0, 100) <= probability:
-            self._replace_gate_with_random_gate()
+        if replace:
+            self._replace_gate_with_random_gate(gene)
         else:
-            self._change_qubit_connections()
-        self._fix_duplicate_qubit_assignment()
-        self._update_theta_list(old_integer_list, self._integer_list)
+            self._change_qubit_connections(gene)
+        self._fix_gate(gene)
 
-    def _replace_gate_with_random_gate(self) -> None:
+        genes[row, gate_index] = gene
+        if self.get_gate_set().get_parametric()[gene[0]]:
+            if gene != old_gene:
+                self._population.get_thetas()[row, gate_index] = random.uniform(0, 2 * math.pi)
+        else:
+            self._population.get_thetas()[row, gate_index] = 0
+
+    def _replace_gate_with_random_gate(self, gene: List[int]) -> None:
         """
-        Randomly selects a gate in the chromosome, and replaces it with a randomly generated new one.
+        Replaces a gate, given as its three integers, with a randomly generated new one.
         """
-        random_index = random.randrange(0, int(self._length/3)) * 3
-
-        self._integer_list[random_index] = random.randrange(0, len(self._gate_types))
-        self._integer_list[random_index + 1] = random.randrange(0, 3)
-        self._integer_list[random_index + 2] = random.randrange(0, 3)
+        gene[0] = random.randrange(0, len(self.get_gate_types()))
+        gene[1] = random.randrange(0, self.get_qubits())
+        gene[2] = random.randrange(0, self.get_qubits())
 
     @DeprecationWarning
     def _replace_with_random_chromosome(self) -> None:
         """Clears the chromosome and randomly generates a new _integer_list"""
-        gates = int(self._length/3)
+        gates = int(self.get_length()/3)
         self.clear()
         self.generate_random_chromosome(gates)
 
-    def _change_qubit_connections(self) -> None:
+    def _change_qubit_connections(self, gene: List[int]) -> None:
         """
-        Finds randomly a gate and randomly changes the target qubit for single qubit gates,
+        Randomly changes the target qubit of a gate, given as its three integers, for single qubit gates,
         and both target and control for multiple qubit gates
         """
+        qubits = self.get_qubits()
 
-        random_index = random.randrange(0, int(self._length / 3)) * 3
+        original_connection_1 = gene[1]
+        original_connection_2 = gene[2]
 
-        original_connection_1 = self._integer_list[random_index + 1]
-        original_connection_2 = self._integer_list[random_index + 2]
+        while original_connection_1 == gene[1]:
+            gene[1] = random.randrange(0, qubits)
 
-        while original_connection_1 == self._integer_list[random_index + 1]:
-            self._integer_list[random_index + 1] = random.randrange(0, 3)
+        while original_connection_2 == gene[2]:
+            gene[2] = random.randrange(0, qubits)
 
-        while original_connection_2 == self._integer_list[random_index + 2]:
-            self._integer_list[random_index + 2] = random.randrange(0, 3)
+    def _fix_duplicate_qubit_assignment(self, integer_list: List[int]) -> None:
+        """
+        Checks the integer list for gates that connects multiple qubits, see _fix_gate().
+        """
+        for int_index in range(0, len(integer_list), 3):
+            gene = integer_list[int_index:int_index + 3]
+            self._fix_gate(gene)
+            integer_list[int_index:int_index + 3] = gene
 
-    def _fix_duplicate_qubit_assignment(self) -> None:
+    def _fix_gate(self, gene: List[int]) -> None:
         """
-        Checks the chromosome for gates that connects multiple qubits.
+        Checks if a gate, given as its three integers, connects multiple qubits.
         If the gate has an invalid connection (it is connected to itself through the randomly generated integers),
         it generates a valid configuration randomly.
         """
-        gates = int(self._length / 3)
+        qubits = self.get_qubits()
 
-        for i in range(0, gates):
-            int_index = i * 3
+        if self.get_gate_set().get_two_qubit()[gene[0]] and gene[1] == gene[2]:
 
-            if ((self._gate_dict[str(self._integer_list[int_index])] in ['cx', 'swap', 'rzz', 'rxx']) and
-                    self._integer_list[int_index + 1] == self._integer_list[int_index + 2]):
+            if gene[1] == 0:
+                gene[1] = random.randrange(1, qubits)
 
-                if self._integer_list[int_index + 1] == 0:
-                    self._integer_list[int_index + 1] = random.randrange(1, 3)
+            elif gene[1] == qubits - 1:
+                gene[2] = random.randrange(0, qubits - 1)
 
-                elif self._integer_list[int_index + 1] == 1:
-                    self._integer_list[int_index + 2] = 0
-
-                elif self._integer_list[int_index + 1] == 2:
-                    self._integer_list[int_index + 2] = random.randrange(0, 2)
+            else:
+                gene[2] = gene[1] - 1
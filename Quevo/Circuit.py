@@ -12,10 +12,18 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-from typing import List
-from qiskit import QuantumCircuit, Aer, assemble
-from scipy.special import rel_entr
+import math
+from typing import TYPE_CHECKING, List, Union
+
+import numpy as np
+
+from .Backend import Backend, get_backend
 from .Chromosome import Chromosome
+from .GateSet import toffoli_qubits
+from .Tableau import Tableau
+
+if TYPE_CHECKING:
+    from qiskit import QuantumCircuit
 
 
 class Circuit(object):
@@ -27,14 +35,36 @@ class Circuit(object):
     chromosome (Chromosome):
         The integer string representation of the _circuit.
     _circuit (Qiskit.QuantumCircuit):
-        Qiskit representation of the chromosome. A _circuit that can be run and simulated.
+        Qiskit representation of the chromosome. A _circuit that can be run and simulated. Created,
+        and Qiskit imported, the first time it is needed, so the NumPy engines never load Qiskit.
     _SHOTS (int):
-        Number of runs in the qiskit quantum _circuit simulator.
+        Number of runs in the quantum _circuit simulator, taken from the backend.
     _STARTING_STATES (List[list]):
-        Possible cellular automata initial conditions for the 1D Von Neumann neighborhood.
+        Possible cellular automata initial conditions for the 1D neighborhood, one bit per qubit.
+        Three qubits (radius one) give the eight triplets of the Von Neumann neighborhood.
+    _backend (Backend):
+        The simulation engine used to find the probabilities, see Backend.py.
+    _ZERO_PROBABILITY (float):
+        Found probabilities closer to zero than this are rounding errors, and count as zero in the
+        Kullback-Liebler fitness.
     """
 
-    def __init__(self, chromosome: Chromosome):
+    _ZERO_PROBABILITY = 1e-12
+
+    # How each gate is added to a QuantumCircuit, called as add(circuit, b, c, theta, qubits).
+    _QISKIT_GATES = {
+        'h': lambda circuit, b, c, theta, qubits: circuit.h(b),
+        'x': lambda circuit, b, c, theta, qubits: circuit.x(b),
+        'y': lambda circuit, b, c, theta, qubits: circuit.y(b),
+        'z': lambda circuit, b, c, theta, qubits: circuit.z(b),
+        'cx': lambda circuit, b, c, theta, qubits: circuit.cx(b, c),
+        'swap': lambda circuit, b, c, theta, qubits: circuit.swap(b, c),
+        'rzz': lambda circuit, b, c, theta, qubits: circuit.rzz(theta=theta, qubit1=b, qubit2=c),
+        'rxx': lambda circuit, b, c, theta, qubits: circuit.rxx(theta=theta, qubit1=b, qubit2=c),
+        'toffoli': lambda circuit, b, c, theta, qubits: circuit.ccx(*toffoli_qubits(b, qubits)),
+    }
+
+    def __init__(self, chromosome: Chromosome, backend: Union[str, Backend] = None):
         """
         Circuit constructor. Takes a chromosome as parameter, and creates a Qiskit
         QuantumCircuit object form it.
@@ -43,18 +73,16 @@ class Circuit(object):
         ----------
         chromosome: (Chromosome)
             The chromosome that describes the QuantumCircuit.
+        backend: (str or Backend) optional
+            The simulation engine, or the name of a registered one, i.e. 'aer' or 'statevector'. Defaults to
+            the shared AER engine, see get_default_backend().
         """
         self.chromosome = chromosome
-        self._circuit = QuantumCircuit(3, 1)
-        self._SHOTS = 2048
-        self._STARTING_STATES = [[0, 0, 0],
-                                 [0, 0, 1],
-                                 [0, 1, 0],
-                                 [0, 1, 1],
-                                 [1, 0, 0],
-                                 [1, 0, 1],
-                                 [1, 1, 0],
-                                 [1, 1, 1]]
+        self._backend = get_backend(backend)
+        self._qubits = chromosome.get_qubits()
+        self._circuit = None
+        self._SHOTS = self._backend.get_shots()
+        self._STARTING_STATES = self.generate_starting_states(self._qubits)
         self.results = {}
 
     def __repr__(self):
@@ -67,51 +95,25 @@ class Circuit(object):
         """
         gates = int(self.chromosome.get_length() / 3)
 
-        gate_dict = self.chromosome.get_gate_dict()
+        gate_adders = [self._QISKIT_GATES[gate] for gate in self.chromosome.get_gate_set().get_gate_types()]
+        integer_list = self.chromosome.get_integer_list()
+        theta_list = self.chromosome.get_theta_list()
+        circuit = self._get_quantum_circuit()
 
         for i in range(0, gates):
-            gate_index = i * 3
-
-            a = self.chromosome.get_integer_list()[gate_index]
-            b = self.chromosome.get_integer_list()[gate_index + 1]
-            c = self.chromosome.get_integer_list()[gate_index + 2]
-
-            gate = gate_dict[str(a)]
-
-            if gate == 'h':
-                self._circuit.h(b)
-            elif gate == 'cx':
-                self._circuit.cx(b, c)
-            elif gate == 'x':
-                self._circuit.x(b)
-            elif gate == 'swap':
-                self._circuit.swap(b, c)
-            elif gate == 'rzz':
-                theta = self.chromosome.get_theta_list()[i]
-                self._circuit.rzz(theta=theta, qubit1=b, qubit2=c)
-            elif gate == 'rxx':
-                theta = self.chromosome.get_theta_list()[i]
-                self._circuit.rxx(theta=theta, qubit1=b, qubit2=c)
-            elif gate == 'toffoli':
-                target = b
-                if target == 1:
-                    self._circuit.toffoli(0, 2, target)
-                else:
-                    self._circuit.toffoli(abs(target - 1), abs(target - 2), target)
-            elif gate == 'y':
-                self._circuit.y(b)
-            elif gate == 'z':
-                self._circuit.z(b)
-            else:
-                print(gate + " is not a valid gate!")
+            a, b, c = integer_list[i * 3:i * 3 + 3]
+            gate_adders[a](circuit, b, c, theta_list[i], self._qubits)
 
-        self._circuit.measure(0, 0)
+        circuit.measure(0, 0)
 
     def calculate_probability_of_one(self) -> float:
         """Returns the measured chance of one after simulation"""
-        counts = self.run_simulator()
+        return self.find_probability_from_counts(self.run_simulator())
+
+    def find_probability_from_counts(self, counts: dict) -> float:
+        """Returns the measured chance of one in the counts from a simulation"""
         if '1' in counts:
-            chance_of_one = counts['1'] / self._SHOTS
+            chance_of_one = counts['1'] / sum(counts.values())
         else:
             chance_of_one = 0.0
 
@@ -132,50 +134,188 @@ class Circuit(object):
         fitness: (float)
             The chromosome fitness score.
         """
+        return self.calculate_difference_fitness(self.find_probabilities(), desired_chance_of_one)
+
+    def find_kullback_liebler_fitness(self, desired_chance_of_one: List[float]) -> float:
+        """
+        Calculates and return the fitness for the chromosome as relative entropy (Kullback-Liebler).
+
+        Parameters
+        ----------
+        desired_chance_of_one: List[float]
+            A list of desired probabilities for all the CA initial states.
+
+        Returns
+        -------
+        fitness: (float)
+            The the Kullback-Liebler divergence as chromosome fitness score.
+
+        """
+        return self.calculate_kullback_liebler_fitness(self.find_probabilities(), desired_chance_of_one)
+
+    @staticmethod
+    def _check_outcome_length(found_length: int, desired_chance_of_one: List[float]) -> None:
+        """Raises a ValueError unless there is one desired probability for each initial state"""
+        if len(desired_chance_of_one) != found_length:
+            raise ValueError("The desired outcome needs one value for each of the " + str(found_length) +
+                             " initial states, got " + str(len(desired_chance_of_one)))
+
+    @staticmethod
+    def calculate_difference_fitness(found_chance_of_one: List[float],
+                                     desired_chance_of_one: List[float]) -> float:
+        """
+        Calculates the sum of differences between found and desired probabilities for all initial states.
+
+        Parameters
+        ----------
+        found_chance_of_one: List[float]
+            The probabilities found by simulation, one for each CA initial state.
+        desired_chance_of_one: List[float]
+            A list of desired probabilities for all the CA initial states.
+
+        Returns
+        -------
+        fitness: (float)
+            The sum of differences.
+        """
+        Circuit._check_outcome_length(len(found_chance_of_one), desired_chance_of_one)
         fitness = 0
-        for i in range(0, len(self._STARTING_STATES)):
+        for i in range(0, len(found_chance_of_one)):
 
-            state = self._STARTING_STATES[i]
             probability = desired_chance_of_one[i]
-            found_probability = self.find_init_state_probability(state)
+            found_probability = found_chance_of_one[i]
             difference = abs(probability - found_probability)
             fitness = fitness + difference
 
         return fitness
 
-    def find_kullback_liebler_fitness(self, desired_chance_of_one: List[float]) -> float:
+    @staticmethod
+    def calculate_kullback_liebler_fitness(found_chance_of_one: List[float],
+                                           desired_chance_of_one: List[float]) -> float:
         """
-        Calculates and return the fitness for the chromosome as relative entropy (Kullback-Liebler).
+        Calculates the relative entropy (Kullback-Liebler) between found and desired probabilities.
 
         Parameters
         ----------
+        found_chance_of_one: List[float]
+            The probabilities found by simulation, one for each CA initial state.
         desired_chance_of_one: List[float]
             A list of desired probabilities for all the CA initial states.
 
         Returns
         -------
         fitness: (float)
-            The the Kullback-Liebler divergence as chromosome fitness score.
-
+            The the Kullback-Liebler divergence.
         """
+        Circuit._check_outcome_length(len(found_chance_of_one), desired_chance_of_one)
         fitness = 0
         probabilities = []
-        found_probabilities = []
-        for i in range(0, len(self._STARTING_STATES)):
-
-            state = self._STARTING_STATES[i]
-            found_probabilities.append(self.find_init_state_probability(state))
+        for i in range(0, len(found_chance_of_one)):
             probabilities.append(desired_chance_of_one[i])
 
-        p = [x if x != 0 else 0.0001 for x in found_probabilities]
+        p = [x if abs(x) > Circuit._ZERO_PROBABILITY else 0.0001 for x in found_chance_of_one]
         q = [x if x != 0 else 0.0001 for x in probabilities]
 
-        d = sum(rel_entr(p, q))
+        d = sum(Circuit.relative_entropy(p, q))
 
         fitness = fitness + d
 
         return fitness
 
+    @staticmethod
+    def calculate_population_difference_fitness(found_chance_of_one: np.ndarray,
+                                                desired_chance_of_one: List[float]) -> np.ndarray:
+        """
+        Vectorised calculate_difference_fitness() for a whole population.
+
+        Parameters
+        ----------
+        found_chance_of_one: np.ndarray
+            The probabilities found by simulation, with shape (population, initial states).
+        desired_chance_of_one: List[float]
+            A list of desired probabilities for all the CA initial states.
+
+        Returns
+        -------
+        fitness: np.ndarray
+            The sum of differences of every chromosome.
+        """
+        Circuit._check_outcome_length(found_chance_of_one.shape[1], desired_chance_of_one)
+        return np.abs(np.asarray(desired_chance_of_one) - found_chance_of_one).sum(axis=1)
+
+    @staticmethod
+    def calculate_population_kullback_liebler_fitness(found_chance_of_one: np.ndarray,
+                                                      desired_chance_of_one: List[float]) -> np.ndarray:
+        """
+        Vectorised calculate_kullback_liebler_fitness() for a whole population.
+
+        Parameters
+        ----------
+        found_chance_of_one: np.ndarray
+            The probabilities found by simulation, with shape (population, initial states).
+        desired_chance_of_one: List[float]
+            A list of desired probabilities for all the CA initial states.
+
+        Returns
+        -------
+        fitness: np.ndarray
+            The Kullback-Liebler divergence of every chromosome.
+        """
+        Circuit._check_outcome_length(found_chance_of_one.shape[1], desired_chance_of_one)
+        desired = np.asarray(desired_chance_of_one, dtype=float)
+        p = np.where(np.abs(found_chance_of_one) > Circuit._ZERO_PROBABILITY, found_chance_of_one, 0.0001)
+        q = np.where(desired != 0, desired, 0.0001)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            terms = np.where((p > 0) & (q > 0), p * np.log(p / q), np.inf)
+        return terms.sum(axis=1)
+
+    @staticmethod
+    def relative_entropy(p: List[float], q: List[float]) -> List[float]:
+        """
+        Element-wise relative entropy, computed like scipy.special.rel_entr without importing SciPy:
+        p log(p / q) if p > 0 and q > 0, 0 if p = 0 and q >= 0, and inf otherwise.
+
+        Parameters
+        ----------
+        p: List[float]
+            The found probabilities.
+        q: List[float]
+            The desired probabilities.
+
+        Returns
+        -------
+        relative_entropy: List[float]
+            One term for each pair of probabilities.
+        """
+        terms = []
+        for x, y in zip(p, q):
+            if math.isnan(x) or math.isnan(y):
+                terms.append(math.nan)
+            elif x > 0 and y > 0:
+                ratio = x / y
+                if 0.5 < ratio < 2:
+                    terms.append(x * math.log1p((x - y) / y))
+                elif 1e-300 < ratio < math.inf:
+                    terms.append(x * math.log(ratio))
+                else:
+                    terms.append(x * (math.log(x) - math.log(y)))
+            elif x == 0 and y >= 0:
+                terms.append(0.0)
+            else:
+                terms.append(math.inf)
+        return terms
+
+    def find_probabilities(self) -> List[float]:
+        """
+        Finds the probability of measuring one for all the CA initial states.
+
+        Returns
+        -------
+        probabilities: (List[float])
+            The probability of one for each state in _STARTING_STATES, in the same order.
+        """
+        return self._backend.find_probabilities(self)
+
     def find_init_state_probability(self, state: List[int]) -> float:
         """
         Finds the difference between the desired probability and measured probability for given state.
@@ -190,22 +330,17 @@ class Circuit(object):
         difference: (float)
             The difference between the desired probability and measured probability for given state.
         """
-        self.clear_circuit()
-        self.initialize_initial_states(state)
-        self.generate_circuit()
-
-        chance_of_one = self.calculate_probability_of_one()
-        return chance_of_one
+        return self._backend.find_init_state_probability(self, state)
 
     def print_ca_outcomes(self, desired_chance_of_one: List[float]):
         """Prints a table of the results from a run of the chromosome"""
         print("Initial State | Desired outcome | Actual outcome  | Difference")
         total_diff = 0
+        found_probabilities = self.find_probabilities()
         for i in range(0, len(self._STARTING_STATES)):
-            state = self._STARTING_STATES[i]
             probability = desired_chance_of_one[i]
 
-            found_probability = self.find_init_state_probability(state)
+            found_probability = found_probabilities[i]
             difference = abs(found_probability - probability)
             total_diff = total_diff + difference
             desired_format = "{:.4f}".format(desired_chance_of_one[i])
@@ -216,20 +351,10 @@ class Circuit(object):
                   + desired_format + "           "
                   + chance_format + "           "
                   + diff_format)
-            self.clear_circuit()
         print("Total difference: " + str(total_diff))
 
     def get_total_difference(self, desired_chance_of_one: List[float]):
-        total_diff = 0
-        for i in range(0, len(self._STARTING_STATES)):
-            state = self._STARTING_STATES[i]
-            probability = desired_chance_of_one[i]
-
-            found_probability = self.find_init_state_probability(state)
-            difference = abs(found_probability - probability)
-            total_diff = total_diff + difference
-
-        return total_diff
+        return self.calculate_difference_fitness(self.find_probabilities(), desired_chance_of_one)
 
     def print_counts(self):
         """Prints the counts result from simulation"""
@@ -241,6 +366,26 @@ class Circuit(object):
             print(self.run_simulator())
             index = index + 1
 
+    @staticmethod
+    def generate_starting_states(qubits: int) -> List[List[int]]:
+        """
+        Generates all the Cellular Automata (CA) initial states for a neighborhood of the given size.
+
+        Parameters
+        ----------
+        qubits: int
+            The number of cells in the neighborhood, 2 * radius + 1.
+
+        Returns
+        -------
+        starting_states: List[List[int]]
+            The 2^qubits states in counting order, with the first cell as the most significant bit.
+        """
+        starting_states = []
+        for i in range(0, 2 ** qubits):
+            starting_states.append([(i >> (qubits - 1 - q)) & 1 for q in range(0, qubits)])
+        return starting_states
+
     def initialize_initial_states(self, triplet: List[int]) -> None:
         """
         Initializes a Cellular Automata (CA) state in the _circuit.
@@ -248,38 +393,70 @@ class Circuit(object):
         Parameters
         ----------
         triplet: List[int]
-            A list of three integer in {0,1} representing the one of the
-            eight starting possibilities in 1D Von Neumann CA.
+            A list of integers in {0,1}, one per qubit, representing the one of the
+            starting possibilities in 1D CA (the eight triplets of the Von Neumann neighborhood for three qubits).
         """
-
-        if triplet[0] == 1:
-            self._circuit.x(0)
-        if triplet[1] == 1:
-            self._circuit.x(1)
-        if triplet[2] == 1:
-            self._circuit.x(2)
+        for qubit in range(0, len(triplet)):
+            if triplet[qubit] == 1:
+                self._get_quantum_circuit().x(qubit)
 
     def run_simulator(self) -> dict:
         """
-        Runs the _circuit on the Qiskit AER simulator and returns the results as a dictionary.
+        Runs the _circuit on the circuit's Qiskit based backend and returns the results as a dictionary.
 
         Returns
         -------
         counts: dict
             The results from the AER simulation.
         """
-        aer_sim = Aer.get_backend('aer_simulator')
-        # aer_sim = Aer.get_backend('aer_simulator_density_matrix')
-        # aer_sim = Aer.get_backend('aer_simulator_stabilizer')
-        quantum_circuit = assemble(self._circuit, shots=self._SHOTS)
-        job = aer_sim.run(quantum_circuit)
-        counts = job.result().get_counts()
-        return counts
+        return self._backend.run([self._get_quantum_circuit()])[0]
+
+    def generate_initial_state_circuits(self) -> List['QuantumCircuit']:
+        """
+        Generates one Qiskit QuantumCircuit for each of the CA initial states.
+
+        Returns
+        -------
+        circuits: List[QuantumCircuit]
+            The circuits in the same order as _STARTING_STATES.
+        """
+        circuits = []
+        for state in self._STARTING_STATES:
+            self.clear_circuit()
+            self.initialize_initial_states(state)
+            self.generate_circuit()
+            circuits.append(self._get_quantum_circuit().copy())
+
+        return circuits
+
+    def get_circuit(self) -> 'QuantumCircuit':
+        """Returns the Qiskit QuantumCircuit"""
+        return self._get_quantum_circuit()
+
+    def _get_quantum_circuit(self) -> 'QuantumCircuit':
+        """Returns the Qiskit QuantumCircuit, importing Qiskit and creating the circuit on first use"""
+        if self._circuit is None:
+            from qiskit import QuantumCircuit
+            self._circuit = QuantumCircuit(self._qubits, 1)
+        return self._circuit
+
+    def get_starting_states(self) -> List[List[int]]:
+        """Returns the CA initial states"""
+        return self._STARTING_STATES
+
+    def is_clifford(self) -> bool:
+        """Returns True if the chromosome only holds Clifford gates, and can be simulated with a Tableau"""
+        return Tableau.is_clifford(self.chromosome)
+
+    def get_backend(self) -> Backend:
+        """Returns the circuit's simulation engine"""
+        return self._backend
 
     def draw(self) -> None:
         """Prints a visual representation of the _circuit"""
-        print(self._circuit.draw(output='text'))
+        print(self._get_quantum_circuit().draw(output='text'))
 
     def clear_circuit(self) -> None:
-        """Clears the Qiskit QuantumCircuit for all gates"""
-        self._circuit.data.clear()
+        """Clears the Qiskit QuantumCircuit for all gates, if it has been created"""
+        if self._circuit is not None:
+            self._circuit.data.clear()
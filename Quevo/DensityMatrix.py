@@ -0,0 +1,160 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+from typing import List
+
+import numpy as np
+
+from .Chromosome import Chromosome
+from .GateCache import GateCache
+from .NoiseModel import NoiseModel
+from .Population import Population
+
+
+class DensityMatrix(object):
+    """
+    A batched NumPy density matrix simulator with the noise of a NoiseModel.
+
+    The state holds one density matrix for every CA starting state of every chromosome in the batch,
+    with shape (chromosomes, 2^n, 2^n, 2^n), so a whole generation is simulated in lockstep: at step t
+    gate t of every chromosome is applied at once. The gates are the full register operators of a
+    GateCache, gathered for the whole batch by indexing its tables with the opcodes, and the qubits the
+    noise acts on come from the opcode tables of the GateSet. Each noise channel is a stack of full
+    register Kraus operators, applied to all density matrices with batched matrix products. Chromosomes
+    with fewer gates get the identity once they run out.
+
+    Attributes
+    ----------
+    _gate_cache: GateCache
+        The cached gate operators of the chromosomes' gate set.
+    _noise_model: NoiseModel
+        The noise applied after every gate and at readout.
+    _qubits: int
+        The number of qubits in the register.
+    _channels: List[List[np.ndarray]]
+        For each noise channel, the full register Kraus operators acting on each qubit.
+    _state: np.ndarray
+        The density matrices, indexed by chromosome, starting state, row and column.
+    """
+
+    def __init__(self, gate_cache: GateCache, noise_model: NoiseModel = None, chromosomes: int = 1) -> None:
+        """
+        DensityMatrix constructor. Every chromosome starts out with all the CA starting states.
+
+        Parameters
+        ----------
+        gate_cache: (GateCache)
+            The cached gate operators of the chromosomes' gate set.
+        noise_model: (NoiseModel) optional
+            The noise of the simulation. Defaults to no noise.
+        chromosomes: (int) optional
+            The number of chromosomes in the batch.
+        """
+        self._gate_cache = gate_cache
+        self._noise_model = noise_model if noise_model is not None else NoiseModel()
+        self._qubits = gate_cache.get_qubits()
+        self._channels: List[List[np.ndarray]] = [self._embed_channel(kraus)
+                                                  for kraus in self._noise_model.get_kraus_operators()]
+        self.initialize_initial_states(chromosomes)
+
+    def _embed_channel(self, kraus: np.ndarray) -> List[np.ndarray]:
+        """Returns the full register Kraus operators of a single qubit channel, one stack for each qubit"""
+        embedded = []
+        for qubit in range(0, self._qubits):
+            before = np.eye(2 ** qubit)
+            after = np.eye(2 ** (self._qubits - 1 - qubit))
+            embedded.append(np.array([np.kron(np.kron(before, operator), after) for operator in kraus]))
+        return embedded
+
+    def initialize_initial_states(self, chromosomes: int = 1) -> None:
+        """Sets the density matrices of every chromosome to the CA starting states |i><i|"""
+        dimension = 2 ** self._qubits
+        self._state = np.zeros((chromosomes, dimension, dimension, dimension), dtype=complex)
+        self._state[:, np.arange(dimension), np.arange(dimension), np.arange(dimension)] = 1
+
+    def get_state(self) -> np.ndarray:
+        """Returns the density matrices, indexed by chromosome, starting state, row and column"""
+        return self._state
+
+    def apply_operators(self, operators: np.ndarray) -> None:
+        """
+        Applies one unitary to each chromosome's density matrices, rho -> U rho U^†.
+
+        Parameters
+        ----------
+        operators: np.ndarray
+            The unitaries, with shape (chromosomes, 2^n, 2^n).
+        """
+        operators = operators[:, None]
+        self._state = operators @ self._state @ np.conj(np.swapaxes(operators, -1, -2))
+
+    def apply_channel(self, kraus: np.ndarray, mask: np.ndarray) -> None:
+        """
+        Applies a channel, rho -> sum_k K_k rho K_k^†, to the density matrices of the masked chromosomes.
+
+        Parameters
+        ----------
+        kraus: np.ndarray
+            The full register Kraus operators, with shape (m, 2^n, 2^n).
+        mask: np.ndarray
+            True for the chromosomes the channel is applied to.
+        """
+        if mask.all():
+            self._state = self._conjugate(kraus, self._state)
+        elif mask.any():
+            self._state[mask] = self._conjugate(kraus, self._state[mask])
+
+    @staticmethod
+    def _conjugate(kraus: np.ndarray, state: np.ndarray) -> np.ndarray:
+        """Returns sum_k K_k rho K_k^† for every density matrix, one batched matmul pair per Kraus operator"""
+        result = np.zeros_like(state)
+        for operator in kraus:
+            result += operator @ state @ np.conj(operator.T)
+        return result
+
+    def apply_chromosomes(self, chromosome_list: List[Chromosome]) -> None:
+        """
+        Applies the gates of every chromosome in the batch, with the noise after each gate.
+
+        Parameters
+        ----------
+        chromosome_list: List[Chromosome]
+            One chromosome for each batch entry.
+        """
+        if not chromosome_list:
+            return
+        genes, thetas, lengths = Population.gather(chromosome_list)
+        rows = self._gate_cache.get_rows(genes, lengths)
+        touched = self._gate_cache.get_gate_set().get_qubit_masks(genes, self._qubits)
+        touched[np.arange(genes.shape[1]) >= lengths[:, None]] = False
+
+        for i in range(0, genes.shape[1]):
+            self.apply_operators(self._gate_cache.get_operators(rows[:, i], thetas[:, i]))
+            for channel in self._channels:
+                for qubit in range(0, self._qubits):
+                    self.apply_channel(channel[qubit], touched[:, i, qubit])
+
+    def probabilities_of_one(self, qubit: int = 0) -> np.ndarray:
+        """
+        Returns the probability of reading the given qubit as one, including the readout error.
+
+        Returns
+        -------
+        probabilities: np.ndarray
+            The probabilities with shape (chromosomes, 2^n), one for each CA starting state.
+        """
+        indices = np.arange(2 ** self._qubits)
+        one_rows = ((indices >> (self._qubits - 1 - qubit)) & 1) == 1
+        diagonal = np.diagonal(self._state, axis1=-2, axis2=-1).real
+        return self._noise_model.apply_readout_error(diagonal[:, :, one_rows].sum(axis=-1))
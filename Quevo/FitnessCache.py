@@ -0,0 +1,146 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+from collections import OrderedDict
+from typing import List
+
+from .Chromosome import Chromosome
+
+
+class FitnessCache(object):
+    """
+    A bounded fitness cache keyed by genotype, with least recently used (LRU) eviction.
+
+    The key is the chromosome's gate types, number of qubits, gate and angle bytes, the desired outcome
+    and the kind of fitness. The gate types and qubits are part of the key, since the same integers mean
+    different circuits in another gate set or register, so one cache can be shared by several generations.
+    Elites and duplicate offspring are then scored with a dictionary lookup instead of a simulation.
+
+    Attributes
+    ----------
+    _max_size: int
+        The maximum number of stored fitness values. 0 disables the cache.
+    _fitness_dict: OrderedDict
+        The stored fitness values, the least recently used first.
+    _hits: int
+        Number of lookups that found a fitness value.
+    _misses: int
+        Number of lookups that did not find a fitness value.
+    """
+
+    def __init__(self, max_size: int = 100000) -> None:
+        """
+        FitnessCache constructor.
+
+        Parameters
+        ----------
+        max_size: (int) optional
+            The maximum number of stored fitness values. 0 disables the cache.
+        """
+        self._max_size = max_size
+        self._fitness_dict: OrderedDict = OrderedDict()
+        self._hits: int = 0
+        self._misses: int = 0
+
+    def __len__(self) -> int:
+        """Returns the number of stored fitness values"""
+        return len(self._fitness_dict)
+
+    def __repr__(self) -> str:
+        """Returns the size and hit/miss counters of the cache"""
+        return ("FitnessCache(size=" + str(len(self)) + ", hits=" + str(self._hits)
+                + ", misses=" + str(self._misses) + ")")
+
+    @staticmethod
+    def make_key(chromosome: Chromosome, desired_outcome: List[float], fitness_type: str) -> tuple:
+        """
+        Returns the cache key of a chromosome.
+
+        Parameters
+        ----------
+        chromosome: (Chromosome)
+            The chromosome to find the key for.
+        desired_outcome: List[float]
+            The CA outcomes the chromosome is tested against.
+        fitness_type: str
+            The kind of fitness, i.e. 'kl' or 'diff'.
+
+        Returns
+        -------
+        key: tuple
+            The hashable key.
+        """
+        return (fitness_type,
+                tuple(desired_outcome),
+                tuple(chromosome.get_gate_types()),
+                chromosome.get_qubits(),
+                chromosome.get_gene_array().tobytes(),
+                chromosome.get_theta_array().tobytes())
+
+    def get(self, key: tuple):
+        """
+        Returns the fitness stored for the key, or None if there is none, and updates the counters.
+
+        Parameters
+        ----------
+        key: tuple
+            A key from make_key().
+        """
+        if key in self._fitness_dict:
+            self._fitness_dict.move_to_end(key)
+            self._hits = self._hits + 1
+            return self._fitness_dict[key]
+
+        self._misses = self._misses + 1
+        return None
+
+    def put(self, key: tuple, fitness: float) -> None:
+        """
+        Stores a fitness value, evicting the least recently used one if the cache is full.
+
+        Parameters
+        ----------
+        key: tuple
+            A key from make_key().
+        fitness: float
+            The fitness value.
+        """
+        if self._max_size <= 0:
+            return
+
+        self._fitness_dict[key] = fitness
+        self._fitness_dict.move_to_end(key)
+        while len(self._fitness_dict) > self._max_size:
+            self._fitness_dict.popitem(last=False)
+
+    def get_hits(self) -> int:
+        """Returns the number of lookups that found a fitness value"""
+        return self._hits
+
+    def get_misses(self) -> int:
+        """Returns the number of lookups that did not find a fitness value"""
+        return self._misses
+
+    def get_hit_rate(self) -> float:
+        """Returns the share of lookups that found a fitness value"""
+        lookups = self._hits + self._misses
+        if lookups == 0:
+            return 0.0
+        return self._hits / lookups
+
+    def clear(self) -> None:
+        """Removes all stored fitness values and resets the counters"""
+        self._fitness_dict.clear()
+        self._hits = 0
+        self._misses = 0
@@ -0,0 +1,378 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+from typing import List
+
+import numpy as np
+
+from .Chromosome import Chromosome
+from .GateSet import GateSet
+from .Population import Population
+from .Statevector import Unitary
+
+
+class GateCache(object):
+    """
+    Precomputed full register operators for every (gate type, b, c) combination of a gate set.
+
+    Fixed gates are stored as 2^n x 2^n matrices, including the Toffoli target mapping. The parametric
+    gates 'rxx' and 'rzz' are stored in closed form: 'rzz' as the diagonal of Z⊗Z and 'rxx' as the
+    permutation matrix of X⊗X, so the operator for any theta is built without a matrix product.
+    A chromosome unitary is then a chain of table lookups and small matrix products.
+
+    For whole populations every gate is also stored as two stacked tables, so that the operator of any
+    gate is alpha A + beta B: fixed gates have A = U and beta = 0, and the parametric gates have A = I,
+    B = X⊗X or Z⊗Z, alpha = cos(theta/2) and beta = -i sin(theta/2). The operators of one gate position
+    of every chromosome are then built with one fancy index, and the population unitaries with one
+    batched matrix product per gate position.
+
+    Every gate of the chromosome gate table is also a two term operator: row i of A and B only has entries
+    in column i and in one other column perm[i] (a bit flip for 'h', 'y', 'x' and 'rxx', the permutation of
+    'cx', 'swap' and 'toffoli'). Applying a gate is then U -> d1 * U + d2 * U[perm], with d1 and d2 per
+    row vectors. The population walks the gate positions in lockstep, and at each position the gates of
+    all chromosomes, whatever their (gate type, b, c), are applied in one vectorised step, with the
+    per chromosome theta of 'rxx' and 'rzz' folded into d1 and d2. This costs O(2^n) per column instead
+    of the O(4^n) of a matrix product.
+
+    Attributes
+    ----------
+    _gate_set: GateSet
+        The gates the cache is built for. The opcode of a gate is its integer in the chromosome.
+    _qubits: int
+        The number of qubits in the register.
+    _operators: dict
+        Full register operators of the fixed gates, keyed by (a, b, c).
+    _parametric: dict
+        Closed form data of the parametric gates, keyed by (a, b, c).
+    _index_table: np.ndarray
+        The row of each (a, b, c) in the stacked tables, indexed by a, b and c. The last row is the identity.
+    _a_table: np.ndarray
+        The A operator of every row.
+    _b_table: np.ndarray
+        The B operator of every row, zero for fixed gates.
+    _is_parametric: np.ndarray
+        True for the rows of the parametric gates.
+    _two_term: bool
+        True if every gate is a two term operator, so get_population_unitaries() can use the tables below.
+    _permutation_table: np.ndarray
+        The second column perm[i] of each row of every gate.
+    _first_table: np.ndarray
+        The diagonals of A and B, with shape (rows, 2, 2^n).
+    _second_table: np.ndarray
+        The entries of A and B in column perm[i], with shape (rows, 2, 2^n).
+    _is_monomial: np.ndarray
+        True for the rows with one entry per row, a permutation with phases. All gates but 'h' and 'rxx'.
+    _monomial_table: np.ndarray
+        The single entry of each row of A, the multiplier of the fixed monomial gates.
+    """
+
+    def __init__(self, gate_types: List[str], qubits: int = 3) -> None:
+        """
+        GateCache constructor. Builds the operators for every valid (a, b, c).
+
+        Parameters
+        ----------
+        gate_types: List[str]
+            The gates the cache is built for.
+        qubits: (int) optional
+            The number of qubits in the register.
+        """
+        self._gate_set = GateSet.get(gate_types)
+        self._qubits = qubits
+        self._operators: dict = {}
+        self._parametric: dict = {}
+        self._build()
+        self._build_tables()
+
+    def __len__(self) -> int:
+        """Returns the number of cached (a, b, c) combinations"""
+        return len(self._operators) + len(self._parametric)
+
+    def get_qubits(self) -> int:
+        """Returns the number of qubits in the register"""
+        return self._qubits
+
+    def get_gate_set(self) -> GateSet:
+        """Returns the compiled gate set the cache is built for"""
+        return self._gate_set
+
+    def _build(self) -> None:
+        """Fills the cache with every valid (a, b, c) of the gate set"""
+        two_qubit = self._gate_set.get_two_qubit()
+        for a in range(0, len(self._gate_set)):
+            gate = self._gate_set.get_name(a)
+            for b in range(0, self._qubits):
+                for c in range(0, self._qubits):
+                    if two_qubit[a] and b == c:
+                        continue
+
+                    if gate == 'rzz':
+                        self._parametric[(a, b, c)] = self._z_parity(b, c)
+                    elif gate == 'rxx':
+                        unitary = Unitary(self._qubits)
+                        unitary.apply_gate('x', b, 0)
+                        unitary.apply_gate('x', c, 0)
+                        self._parametric[(a, b, c)] = unitary.get_state().real
+                    else:
+                        unitary = Unitary(self._qubits)
+                        unitary.apply_gate(gate, b, c)
+                        self._operators[(a, b, c)] = unitary.get_state()
+
+    def _build_tables(self) -> None:
+        """Stacks the cached gates into the A and B tables used by get_population_unitaries()"""
+        dimension = 2 ** self._qubits
+        keys = list(self._operators.keys()) + list(self._parametric.keys())
+
+        self._index_table = np.full((len(self._gate_set), self._qubits, self._qubits), len(keys))
+        self._a_table = np.zeros((len(keys) + 1, dimension, dimension), dtype=complex)
+        self._b_table = np.zeros((len(keys) + 1, dimension, dimension), dtype=complex)
+        self._is_parametric = np.zeros(len(keys) + 1, dtype=bool)
+        self._a_table[len(keys)] = np.eye(dimension)
+
+        for row in range(0, len(keys)):
+            a, b, c = keys[row]
+            self._index_table[a, b, c] = row
+            if keys[row] in self._operators:
+                self._a_table[row] = self._operators[keys[row]]
+            elif self._gate_set.get_name(a) == 'rzz':
+                self._a_table[row] = np.eye(dimension)
+                self._b_table[row] = np.diag(self._parametric[keys[row]])
+                self._is_parametric[row] = True
+            else:
+                self._a_table[row] = np.eye(dimension)
+                self._b_table[row] = self._parametric[keys[row]]
+                self._is_parametric[row] = True
+
+        self._build_two_term_tables()
+
+    def _build_two_term_tables(self) -> None:
+        """Splits every row of the A and B tables into d1 + d2 * U[perm], see the class docstring"""
+        rows, dimension = self._a_table.shape[0], self._a_table.shape[1]
+        indices = np.arange(dimension)
+        off_diagonal = (np.abs(self._a_table) + np.abs(self._b_table)) > 1e-12
+        off_diagonal[:, indices, indices] = False
+
+        self._permutation_table = np.where(off_diagonal.any(axis=2), off_diagonal.argmax(axis=2), indices)
+        self._first_table = np.zeros((rows, 2, dimension), dtype=complex)
+        self._second_table = np.zeros((rows, 2, dimension), dtype=complex)
+        self._two_term = bool((off_diagonal.sum(axis=2) <= 1).all())
+        self._is_monomial = np.ones(rows, dtype=bool)
+        self._monomial_table = np.zeros((rows, dimension), dtype=complex)
+
+        for row in range(0, rows):
+            permutation = self._permutation_table[row]
+            moved = permutation != indices
+            for table_index, table in [(0, self._a_table[row]), (1, self._b_table[row])]:
+                self._first_table[row, table_index] = table[indices, indices]
+                self._second_table[row, table_index] = np.where(moved, table[indices, permutation], 0)
+                if (moved & (np.abs(table[indices, indices]) > 1e-12)).any():
+                    self._is_monomial[row] = False
+            self._monomial_table[row] = self._first_table[row, 0] + self._second_table[row, 0]
+
+    def _z_parity(self, b: int, c: int) -> np.ndarray:
+        """Returns the diagonal of Z⊗Z on qubits b and c, +1 where the qubits are equal and -1 otherwise"""
+        indices = np.arange(2 ** self._qubits)
+        bit_b = (indices >> (self._qubits - 1 - b)) & 1
+        bit_c = (indices >> (self._qubits - 1 - c)) & 1
+        return 1 - 2 * (bit_b ^ bit_c)
+
+    def get_operator(self, a: int, b: int, c: int, theta: float = 0) -> np.ndarray:
+        """
+        Returns the full register operator of a gate triplet.
+
+        Parameters
+        ----------
+        a: int
+            The gate integer.
+        b: int
+            The second integer of the gate triplet.
+        c: int
+            The third integer of the gate triplet.
+        theta: (float) optional
+            The gate angle, used by 'rxx' and 'rzz'.
+
+        Returns
+        -------
+        operator: np.ndarray
+            The 2^n x 2^n operator.
+        """
+        if (a, b, c) in self._operators:
+            return self._operators[(a, b, c)]
+
+        if self._gate_set.get_name(a) == 'rzz':
+            return self.rzz_operator(self._parametric[(a, b, c)], theta)
+        else:
+            return self.rxx_operator(self._parametric[(a, b, c)], theta)
+
+    @staticmethod
+    def rzz_operator(parity: np.ndarray, theta: float) -> np.ndarray:
+        """Returns exp(-i theta/2 Z⊗Z) from the diagonal of Z⊗Z"""
+        return np.diag(np.exp(-0.5j * theta * parity))
+
+    @staticmethod
+    def rxx_operator(permutation: np.ndarray, theta: float) -> np.ndarray:
+        """Returns exp(-i theta/2 X⊗X) = cos(theta/2) I - i sin(theta/2) X⊗X from the permutation matrix of X⊗X"""
+        return np.cos(theta / 2) * np.eye(len(permutation)) - 1j * np.sin(theta / 2) * permutation
+
+    def get_chromosome_unitary(self, chromosome: Chromosome) -> np.ndarray:
+        """
+        Returns the circuit unitary of a chromosome as a product of cached operators.
+
+        Parameters
+        ----------
+        chromosome: (Chromosome)
+            The chromosome that describes the circuit.
+
+        Returns
+        -------
+        unitary: np.ndarray
+            The 2^n x 2^n unitary. Column i is the output state of the i-th CA starting state.
+        """
+        integer_list = chromosome.get_integer_list()
+        theta_list = chromosome.get_theta_list()
+        unitary = np.eye(2 ** self._qubits, dtype=complex)
+
+        for i in range(0, int(len(integer_list) / 3)):
+            gate_index = i * 3
+            operator = self.get_operator(integer_list[gate_index],
+                                         integer_list[gate_index + 1],
+                                         integer_list[gate_index + 2],
+                                         theta_list[i])
+            unitary = operator @ unitary
+
+        return unitary
+
+    def get_population_unitaries(self, chromosome_list: List[Chromosome]) -> np.ndarray:
+        """
+        Returns the circuit unitaries of a whole population, built in lockstep from the stacked tables.
+        Chromosomes with fewer gates are padded with the identity.
+
+        Parameters
+        ----------
+        chromosome_list: List[Chromosome]
+            The chromosomes that describe the circuits.
+
+        Returns
+        -------
+        unitaries: np.ndarray
+            The unitaries, with shape (population, 2^n, 2^n).
+        """
+        dimension = 2 ** self._qubits
+        population = len(chromosome_list)
+        integer_array, theta_array, lengths = Population.gather(chromosome_list)
+        rows = self.get_rows(integer_array, lengths)
+
+        unitaries = np.tile(np.eye(dimension, dtype=complex), (population, 1, 1))
+        if self._two_term:
+            return self._apply_two_term_gates(unitaries, rows, self._is_parametric[rows], theta_array)
+
+        for i in range(0, rows.shape[1]):
+            unitaries = self.get_operators(rows[:, i], theta_array[:, i]) @ unitaries
+
+        return unitaries
+
+    def get_rows(self, integer_array: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """
+        Returns the table row of every gate in a padded (chromosomes, gates, 3) gene array, see Population.gather(),
+        with the identity row after the last gate of each chromosome.
+        """
+        rows = self._index_table[integer_array[:, :, 0], integer_array[:, :, 1], integer_array[:, :, 2]]
+        rows[np.arange(integer_array.shape[1]) >= lengths[:, None]] = len(self._a_table) - 1
+        return rows
+
+    def get_operators(self, rows: np.ndarray, thetas: np.ndarray) -> np.ndarray:
+        """
+        Returns the full register operators of a vector of table rows, with shape (rows, 2^n, 2^n).
+        The parametric rows are A cos(theta/2) - i B sin(theta/2) with their angle from thetas.
+        """
+        operators = self._a_table[rows]
+        selected = self._is_parametric[rows]
+        if selected.any():
+            half_theta = thetas[selected, None, None] / 2
+            operators[selected] = (np.cos(half_theta) * operators[selected]
+                                   - 1j * np.sin(half_theta) * self._b_table[rows[selected]])
+        return operators
+
+    def _apply_two_term_gates(self, unitaries: np.ndarray, rows: np.ndarray, parametric: np.ndarray,
+                              theta_array: np.ndarray) -> np.ndarray:
+        """
+        Applies the gates of every chromosome in lockstep, one vectorised step per gate position.
+
+        The unitaries are kept as diag(phase) P_sigma W: monomial gates (all but 'h' and 'rxx') only update
+        the phase and sigma vectors of their chromosomes, and W is only rewritten for the chromosomes that
+        have an 'h' or 'rxx' at the current position.
+        """
+        population, dimension = unitaries.shape[0], unitaries.shape[1]
+        identity = np.arange(dimension)
+        flat_unitaries = unitaries.reshape(population * dimension, dimension)
+
+        offset = (np.arange(population) * dimension)[:, None]
+        sigma = np.tile(identity, (population, 1))
+        phase = np.ones((population, dimension), dtype=complex)
+
+        for i in range(0, rows.shape[1]):
+            position_rows = rows[:, i]
+            permutation = self._permutation_table[position_rows]
+            multiplier = self._monomial_table[position_rows]
+            selected = np.flatnonzero(parametric[:, i])
+            if len(selected) > 0:
+                half_theta = theta_array[selected, i, None] / 2
+                multiplier[selected] = self._combine(self._first_table[position_rows[selected]]
+                                                     + self._second_table[position_rows[selected]], half_theta)
+
+            flat_permutation = offset + permutation
+            permuted_sigma = np.take(sigma, flat_permutation)
+            permuted_phase = np.take(phase, flat_permutation)
+
+            dense = np.flatnonzero(~self._is_monomial[position_rows])
+            if len(dense) > 0:
+                half_theta = np.where(parametric[dense, i], theta_array[dense, i], 0)[:, None] / 2
+                d1 = self._combine(self._first_table[position_rows[dense]], half_theta)
+                d2 = self._combine(self._second_table[position_rows[dense]], half_theta)
+
+                dense_offset = offset[dense]
+                kept = np.take(flat_unitaries, (dense_offset + sigma[dense]).ravel(), axis=0)
+                moved = np.take(flat_unitaries, (dense_offset + permuted_sigma[dense]).ravel(), axis=0)
+                kept = kept.reshape(len(dense), dimension, dimension)
+                moved = moved.reshape(len(dense), dimension, dimension)
+                kept *= (d1 * phase[dense])[:, :, None]
+                moved *= (d2 * permuted_phase[dense])[:, :, None]
+                kept += moved
+                unitaries[dense] = kept
+
+            phase = multiplier * permuted_phase
+            sigma = permuted_sigma
+            phase[dense] = 1
+            sigma[dense] = identity
+
+        unitaries = np.take(flat_unitaries, (offset + sigma).ravel(), axis=0).reshape(unitaries.shape)
+        unitaries *= phase[:, :, None]
+        return unitaries
+
+    @staticmethod
+    def _combine(table: np.ndarray, half_theta: np.ndarray) -> np.ndarray:
+        """Returns cos(theta/2) A - i sin(theta/2) B for stacked [A, B] rows, which is A for fixed gates"""
+        return np.cos(half_theta) * table[:, 0] - 1j * np.sin(half_theta) * table[:, 1]
+
+    def population_probabilities_of_one(self, unitaries: np.ndarray, qubit: int = 0) -> np.ndarray:
+        """Returns the probabilities of one with shape (population, 2^n) for a stack of unitaries"""
+        indices = np.arange(2 ** self._qubits)
+        one_rows = ((indices >> (self._qubits - 1 - qubit)) & 1) == 1
+        return (np.abs(unitaries[:, one_rows, :]) ** 2).sum(axis=1)
+
+    def probabilities_of_one(self, unitary: np.ndarray, qubit: int = 0) -> List[float]:
+        """Returns the probability of measuring the given qubit as one for every column of the unitary"""
+        indices = np.arange(2 ** self._qubits)
+        one_rows = ((indices >> (self._qubits - 1 - qubit)) & 1) == 1
+        return (np.abs(unitary[one_rows]) ** 2).sum(axis=0).tolist()
@@ -0,0 +1,264 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import math
+from typing import Callable, List, NamedTuple
+
+import numpy as np
+
+H = np.array([[1, 1], [1, -1]], dtype=complex) / math.sqrt(2)
+X = np.array([[0, 1], [1, 0]], dtype=complex)
+Y = np.array([[0, -1j], [1j, 0]], dtype=complex)
+Z = np.array([[1, 0], [0, -1]], dtype=complex)
+
+# Two qubit matrices are written in the (first qubit, second qubit) basis |00>, |01>, |10>, |11>.
+CX = np.array([[1, 0, 0, 0],
+               [0, 1, 0, 0],
+               [0, 0, 0, 1],
+               [0, 0, 1, 0]], dtype=complex)
+SWAP = np.array([[1, 0, 0, 0],
+                 [0, 0, 1, 0],
+                 [0, 1, 0, 0],
+                 [0, 0, 0, 1]], dtype=complex)
+TOFFOLI = np.eye(8, dtype=complex)
+TOFFOLI[[6, 7]] = TOFFOLI[[7, 6]]
+
+
+def rxx_matrix(theta: float) -> np.ndarray:
+    """Returns the 4x4 matrix of the RXX gate, exp(-i theta/2 X⊗X)"""
+    cos = math.cos(theta / 2)
+    isin = -1j * math.sin(theta / 2)
+    return np.array([[cos, 0, 0, isin],
+                     [0, cos, isin, 0],
+                     [0, isin, cos, 0],
+                     [isin, 0, 0, cos]], dtype=complex)
+
+
+def rzz_matrix(theta: float) -> np.ndarray:
+    """Returns the 4x4 matrix of the RZZ gate, exp(-i theta/2 Z⊗Z)"""
+    phase = np.exp(-0.5j * theta)
+    return np.diag([phase, phase.conjugate(), phase.conjugate(), phase])
+
+
+def toffoli_qubits(target: int, qubits: int = 3) -> List[int]:
+    """
+    Returns the qubits a Toffoli gate acts on as [control, control, target].
+    The controls are the two neighbours of the target in the periodic register,
+    which for three qubits are the two other qubits.
+    """
+    controls = sorted([(target - 1) % qubits, (target + 1) % qubits])
+    return controls + [target]
+
+
+class Gate(NamedTuple):
+    """
+    The properties of a gate type.
+
+    arity is the number of qubits the gate acts on: one gate acts on qubit b, two qubit gates on b and c
+    (which must differ), and the Toffoli gate on b and its two neighbours. A monomial gate has one entry
+    per row, a permutation with phases. A symmetric gate does the same on (b, c) and (c, b).
+    """
+    arity: int
+    parametric: bool
+    self_inverse: bool
+    symmetric: bool
+    monomial: bool
+    matrix: Callable[[float], np.ndarray]
+
+
+GATES = {
+    'h': Gate(1, False, True, False, False, lambda theta: H),
+    'x': Gate(1, False, True, False, True, lambda theta: X),
+    'y': Gate(1, False, True, False, True, lambda theta: Y),
+    'z': Gate(1, False, True, False, True, lambda theta: Z),
+    'cx': Gate(2, False, True, False, True, lambda theta: CX),
+    'swap': Gate(2, False, True, True, True, lambda theta: SWAP),
+    'rxx': Gate(2, True, False, True, False, rxx_matrix),
+    'rzz': Gate(2, True, False, True, True, rzz_matrix),
+    'toffoli': Gate(3, False, True, False, True, lambda theta: TOFFOLI),
+}
+
+
+def gate_qubits(gate: str, b: int, c: int, qubits: int = 3) -> List[int]:
+    """Returns the qubits a gate from the chromosome gate table acts on"""
+    arity = GATES[gate].arity
+    if arity == 1:
+        return [b]
+    elif arity == 2:
+        return [b, c]
+    return toffoli_qubits(b, qubits)
+
+
+class GateSet(object):
+    """
+    A gate set compiled into tables indexed by the gate integer, the opcode, of the chromosomes.
+
+    The opcode of a gate is its index in the gate types. GateSet.get() interns the gate sets, so every
+    chromosome, store and engine with the same gate types shares one object, and the properties of a
+    gene are looked up in an array instead of by comparing gate names. The property arrays can be indexed
+    with a whole array of opcodes, which is what the batch operators of Population do.
+
+    Attributes
+    ----------
+    _gate_types: List[str]
+        The gate names, in opcode order.
+    _opcodes: dict
+        The opcode of every gate name.
+    _arity: np.ndarray
+        The number of qubits each gate acts on.
+    _parametric: np.ndarray
+        True for the gates that have an angle.
+    _self_inverse: np.ndarray
+        True for the gates that are their own inverse.
+    _two_qubit: np.ndarray
+        True for the gates that act on two different qubits b and c.
+    _symmetric: np.ndarray
+        True for the gates that do the same on (b, c) and (c, b).
+    _monomial: np.ndarray
+        True for the gates that are a permutation with phases.
+    _diagonal: np.ndarray
+        True for the gates that only change phases.
+    _matrices: List[Callable]
+        The function that returns the matrix of each gate from its angle.
+    """
+
+    _instances: dict = {}
+
+    def __init__(self, gate_types: List[str]) -> None:
+        """
+        GateSet constructor. Use GateSet.get() to share the gate set with the rest of the program.
+
+        Parameters
+        ----------
+        gate_types: List[str]
+            The gate names, in opcode order.
+        """
+        for gate in gate_types:
+            if gate not in GATES:
+                raise ValueError(str(gate) + " is not a valid gate!")
+
+        gates = [GATES[gate] for gate in gate_types]
+        self._gate_types = list(gate_types)
+        self._opcodes: dict = {gate: opcode for opcode, gate in enumerate(gate_types)}
+        self._arity = np.array([gate.arity for gate in gates], dtype=np.int8)
+        self._parametric = np.array([gate.parametric for gate in gates], dtype=bool)
+        self._self_inverse = np.array([gate.self_inverse for gate in gates], dtype=bool)
+        self._two_qubit = self._arity == 2
+        self._symmetric = np.array([gate.symmetric for gate in gates], dtype=bool)
+        self._monomial = np.array([gate.monomial for gate in gates], dtype=bool)
+        self._diagonal = np.array([np.count_nonzero(gate.matrix(1.0) - np.diag(np.diag(gate.matrix(1.0)))) == 0
+                                   for gate in gates], dtype=bool)
+        self._matrices = [gate.matrix for gate in gates]
+
+    @classmethod
+    def get(cls, gate_types: List[str]) -> 'GateSet':
+        """Returns the shared gate set for the gate types, compiling it the first time"""
+        key = tuple(gate_types)
+        gate_set = cls._instances.get(key)
+        if gate_set is None:
+            gate_set = cls._instances.setdefault(key, cls(gate_types))
+        return gate_set
+
+    def __reduce__(self) -> tuple:
+        """Unpickles to the shared gate set of the receiving process"""
+        return GateSet.get, (self._gate_types,)
+
+    def __len__(self) -> int:
+        """Returns the number of gates"""
+        return len(self._gate_types)
+
+    def get_gate_types(self) -> List[str]:
+        """Returns the gate names, in opcode order"""
+        return self._gate_types
+
+    def get_gate_dict(self) -> dict:
+        """Returns the table that holds gates and integers, keyed by the integer as a string"""
+        return {str(opcode): gate for opcode, gate in enumerate(self._gate_types)}
+
+    def get_opcode(self, gate: str) -> int:
+        """Returns the opcode of a gate name"""
+        return self._opcodes[gate]
+
+    def get_name(self, opcode: int) -> str:
+        """Returns the gate name of an opcode"""
+        return self._gate_types[opcode]
+
+    def get_arity(self) -> np.ndarray:
+        """Returns the number of qubits each gate acts on"""
+        return self._arity
+
+    def get_parametric(self) -> np.ndarray:
+        """Returns True for the gates that have an angle"""
+        return self._parametric
+
+    def get_self_inverse(self) -> np.ndarray:
+        """Returns True for the gates that are their own inverse"""
+        return self._self_inverse
+
+    def get_two_qubit(self) -> np.ndarray:
+        """Returns True for the gates that act on two different qubits"""
+        return self._two_qubit
+
+    def get_symmetric(self) -> np.ndarray:
+        """Returns True for the gates that do the same on (b, c) and (c, b)"""
+        return self._symmetric
+
+    def get_monomial(self) -> np.ndarray:
+        """Returns True for the gates that are a permutation with phases"""
+        return self._monomial
+
+    def get_diagonal(self) -> np.ndarray:
+        """Returns True for the gates that only change phases"""
+        return self._diagonal
+
+    def has_gate(self, gate: str) -> bool:
+        """Returns True if the gate name is in the gate set"""
+        return gate in self._opcodes
+
+    def get_matrix(self, opcode: int, theta: float = 0) -> np.ndarray:
+        """Returns the matrix of a gate, in the order of the qubits from get_gate_qubits()"""
+        return self._matrices[opcode](theta)
+
+    def get_gate_qubits(self, opcode: int, b: int, c: int, qubits: int = 3) -> List[int]:
+        """Returns the qubits a gate triplet acts on"""
+        arity = self._arity[opcode]
+        if arity == 1:
+            return [b]
+        elif arity == 2:
+            return [b, c]
+        return toffoli_qubits(b, qubits)
+
+    def get_qubit_masks(self, genes: np.ndarray, qubits: int = 3) -> np.ndarray:
+        """
+        Returns which qubits each gate of a gene array acts on, the array version of get_gate_qubits().
+
+        Parameters
+        ----------
+        genes: np.ndarray
+            Gate triplets (a, b, c) along the last axis.
+        qubits: (int) optional
+            The number of qubits in the register.
+
+        Returns
+        -------
+        masks: np.ndarray
+            True where a gate acts on a qubit, with shape genes.shape[:-1] + (qubits,).
+        """
+        genes = np.asarray(genes, dtype=np.intp)[..., None, :]
+        arity = self._arity[genes[..., 0]]
+        qubit = np.arange(qubits)
+        neighbour = ((qubit == (genes[..., 1] - 1) % qubits) | (qubit == (genes[..., 1] + 1) % qubits))
+        return ((qubit == genes[..., 1])
+                | ((arity == 2) & (qubit == genes[..., 2]))
+                | ((arity == 3) & neighbour))
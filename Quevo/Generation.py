@@ -12,13 +12,20 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import copy
 import math
 import random
-from typing import List
+from typing import List, Union
 
+import numpy as np
+
+from .Backend import Backend, get_backend
 from .Chromosome import Chromosome
 from .Circuit import Circuit
+from .FitnessCache import FitnessCache
+from .ParallelEvaluator import ParallelEvaluator
+from .Population import Population
+from .ShotAllocator import ShotAllocator
+from .Simplifier import Simplifier
 
 
 class Generation(object):
@@ -36,9 +43,44 @@ class Generation(object):
         The number of chromosomes in the generation
     _gates: int
         Number of gates in each chromosome.
+    _qubits: int
+        Number of qubits in each chromosome, 2 * radius + 1 for a CA neighborhood of the given radius.
+    _backend: Backend
+        The simulation engine the chromosomes are evaluated with. Created once and shared by all circuits.
+    _fitness_cache: FitnessCache
+        Fitness values of already evaluated genotypes, consulted before a chromosome is simulated.
+    _simplifier: Simplifier
+        Simplifies the chromosomes before they are simulated, None if simplification is off.
+    _shot_allocator: ShotAllocator
+        Draws the shots of the sampled engine adaptively, None to draw the full budget for every chromosome.
+    _batched: bool
+        Evaluate the whole population as one stack of operators, without creating a Circuit per chromosome.
+    _evaluator: ParallelEvaluator
+        Spreads the simulations over worker processes, None to simulate in this process.
+    _population: Population
+        The structure of arrays store that holds the genotypes of the chromosomes, None until
+        create_initial_generation() is called.
+    _vectorized_breeding: bool
+        Create, select and mutate the chromosomes with batch operators on the whole population.
+    _best_chromosome: Chromosome
+        The best chromosome evaluated in the generation so far, None until one is evaluated.
+    _best_ever_chromosome: Chromosome
+        A copy of the best chromosome evaluated in any generation, with the fitness it was evaluated to.
+    _random_generator: np.random.Generator
+        The NumPy generator of the current generation's vectorized breeding, None until it is needed.
+    _offspring_list: List[Chromosome]
+        Offspring bred by vectorized breeding that are not yet added to the generation.
     """
 
-    def __init__(self, chromosomes: int, gates: int) -> None:
+    _FITNESS_FUNCTIONS = {'diff': (Circuit.calculate_difference_fitness,
+                                   Circuit.calculate_population_difference_fitness),
+                          'kl': (Circuit.calculate_kullback_liebler_fitness,
+                                 Circuit.calculate_population_kullback_liebler_fitness)}
+
+    def __init__(self, chromosomes: int, gates: int, backend: Union[str, Backend] = None,
+                 fitness_cache: FitnessCache = None, simplify: bool = False, radius: int = 1,
+                 shot_allocator: ShotAllocator = None, batched: bool = False,
+                 evaluator: ParallelEvaluator = None, vectorized_breeding: bool = False) -> None:
         """
         The Generation constructor.
 
@@ -48,19 +90,82 @@ class Generation(object):
             Number of chromosomes in the generation.
         gates (int):
             Number of gates in each chromosome.
+        [Optional] backend (str or Backend):
+            The simulation engine used in run_generation_diff() and run_generation_kl(), or the name of
+            a registered one. Use 'statevector' for the built-in NumPy engine with exact probabilities.
+            Defaults to the shared AER engine, see get_default_backend().
+        [Optional] fitness_cache (FitnessCache):
+            The cache of evaluated genotypes. Defaults to a new cache for exact backends. Sampled backends
+            get a disabled cache, so every evaluation draws new shots, unless a cache is given.
+        [Optional] simplify (bool):
+            Simulate a simplified copy of each chromosome (see Simplifier.py). The chromosomes themselves
+            are not changed. Equivalent chromosomes then also share fitness cache entries. Not available
+            with noisy engines, where removing a gate also removes its noise.
+        [Optional] radius (int):
+            The radius of the 1D CA neighborhood. The chromosomes get 2 * radius + 1 qubits, and the
+            desired outcome needs one probability for each of the 2^(2 * radius + 1) initial states.
+        [Optional] shot_allocator (ShotAllocator):
+            Draw the shots in increments and stop sampling chromosomes that can no longer be parents.
+            Needs the 'sampled' backend.
+        [Optional] batched (bool):
+            Simulate the population as one stacked (population, 2^n, 2^n) operator tensor and compute all
+            probabilities and fitness values with vectorised calls. Needs a backend with the batched
+            capability, i.e. 'statevector', 'sampled' or 'noisy'.
+        [Optional] evaluator (ParallelEvaluator):
+            Simulate the chromosomes in a pool of worker processes. The evaluator's engine replaces backend.
+        [Optional] vectorized_breeding (bool):
+            Create the initial generation and breed the offspring with the batch operators of Population,
+            a few NumPy operations per generation instead of Python loops per chromosome. The random numbers
+            come from a NumPy generator seeded from the random module, so runs are still reproducible with
+            random.seed(), but differ from runs without vectorized breeding.
         """
+        if radius < 1:
+            raise ValueError("The radius must be at least 1, got " + str(radius))
+
         self._chromosome_list: List[Chromosome] = []
         self._parent_list: List[Chromosome] = []
         self._chromosomes: int = chromosomes
         self._gates: int = gates
+        self._qubits: int = 2 * radius + 1
+        self._backend: Backend = get_backend(backend) if evaluator is None else evaluator.get_backend()
+        self._evaluator: ParallelEvaluator = evaluator
+
+        if fitness_cache is None:
+            fitness_cache = FitnessCache() if self._backend.get_capabilities()['exact'] else FitnessCache(0)
+        self._fitness_cache: FitnessCache = fitness_cache
+        self._simplifier: Simplifier = Simplifier(self._qubits) if simplify else None
+        self._shot_allocator: ShotAllocator = shot_allocator
+        self._batched: bool = batched
+        self._population: Population = None
+        self._vectorized_breeding: bool = vectorized_breeding
+        self._best_chromosome: Chromosome = None
+        self._best_ever_chromosome: Chromosome = None
+        self._random_generator: np.random.Generator = None
+        self._offspring_list: List[Chromosome] = []
+
+        if batched and not self._backend.get_capabilities()['batched']:
+            raise ValueError(str(self._backend) + " can not evaluate a batched population")
+        if simplify and self._backend.get_capabilities()['noise']:
+            raise ValueError("Simplification removes gates and their noise, so it can not be used with the noisy "
+                             "engine " + str(self._backend))
 
     def create_initial_generation(self, gate_types: List[str]) -> None:
         """
         Populates the generation with chromosomes.
         """
         self._chromosome_list.clear()
+        self._best_chromosome = None
+        self._best_ever_chromosome = None
+        self._offspring_list = []
+        self._population = Population(gate_types, self._qubits, self._gates, self._chromosomes)
+        if self._vectorized_breeding:
+            rows = np.array([self._population.allocate() for i in range(self._chromosomes)], dtype=np.intp)
+            self._population.randomize_rows(rows, self._gates, self._make_random_generator())
+            self._chromosome_list = [Chromosome.from_row(self._population, row) for row in rows.tolist()]
+            return
+
         for i in range(self._chromosomes):
-            chromosome = Chromosome(gate_types)
+            chromosome = Chromosome(gate_types, self._qubits, self._population)
             chromosome.generate_random_chromosome(self._gates)
             self._chromosome_list.append(chromosome)
 
@@ -76,26 +181,172 @@ class Generation(object):
             The probability for the mutation to be replaced a random gate with a random new one. The chance of
             mutating by changing a gate connection(s) is (1-probability).
         """
+        probability_list = self.prepare_next_generation()
+        self.breed_offspring_batch(probability_list, self._chromosomes, probability)
+
+    def prepare_next_generation(self) -> List[float]:
+        """
+        Starts the next generation: the four best chromosomes are kept as parents and elites, and
+        the offspring are then added one by one with breed_offspring(), or in batches with
+        breed_offspring_batch(). With vectorized breeding the generation gets one NumPy generator, seeded
+        from the random module.
+
+        Returns
+        -------
+        probability_list (List[float])
+            The parent selection probabilities, to give to breed_offspring().
+        """
         self.set_parent_list()
         self._chromosome_list.clear()
         self._chromosome_list = self._parent_list.copy()
+        self._best_chromosome = None
+        self._offspring_list = []
+        if self._vectorized_breeding:
+            self._random_generator = self._make_random_generator()
 
         probability_list = self.find_fitness_proportionate_probabilities()
         probability_list.reverse()
+        return probability_list
+
+    def breed_offspring(self, probability_list: List[float], probability=30) -> Chromosome:
+        """
+        Selects a parent, adds a mutated copy of it to the generation and returns the copy.
+
+        Parameters
+        ----------
+        probability_list (List[float])
+            The parent selection probabilities from prepare_next_generation().
+        [Optional] probability (int)
+            The probability for the mutation to be replaced a random gate with a random new one.
+        """
+        mutated_chromosome = self.select_parent(probability_list)
+        mutated_chromosome.mutate_chromosome(probability)
+
+        self._chromosome_list.append(mutated_chromosome)
+        return mutated_chromosome
 
-        while len(self._chromosome_list) < self._chromosomes:
+    def breed_offspring_batch(self, probability_list: List[float], count: int, probability=30) -> List[Chromosome]:
+        """
+        Adds up to count offspring to the generation, without going over its size, and returns them.
+        With vectorized breeding the parents are selected and the offspring mutated with batch operators,
+        otherwise breed_offspring() is called for each offspring.
 
-            mutated_chromosome = self.select_parent(probability_list)
-            mutated_chromosome.mutate_chromosome(probability)
+        Vectorized breeding breeds all the offspring of the generation on the first call, and hands them out
+        over the calls, so the generation is the same however the offspring are split into batches.
 
-            self._chromosome_list.append(mutated_chromosome)
+        Parameters
+        ----------
+        probability_list (List[float])
+            The parent selection probabilities from prepare_next_generation().
+        count (int)
+            The number of offspring to add.
+        [Optional] probability (int)
+            The probability for the mutation to be replaced a random gate with a random new one.
+        """
+        count = min(count, self._chromosomes - len(self._chromosome_list))
+        if not self._vectorized_breeding:
+            return [self.breed_offspring(probability_list, probability) for i in range(0, count)]
+        if count <= 0:
+            return []
+
+        if not self._offspring_list:
+            self._offspring_list = self._breed_offspring_rows(probability_list,
+                                                              self._chromosomes - len(self._chromosome_list),
+                                                              probability)
+        offspring_list = self._offspring_list[:count]
+        del self._offspring_list[:count]
+        self._chromosome_list.extend(offspring_list)
+        return offspring_list
+
+    def _breed_offspring_rows(self, probability_list: List[float], count: int, probability: int) -> List[Chromosome]:
+        """Selects the parents of count offspring and mutates the offspring with the batch operators"""
+        # Parents from another store, i.e. immigrants, are copied in so all the rows can be cloned at once.
+        parent_list = []
+        for parent in self._parent_list:
+            if parent.get_population() is not self._population:
+                copied_parent = Chromosome(parent.get_gate_types(), self._qubits, self._population)
+                copied_parent.set_genotype(parent.get_integer_list(), parent.get_theta_list())
+                parent = copied_parent
+            parent_list.append(parent)
+
+        if self._random_generator is None:
+            self._random_generator = self._make_random_generator()
+        random_generator = self._random_generator
+        cumulative = np.cumsum(probability_list)
+        parent_indices = np.minimum(np.searchsorted(cumulative, random_generator.random(count), side='right'),
+                                    len(parent_list) - 1)
+        parent_rows = np.array([parent.get_row() for parent in parent_list], dtype=np.intp)
+
+        rows = self._population.clone_rows(parent_rows[parent_indices])
+        self._population.mutate_rows(rows, probability, random_generator)
+
+        offspring_list = []
+        for row, parent_index in zip(rows.tolist(), parent_indices.tolist()):
+            offspring = Chromosome.from_row(self._population, row)
+            offspring.set_parent(self._parent_list[parent_index])
+            offspring_list.append(offspring)
+        return offspring_list
+
+    @staticmethod
+    def _make_random_generator() -> np.random.Generator:
+        """Returns a NumPy generator seeded from the random module"""
+        return np.random.default_rng(random.getrandbits(64))
+
+    def is_full(self) -> bool:
+        """Returns True if the generation holds all its chromosomes"""
+        return len(self._chromosome_list) >= self._chromosomes
 
     def set_parent_list(self) -> None:
         """Finds the four best chromosomes, and adds them to parent_list"""
-        parent_list = self._chromosome_list.copy()
-        parent_list.sort()
-        self._parent_list.clear()
-        self._parent_list = parent_list[:4]
+        self._parent_list = self.find_best_chromosomes(4)
+
+    def find_best_chromosomes(self, count: int) -> List[Chromosome]:
+        """
+        Returns the best chromosomes in the generation, best first, without sorting the whole generation.
+        The fitness values are gathered into a vector and partitioned around the count-th best, so the
+        cost is linear in the size of the generation. Chromosomes with equal fitness keep the order of
+        the generation, as with a stable sort.
+
+        Parameters
+        ----------
+        count (int)
+            The number of chromosomes to return, at most the size of the generation.
+        """
+        fitness = Population.gather_fitness(self._chromosome_list)
+        count = min(count, len(fitness))
+        if count <= 0:
+            return []
+
+        threshold = np.partition(fitness, count - 1)[count - 1]
+        better = np.flatnonzero(fitness < threshold)
+        equal = np.flatnonzero(fitness == threshold)[:count - len(better)]
+        indices = np.concatenate([better, equal])
+        indices = indices[np.lexsort((indices, fitness[indices]))]
+        return [self._chromosome_list[i] for i in indices.tolist()]
+
+    def replace_worst_chromosomes(self, chromosome_list: List[Chromosome]) -> None:
+        """
+        Replaces the worst chromosomes in the generation with chromosomes that already have a fitness,
+        i.e. immigrants from another generation.
+
+        Parameters
+        ----------
+        chromosome_list (List[Chromosome])
+            The new chromosomes, at most as many as the generation holds.
+        """
+        count = min(len(chromosome_list), len(self._chromosome_list))
+        if count <= 0:
+            return
+
+        fitness = Population.gather_fitness(self._chromosome_list)
+        worst = np.argpartition(-fitness, count - 1)[:count].tolist()
+        replaced_best = any(self._chromosome_list[i] is self._best_chromosome for i in worst)
+        for i, chromosome in zip(worst, chromosome_list):
+            self._chromosome_list[i] = chromosome
+
+        if replaced_best:
+            self._best_chromosome = self._find_best_chromosome()
+        self._update_best(chromosome_list[:count])
 
     def find_fitness_proportionate_probabilities(self) -> List[float]:
         """
@@ -145,7 +396,9 @@ class Generation(object):
 
             if probability < total_probability:
                 parent = self._parent_list[index]
-                return copy.deepcopy(parent)
+                offspring = parent.clone()
+                offspring.set_parent(parent)
+                return offspring
             index = index + 1
 
     def run_generation_diff(self, desired_outcome: List[float]) -> None:
@@ -156,13 +409,9 @@ class Generation(object):
         Parameters
         ----------
         desired_outcome (List[float]):
-            A list of the eight CA outcomes we wish to test the chromosomes against.
+            A list of the CA outcomes we wish to test the chromosomes against, one for each initial state.
         """
-
-        for chromosome in self._chromosome_list:
-            circuit = Circuit(chromosome)
-            chromosome_fitness = abs(circuit.find_chromosome_fitness(desired_outcome))
-            chromosome.set_fitness_score(chromosome_fitness)
+        self.evaluate_chromosomes(self._chromosome_list, desired_outcome, 'diff')
 
     def run_generation_kl(self, desired_outcome: List[float]) -> None:
         """
@@ -172,32 +421,204 @@ class Generation(object):
         Parameters
         ----------
         desired_outcome (List[float]):
-            A list of the eight CA outcomes we wish to test the chromosomes against.
+            A list of the CA outcomes we wish to test the chromosomes against, one for each initial state.
         """
+        self.evaluate_chromosomes(self._chromosome_list, desired_outcome, 'kl')
 
-        for chromosome in self._chromosome_list:
-            circuit = Circuit(chromosome)
-            chromosome_fitness = abs(circuit.find_kullback_liebler_fitness(desired_outcome))
-            chromosome.set_fitness_score(chromosome_fitness)
+    def evaluate_chromosomes(self, chromosome_list: List[Chromosome], desired_outcome: List[float],
+                             fitness_type: str = 'kl') -> None:
+        """
+        Sets the fitness of every chromosome in the list. Genotypes found in the fitness cache are not simulated,
+        and with an exact engine duplicate genotypes in the list are only simulated once. Engines that sample
+        simulate every duplicate, so each gets an estimate of its own. With simplification on,
+        the simplified chromosomes are looked up and simulated instead. With a shot allocator the
+        shots are drawn adaptively, and the cached fitness values take part in the elite cutoff.
+        In batched mode the uncached chromosomes are simulated and scored as one population.
+
+        Parameters
+        ----------
+        chromosome_list (List[Chromosome]):
+            The chromosomes to evaluate, i.e. all the chromosomes in the generation or a batch of offspring.
+        desired_outcome (List[float]):
+            A list of the CA outcomes we wish to test the chromosomes against, one for each initial state.
+        [Optional] fitness_type (str):
+            The kind of fitness, 'kl' or 'diff'. Also part of the cache key.
+        """
+        if len(desired_outcome) != 2 ** self._qubits:
+            raise ValueError("The desired outcome needs one value for each of the 2^" + str(self._qubits) +
+                             " = " + str(2 ** self._qubits) + " initial states, got " + str(len(desired_outcome)))
+        fitness_function, population_fitness_function = self._FITNESS_FUNCTIONS[fitness_type]
+        exact = self._backend.get_capabilities()['exact']
+        group_dict: dict = {}
+        keys = []
+        group_list = []
+        simulated_list = []
+        known_fitness = []
+        for chromosome in chromosome_list:
+            simulated_chromosome = chromosome
+            if self._simplifier is not None:
+                simulated_chromosome = self._simplifier.simplify(chromosome)
+
+            key = FitnessCache.make_key(simulated_chromosome, desired_outcome, fitness_type)
+            chromosome_fitness = self._fitness_cache.get(key)
+
+            if chromosome_fitness is not None:
+                chromosome.set_fitness_score(chromosome_fitness)
+                known_fitness.append(chromosome_fitness)
+            elif exact and key in group_dict:
+                group_list[group_dict[key]].append(chromosome)
+            else:
+                group_dict[key] = len(keys)
+                keys.append(key)
+                group_list.append([chromosome])
+                simulated_list.append(simulated_chromosome)
+
+        if self._shot_allocator is not None:
+            circuits = [Circuit(chromosome, self._backend) for chromosome in simulated_list]
+            fitness_list = self._shot_allocator.find_fitness(self._backend, circuits, desired_outcome,
+                                                             fitness_type, fitness_function, known_fitness)
+        elif self._batched:
+            fitness_list = []
+            if simulated_list:
+                if self._evaluator is not None:
+                    population_probabilities = np.array(self._evaluator.find_generation_probabilities(simulated_list))
+                else:
+                    population_probabilities = self._backend.find_population_probabilities(simulated_list)
+                fitness_list = population_fitness_function(population_probabilities, desired_outcome).tolist()
+        else:
+            generation_probabilities = self.find_generation_probabilities(simulated_list)
+            fitness_list = [fitness_function(found_outcome, desired_outcome)
+                            for found_outcome in generation_probabilities]
+
+        for i in range(0, len(keys)):
+            chromosome_fitness = abs(fitness_list[i])
+            self._fitness_cache.put(keys[i], chromosome_fitness)
+            for chromosome in group_list[i]:
+                chromosome.set_fitness_score(chromosome_fitness)
+
+        if self._best_chromosome is not None and any(chromosome is self._best_chromosome
+                                                     for chromosome in chromosome_list):
+            self._best_chromosome = self._find_best_chromosome()
+        self._update_best(chromosome_list)
+
+    def find_generation_probabilities(self, chromosome_list: List[Chromosome] = None) -> List[List[float]]:
+        """
+        Finds the probability of measuring one for every CA initial state of every chromosome.
+        Qiskit based backends send the circuits for the whole generation to the simulator as one
+        batched job. With a ParallelEvaluator the chromosomes are simulated in its worker processes.
+
+        Parameters
+        ----------
+        [Optional] chromosome_list (List[Chromosome]):
+            The chromosomes to simulate. Defaults to all the chromosomes in the generation.
+
+        Returns
+        -------
+        generation_probabilities (List[List[float]])
+            One list of probabilities per chromosome, in the same order as the chromosomes.
+        """
+        if chromosome_list is None:
+            chromosome_list = self._chromosome_list
+
+        if self._evaluator is not None:
+            return self._evaluator.find_generation_probabilities(chromosome_list)
+
+        circuits = []
+        for chromosome in chromosome_list:
+            circuits.append(Circuit(chromosome, self._backend))
+
+        return self._backend.find_generation_probabilities(circuits)
+
+    def get_chromosome_list(self) -> List[Chromosome]:
+        """Returns the chromosomes in the generation"""
+        return self._chromosome_list
+
+    def get_population(self) -> Population:
+        """Returns the store that holds the genotypes of the chromosomes"""
+        return self._population
+
+    def get_parent_list(self) -> List[Chromosome]:
+        """Returns the parents selected by set_parent_list()"""
+        return self._parent_list
+
+    def set_population(self, chromosome_list: List[Chromosome], parent_list: List[Chromosome]) -> None:
+        """
+        Replaces the chromosomes and the parents, i.e. with the ones of a checkpoint. The best chromosome
+        records are cleared, since they belong to the replaced run.
+        """
+        self._chromosome_list = chromosome_list
+        self._parent_list = parent_list
+        self._best_chromosome = None
+        self._best_ever_chromosome = None
+        self._offspring_list = []
+        if chromosome_list:
+            self._population = chromosome_list[0].get_population()
+
+    def get_backend(self) -> Backend:
+        """Returns the simulation engine"""
+        return self._backend
+
+    def get_qubits(self) -> int:
+        """Returns the number of qubits in each chromosome"""
+        return self._qubits
+
+    def get_fitness_cache(self) -> FitnessCache:
+        """Returns the generation's fitness cache"""
+        return self._fitness_cache
+
+    def get_shot_allocator(self) -> ShotAllocator:
+        """Returns the generation's shot allocator, None if the shots are not drawn adaptively"""
+        return self._shot_allocator
 
     def get_best_fitness(self):
         """Returns the fitness value for the best chromosome in the generation."""
-        best_fitness = 10
-        for chromosome in self._chromosome_list:
-            chromosome_fitness = chromosome.get_fitness_score()
-            if best_fitness > chromosome_fitness:
-                best_fitness = chromosome_fitness
-
-        return best_fitness
+        best_chromosome = self.get_best_chromosome()
+        if best_chromosome is None:
+            return 10
+        return min(10, best_chromosome.get_fitness_score())
 
     def get_best_chromosome(self):
-        """Returns the chromosome with the best fitness in the generation."""
-        for chromosome in self._chromosome_list:
-            best_fitness = self. get_best_fitness()
-            if chromosome.get_fitness_score() == best_fitness:
-                return chromosome
-            else:
-                continue
+        """
+        Returns the chromosome with the best fitness in the generation. The best chromosome is kept up to
+        date as chromosomes are evaluated, so this takes constant time once the generation is evaluated.
+        Before that the fitness values in the generation are searched.
+        """
+        if self._best_chromosome is not None:
+            return self._best_chromosome
+        return self._find_best_chromosome()
+
+    def get_best_ever_chromosome(self) -> Chromosome:
+        """Returns a copy of the best chromosome evaluated in any generation, None before the first evaluation"""
+        return self._best_ever_chromosome
+
+    def set_best_ever_chromosome(self, chromosome: Chromosome) -> None:
+        """Sets the best chromosome evaluated in any generation, i.e. the one of a checkpoint"""
+        self._best_ever_chromosome = chromosome.detach() if chromosome is not None else None
+
+    def get_best_ever_fitness(self) -> float:
+        """Returns the fitness of the best chromosome evaluated in any generation, None before the first evaluation"""
+        if self._best_ever_chromosome is None:
+            return None
+        return self._best_ever_chromosome.get_fitness_score()
+
+    def _find_best_chromosome(self) -> Chromosome:
+        """Searches the generation for the chromosome with the best fitness, the first one if several are best"""
+        if not self._chromosome_list:
+            return None
+        return self._chromosome_list[int(np.argmin(Population.gather_fitness(self._chromosome_list)))]
+
+    def _update_best(self, chromosome_list: List[Chromosome]) -> None:
+        """Updates the best chromosome of the generation, and the best ever, with new evaluated chromosomes"""
+        if not chromosome_list:
+            return
+        best_chromosome = chromosome_list[int(np.argmin(Population.gather_fitness(chromosome_list)))]
+
+        if self._best_chromosome is None or best_chromosome < self._best_chromosome:
+            self._best_chromosome = best_chromosome
+        if self._best_ever_chromosome is None or best_chromosome < self._best_ever_chromosome:
+            # A copy in a store of its own: a later evaluation of the chromosome with a sampled engine does not
+            # change the record, and no row is allocated in the generation's store, which may be breeding.
+            self._best_ever_chromosome = best_chromosome.detach()
 
     def print_chromosomes(self):
         """Prints all the generation's chromosomes."""
@@ -227,7 +648,7 @@ class Generation(object):
         """Prints all the generation's chromosome's circuits."""
         print("Circuits: ")
         for chromosome in self._chromosome_list:
-            circuit = Circuit(chromosome)
+            circuit = Circuit(chromosome, self._backend)
             circuit.generate_circuit()
             circuit.draw()
         print("\n")
@@ -0,0 +1,295 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import multiprocessing
+import random
+from typing import List, Union
+
+from .Backend import Backend
+from .Chromosome import Chromosome
+from .Generation import Generation
+
+
+def _pack(chromosome: Chromosome) -> tuple:
+    """Returns the genotype and fitness of a chromosome, the form chromosomes are sent between processes in"""
+    return chromosome.get_gene_array().copy(), chromosome.get_theta_array().copy(), chromosome.get_fitness_score()
+
+
+def _unpack(gate_types: List[str], qubits: int, packed: tuple) -> Chromosome:
+    """Rebuilds a chromosome from its genotype and fitness"""
+    integer_list, theta_list, fitness = packed
+    chromosome = Chromosome(gate_types, qubits)
+    chromosome.set_genotype(integer_list, theta_list)
+    chromosome.set_fitness_score(fitness)
+    return chromosome
+
+
+def _run_island(connection, seed: int, chromosomes: int, gates: int, gate_types: List[str],
+                desired_outcome: List[float], fitness_type: str, backend: Union[str, Backend],
+                generation_options: dict) -> None:
+    """
+    The loop of an island process. The island keeps its Generation, and its engine and fitness cache, for the
+    whole run, and answers the messages of IslandModel:
+
+    ('evolve', generations, migrants): evolves the given number of generations, and sends back the best
+        fitness of each generation and the migrants best chromosomes.
+    ('migrate', immigrant_list): replaces the worst chromosomes with the best immigrants, at most half the island.
+    ('stop',): ends the process.
+    """
+    try:
+        random.seed(seed)
+        generation = Generation(chromosomes, gates, backend, **generation_options)
+        generation.create_initial_generation(gate_types)
+        generation.evaluate_chromosomes(generation.get_chromosome_list(), desired_outcome, fitness_type)
+        connection.send(('ready', [_pack(generation.get_best_chromosome())]))
+
+        while True:
+            message = connection.recv()
+            if message[0] == 'evolve':
+                fitness_history = []
+                for i in range(0, message[1]):
+                    generation.evolve_into_next_generation()
+                    generation.evaluate_chromosomes(generation.get_chromosome_list(), desired_outcome, fitness_type)
+                    fitness_history.append(generation.get_best_chromosome().get_fitness_score())
+
+                emigrant_list = generation.find_best_chromosomes(message[2])
+                connection.send(('evolved', fitness_history, [_pack(chromosome) for chromosome in emigrant_list]))
+            elif message[0] == 'migrate':
+                immigrant_list = [_unpack(gate_types, generation.get_qubits(), packed) for packed in message[1]]
+                immigrant_list = sorted(immigrant_list)[:len(generation.get_chromosome_list()) // 2]
+                generation.replace_worst_chromosomes(immigrant_list)
+            else:
+                break
+    except Exception as exception:
+        connection.send(('error', exception))
+    finally:
+        connection.close()
+
+
+class IslandModel(object):
+    """
+    Evolves several independent generations, the islands, each in its own process, and every
+    migration_interval generations sends the best chromosomes of every island to another island.
+
+    Each island is a normal Generation with its own random seed, engine and fitness cache. After every
+    migration_interval generations, the main process collects the migrants best chromosomes of each island
+    and sends them on: to the next island in a 'ring', or to a randomly picked other island with 'random'.
+    The immigrants replace the worst chromosomes of the receiving island, so they can be picked as parents
+    in the next generation. The chromosomes are sent as genotypes with their fitness.
+
+    Use it as a context manager, or call close(), to stop the island processes.
+
+    Attributes
+    ----------
+    _islands: int
+        The number of islands, and island processes.
+    _gate_types: List[str]
+        The gate set of the chromosomes.
+    _qubits: int
+        The number of qubits of the chromosomes.
+    _migration_interval: int
+        Number of generations between migrations.
+    _migrants: int
+        Number of chromosomes each island sends at a migration.
+    _topology: str
+        Where the migrants go, 'ring' or 'random'.
+    _random: random.Random
+        Picks the destinations of the random topology.
+    _connections: list
+        The main process ends of the pipes to the islands.
+    _processes: List[multiprocessing.Process]
+        The island processes.
+    _best_chromosome: Chromosome
+        The best chromosome found on any island.
+    _fitness_history: List[List[float]]
+        The best fitness of every island in every generation, one list per generation.
+    """
+
+    _TOPOLOGIES = ['ring', 'random']
+
+    def __init__(self, islands: int, chromosomes: int, gates: int, gate_types: List[str],
+                 desired_outcome: List[float], fitness_type: str = 'kl',
+                 backend: Union[str, Backend] = 'statevector', migration_interval: int = 5, migrants: int = 2,
+                 topology: str = 'ring', seed: int = None, generation_options: dict = None) -> None:
+        """
+        IslandModel constructor. Starts the island processes and evaluates their initial generations.
+
+        Parameters
+        ----------
+        islands: (int)
+            The number of islands, each run in its own process.
+        chromosomes: (int)
+            Number of chromosomes on each island.
+        gates: (int)
+            Number of gates in each chromosome.
+        gate_types: (List[str])
+            The gate set of the chromosomes.
+        desired_outcome: (List[float])
+            The CA outcomes the chromosomes are tested against, one for each initial state.
+        fitness_type: (str) optional
+            The kind of fitness, 'kl' or 'diff'.
+        backend: (str or Backend) optional
+            The simulation engine. Every island gets its own copy.
+        migration_interval: (int) optional
+            Number of generations between migrations.
+        migrants: (int) optional
+            Number of chromosomes each island sends at a migration.
+        topology: (str) optional
+            Where the migrants go: 'ring' sends them to the next island, 'random' to a random other island.
+        seed: (int) optional
+            Island i is seeded with seed + i, and the random topology with seed. Defaults to random seeds.
+        generation_options: (dict) optional
+            Extra keyword arguments for the Generation of every island, e.g. {'radius': 2}.
+        """
+        if fitness_type not in ['diff', 'kl']:
+            raise ValueError(fitness_type + " is not a supported fitness type")
+        if topology not in self._TOPOLOGIES:
+            raise ValueError(topology + " is not a supported topology, use one of " + str(self._TOPOLOGIES))
+        if migrants >= chromosomes:
+            raise ValueError("An island must keep more chromosomes than it sends")
+
+        self._islands = islands
+        self._gate_types = gate_types
+        self._migration_interval = migration_interval
+        self._migrants = migrants
+        self._topology = topology
+        self._random = random.Random(seed)
+        self._connections = []
+        self._processes: List[multiprocessing.Process] = []
+        self._best_chromosome: Chromosome = None
+        self._fitness_history: List[List[float]] = []
+
+        # The islands' Generation checks the radius, and its error is raised when the islands start.
+        self._qubits = 2 * (generation_options or {}).get('radius', 1) + 1
+
+        for i in range(0, islands):
+            island_seed = seed + i if seed is not None else random.SystemRandom().randrange(2 ** 32)
+            connection, island_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_run_island, daemon=True,
+                                              args=(island_connection, island_seed, chromosomes, gates, gate_types,
+                                                    desired_outcome, fitness_type, backend, generation_options or {}))
+            process.start()
+            island_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+        for reply in self._receive():
+            self._update_best(reply[1])
+
+    def __enter__(self) -> 'IslandModel':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def get_islands(self) -> int:
+        """Returns the number of islands"""
+        return self._islands
+
+    def get_best_chromosome(self) -> Chromosome:
+        """Returns the best chromosome found on any island"""
+        return self._best_chromosome
+
+    def get_best_fitness(self) -> float:
+        """Returns the fitness of the best chromosome found on any island"""
+        return self._best_chromosome.get_fitness_score()
+
+    def get_fitness_history(self) -> List[List[float]]:
+        """Returns the best fitness of every island in every generation, one list per generation"""
+        return self._fitness_history
+
+    def run(self, generations: int, target_fitness: float = 0.01) -> Chromosome:
+        """
+        Evolves all the islands for the given number of generations, with a migration every
+        migration_interval generations.
+
+        Parameters
+        ----------
+        generations: (int)
+            The number of generations to evolve each island.
+        target_fitness: (float) optional
+            The run stops at the next migration once a chromosome with a fitness below this value is found.
+
+        Returns
+        -------
+        best_chromosome: Chromosome
+            The best chromosome found on any island.
+        """
+        evolved = 0
+        while evolved < generations and self.get_best_fitness() >= target_fitness:
+            interval = min(self._migration_interval, generations - evolved)
+            for connection in self._connections:
+                connection.send(('evolve', interval, self._migrants))
+
+            emigrant_lists = []
+            island_histories = []
+            for reply in self._receive():
+                island_histories.append(reply[1])
+                emigrant_lists.append(reply[2])
+                self._update_best(reply[2])
+            self._fitness_history.extend([list(fitness) for fitness in zip(*island_histories)])
+
+            evolved = evolved + interval
+            if evolved < generations and self._islands > 1:
+                self._migrate(emigrant_lists)
+
+        return self._best_chromosome
+
+    def find_destinations(self) -> List[int]:
+        """Returns the island the migrants of each island are sent to"""
+        if self._topology == 'ring':
+            return [(i + 1) % self._islands for i in range(0, self._islands)]
+
+        destinations = []
+        for i in range(0, self._islands):
+            destination = self._random.randrange(self._islands - 1)
+            destinations.append(destination if destination < i else destination + 1)
+        return destinations
+
+    def _migrate(self, emigrant_lists: List[list]) -> None:
+        """Sends the emigrants of every island to their destination island"""
+        immigrant_lists = [[] for i in range(0, self._islands)]
+        for source, destination in enumerate(self.find_destinations()):
+            immigrant_lists[destination].extend(emigrant_lists[source])
+
+        for connection, immigrant_list in zip(self._connections, immigrant_lists):
+            connection.send(('migrate', immigrant_list))
+
+    def _receive(self) -> List[tuple]:
+        """Returns one reply from every island, raising the error of a failed island"""
+        replies = [connection.recv() for connection in self._connections]
+        for reply in replies:
+            if reply[0] == 'error':
+                self.close()
+                raise reply[1]
+        return replies
+
+    def _update_best(self, packed_list: List[tuple]) -> None:
+        """Keeps the best of the received chromosomes if it beats the best found so far"""
+        best_packed = min(packed_list, key=lambda packed: packed[2])
+        if self._best_chromosome is None or best_packed[2] < self._best_chromosome.get_fitness_score():
+            self._best_chromosome = _unpack(self._gate_types, self._qubits, best_packed)
+
+    def close(self) -> None:
+        """Stops the island processes"""
+        for connection, process in zip(self._connections, self._processes):
+            if process.is_alive():
+                try:
+                    connection.send(('stop',))
+                except (BrokenPipeError, OSError):
+                    pass
+            process.join()
+            connection.close()
+        self._connections = []
+        self._processes = []
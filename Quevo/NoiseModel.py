@@ -0,0 +1,106 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import math
+from typing import List
+
+import numpy as np
+
+from .GateSet import X, Y, Z
+
+
+class NoiseModel(object):
+    """
+    The noise of the built-in density matrix engine. After every gate, each qubit the gate acts on
+    goes through a depolarising channel and an amplitude damping channel, and the measured qubit is
+    read out with a symmetric readout error.
+
+    Attributes
+    ----------
+    _depolarizing: float
+        Probability p of the single qubit depolarising channel, rho -> (1 - p) rho + p I/2.
+    _amplitude_damping: float
+        Decay probability gamma of the amplitude damping channel, |1> -> |0>.
+    _readout_error: float
+        Probability of reading the measured qubit as the opposite value.
+    """
+
+    def __init__(self, depolarizing: float = 0.0, amplitude_damping: float = 0.0, readout_error: float = 0.0) -> None:
+        """
+        NoiseModel constructor.
+
+        Parameters
+        ----------
+        depolarizing: (float) optional
+            Probability of the single qubit depolarising channel applied after every gate.
+        amplitude_damping: (float) optional
+            Decay probability of the amplitude damping channel applied after every gate.
+        readout_error: (float) optional
+            Probability of reading the measured qubit as the opposite value.
+        """
+        for name, value in [('depolarizing', depolarizing), ('amplitude_damping', amplitude_damping),
+                            ('readout_error', readout_error)]:
+            if not 0 <= value <= 1:
+                raise ValueError(name + " must be a probability between 0 and 1")
+
+        self._depolarizing = depolarizing
+        self._amplitude_damping = amplitude_damping
+        self._readout_error = readout_error
+
+    def __repr__(self) -> str:
+        """Returns the strength of every channel"""
+        return ("NoiseModel(depolarizing=" + str(self._depolarizing)
+                + ", amplitude_damping=" + str(self._amplitude_damping)
+                + ", readout_error=" + str(self._readout_error) + ")")
+
+    def get_depolarizing(self) -> float:
+        """Returns the probability of the depolarising channel"""
+        return self._depolarizing
+
+    def get_amplitude_damping(self) -> float:
+        """Returns the decay probability of the amplitude damping channel"""
+        return self._amplitude_damping
+
+    def get_readout_error(self) -> float:
+        """Returns the probability of reading the measured qubit as the opposite value"""
+        return self._readout_error
+
+    def get_kraus_operators(self) -> List[np.ndarray]:
+        """
+        Returns the single qubit channels applied after every gate.
+
+        Returns
+        -------
+        channels: List[np.ndarray]
+            One array of shape (m, 2, 2) with the m Kraus operators of each channel that is switched on.
+        """
+        channels = []
+
+        if self._depolarizing > 0:
+            p = self._depolarizing
+            channels.append(np.array([math.sqrt(1 - 3 * p / 4) * np.eye(2),
+                                      math.sqrt(p / 4) * X,
+                                      math.sqrt(p / 4) * Y,
+                                      math.sqrt(p / 4) * Z], dtype=complex))
+
+        if self._amplitude_damping > 0:
+            gamma = self._amplitude_damping
+            channels.append(np.array([[[1, 0], [0, math.sqrt(1 - gamma)]],
+                                      [[0, math.sqrt(gamma)], [0, 0]]], dtype=complex))
+
+        return channels
+
+    def apply_readout_error(self, probabilities):
+        """Returns the probabilities of reading one, given the probabilities of the qubit being one"""
+        return probabilities * (1 - self._readout_error) + (1 - probabilities) * self._readout_error
@@ -0,0 +1,127 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import numpy as np
+
+from .Chromosome import Chromosome
+from .GateCache import GateCache
+
+
+class OperatorProducts(object):
+    """
+    Cached prefix and suffix operator products of an evaluated chromosome.
+
+    For the gates g_0, ..., g_(n-1) of the chromosome:
+
+    prefix[i] = g_(i-1) ... g_1 g_0   (the first i gates, prefix[0] = I)
+    suffix[i] = g_(n-1) ... g_(i+1) g_i   (the gates from i, suffix[n] = I)
+
+    so the circuit unitary is suffix[i] @ prefix[i] for any i. An offspring that differs from the
+    chromosome in the gates first to last is then suffix[last + 1] @ (changed gates) @ prefix[first],
+    which is one gate swap and two multiplications for a single gate mutation.
+
+    Attributes
+    ----------
+    _integer_list: List[int]
+        Copy of the integer list the products were built from.
+    _theta_list: List[float]
+        Copy of the theta list the products were built from.
+    _prefix: np.ndarray
+        The prefix products, shape (n + 1, 2^q, 2^q).
+    _suffix: np.ndarray
+        The suffix products, shape (n + 1, 2^q, 2^q).
+    """
+
+    def __init__(self, gate_cache: GateCache, chromosome: Chromosome) -> None:
+        """
+        OperatorProducts constructor. Builds the prefix and suffix products of the chromosome.
+
+        Parameters
+        ----------
+        gate_cache: (GateCache)
+            The cached gate operators of the chromosome's gate set.
+        chromosome: (Chromosome)
+            The chromosome to build the products for.
+        """
+        self._integer_list = list(chromosome.get_integer_list())
+        self._theta_list = list(chromosome.get_theta_list())
+
+        gates = int(len(self._integer_list) / 3)
+        operators = [self._get_gate_operator(gate_cache, self._integer_list, self._theta_list, i)
+                     for i in range(0, gates)]
+        dimension = 2 ** gate_cache.get_qubits()
+        identity = np.eye(dimension, dtype=complex)
+
+        self._prefix = np.empty((gates + 1, dimension, dimension), dtype=complex)
+        self._suffix = np.empty((gates + 1, dimension, dimension), dtype=complex)
+        self._prefix[0] = identity
+        self._suffix[gates] = identity
+        for i in range(0, gates):
+            self._prefix[i + 1] = operators[i] @ self._prefix[i]
+            self._suffix[gates - 1 - i] = self._suffix[gates - i] @ operators[gates - 1 - i]
+
+    @staticmethod
+    def _get_gate_operator(gate_cache: GateCache, integer_list, theta_list, i: int) -> np.ndarray:
+        """Returns the operator of gate i from the cache"""
+        gate_index = i * 3
+        return gate_cache.get_operator(integer_list[gate_index],
+                                       integer_list[gate_index + 1],
+                                       integer_list[gate_index + 2],
+                                       theta_list[i])
+
+    def is_valid_for(self, chromosome: Chromosome) -> bool:
+        """Returns True if the products were built from the chromosome's current genotype"""
+        return (self._integer_list == chromosome.get_integer_list() and
+                self._theta_list == chromosome.get_theta_list())
+
+    def get_unitary(self) -> np.ndarray:
+        """Returns the circuit unitary of the chromosome the products were built from"""
+        return self._suffix[0]
+
+    def get_offspring_unitary(self, gate_cache: GateCache, offspring: Chromosome) -> np.ndarray:
+        """
+        Returns the circuit unitary of an offspring, only multiplying the gates that differ from the
+        chromosome the products were built from.
+
+        Parameters
+        ----------
+        gate_cache: (GateCache)
+            The cached gate operators of the chromosome's gate set.
+        offspring: (Chromosome)
+            A chromosome of the same length, i.e. a mutated copy.
+
+        Returns
+        -------
+        unitary: np.ndarray
+            The circuit unitary of the offspring.
+        """
+        integer_list = offspring.get_integer_list()
+        theta_list = offspring.get_theta_list()
+
+        if len(integer_list) != len(self._integer_list):
+            return gate_cache.get_chromosome_unitary(offspring)
+
+        changed_gates = [i for i in range(0, len(theta_list))
+                         if integer_list[i * 3:i * 3 + 3] != self._integer_list[i * 3:i * 3 + 3]
+                         or theta_list[i] != self._theta_list[i]]
+        if not changed_gates:
+            return self.get_unitary()
+
+        first = changed_gates[0]
+        last = changed_gates[-1]
+        unitary = self._prefix[first]
+        for i in range(first, last + 1):
+            unitary = self._get_gate_operator(gate_cache, integer_list, theta_list, i) @ unitary
+
+        return self._suffix[last + 1] @ unitary
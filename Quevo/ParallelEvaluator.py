@@ -0,0 +1,162 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import multiprocessing
+import os
+from typing import List, Union
+
+from .Backend import Backend, get_backend
+from .Chromosome import Chromosome
+from .Circuit import Circuit
+from .Population import Population
+
+_WORKER_BACKEND: Backend = None
+
+
+def _initialize_worker(backend: Backend, seed: int, worker_counter) -> None:
+    """
+    Stores the worker's own copy of the engine, which it keeps for the life of the pool. A sampled engine is
+    reseeded with seed plus the worker's index, taken from the shared counter, or randomly without a seed.
+    """
+    global _WORKER_BACKEND
+    _WORKER_BACKEND = backend
+    if hasattr(backend, 'set_seed'):
+        worker_seed = None
+        if seed is not None:
+            with worker_counter.get_lock():
+                worker_seed = seed + worker_counter.value
+                worker_counter.value = worker_counter.value + 1
+        backend.set_seed(worker_seed)
+
+
+def _evaluate_chunk(chunk: tuple) -> List[List[float]]:
+    """Rebuilds the chromosomes of a chunk from their genotypes and returns their probabilities of one"""
+    gate_types, qubits, genotypes = chunk
+    population = Population(gate_types, qubits, capacity=len(genotypes))
+    chromosome_list = []
+    for integer_list, theta_list in genotypes:
+        chromosome = Chromosome(gate_types, qubits, population)
+        chromosome.set_genotype(integer_list, theta_list)
+        chromosome_list.append(chromosome)
+
+    if _WORKER_BACKEND.get_capabilities()['batched']:
+        return _WORKER_BACKEND.find_population_probabilities(chromosome_list).tolist()
+
+    circuits = [Circuit(chromosome, _WORKER_BACKEND) for chromosome in chromosome_list]
+    return _WORKER_BACKEND.find_generation_probabilities(circuits)
+
+
+class ParallelEvaluator(object):
+    """
+    Spreads the simulation of a generation over a pool of worker processes.
+
+    Every worker is initialised once with its own copy of the engine, which keeps its gate caches (and
+    simulator handle) between generations. The chromosomes are sent as compact genotypes, the integer
+    list and the theta list, in one chunk per worker, and the probabilities come back in chromosome order.
+    Sampled engines are reseeded in every worker, so the workers draw independent shot noise. Worker i
+    gets seed + i, or a random seed when no seed is given.
+
+    Use it as a context manager, or call close(), to shut the pool down.
+
+    Attributes
+    ----------
+    _backend: Backend
+        The engine. The workers get a copy when the pool starts.
+    _processes: int
+        The number of worker processes.
+    _seed: int
+        The seed of the first worker's engine, None for random seeds.
+    _pool: multiprocessing.pool.Pool
+        The worker pool, None until the first evaluation.
+    """
+
+    def __init__(self, backend: Union[str, Backend] = 'statevector', processes: int = None,
+                 seed: int = None) -> None:
+        """
+        ParallelEvaluator constructor.
+
+        Parameters
+        ----------
+        backend: (str or Backend) optional
+            The simulation engine, or the name of a registered one.
+        processes: (int) optional
+            The number of worker processes. Defaults to the number of CPUs.
+        seed: (int) optional
+            Worker i seeds its sampled engine with seed + i. Defaults to random seeds.
+        """
+        self._backend = get_backend(backend)
+        self._processes = processes if processes is not None else os.cpu_count()
+        self._seed = seed
+        self._pool = None
+
+    def __enter__(self) -> 'ParallelEvaluator':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def get_backend(self) -> Backend:
+        """Returns the engine"""
+        return self._backend
+
+    def get_processes(self) -> int:
+        """Returns the number of worker processes"""
+        return self._processes
+
+    def get_seed(self) -> int:
+        """Returns the seed of the first worker, None for random seeds"""
+        return self._seed
+
+    def _get_pool(self):
+        """Returns the worker pool, starting it the first time"""
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self._processes, initializer=_initialize_worker,
+                                              initargs=(self._backend, self._seed, multiprocessing.Value('i', 0)))
+        return self._pool
+
+    def find_generation_probabilities(self, chromosome_list: List[Chromosome]) -> List[List[float]]:
+        """
+        Finds the probability of measuring one for every CA initial state of every chromosome.
+
+        Parameters
+        ----------
+        chromosome_list: List[Chromosome]
+            The chromosomes to simulate, all with the same gate set and number of qubits.
+
+        Returns
+        -------
+        generation_probabilities: List[List[float]]
+            One list of probabilities per chromosome, in the same order as the chromosomes.
+        """
+        if not chromosome_list:
+            return []
+
+        gate_types = chromosome_list[0].get_gate_types()
+        qubits = chromosome_list[0].get_qubits()
+        genotypes = [(chromosome.get_integer_list(), chromosome.get_theta_list()) for chromosome in chromosome_list]
+
+        chunk_size = -(-len(genotypes) // self._processes)
+        chunks = [(gate_types, qubits, genotypes[i:i + chunk_size]) for i in range(0, len(genotypes), chunk_size)]
+
+        generation_probabilities = []
+        for chunk_probabilities in self._get_pool().map(_evaluate_chunk, chunks):
+            generation_probabilities.extend(chunk_probabilities)
+        return generation_probabilities
+
+    def close(self) -> None:
+        """Shuts the worker pool down"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
@@ -0,0 +1,218 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from .Checkpoint import Checkpoint
+from .Chromosome import Chromosome
+from .Generation import Generation
+
+
+class Pipeline(object):
+    """
+    An evolution loop that overlaps breeding with evaluation.
+
+    The offspring of a generation are bred in batches, and every batch is handed to an evaluation thread
+    as soon as it is full. While the thread simulates one batch, the main thread selects and mutates the
+    next, so with a slow engine the breeding costs no wall-clock time. At most max_in_flight batches wait
+    for evaluation at once; breeding blocks on the oldest batch when the queue is full.
+
+    Selection needs the fitness of the whole generation, so every generation still ends with all its
+    batches evaluated. The random numbers are drawn in the same order as evolve_into_next_generation(),
+    so with an exact engine the run is the same as the sequential loop in main.py. With vectorized breeding
+    the offspring of a generation are bred together by the first Generation.breed_offspring_batch() call and
+    handed out in batches, so the run is the same as with evolve_into_next_generation() for any batch size.
+
+    The engine, fitness cache and simplifier of the generation are only used by the evaluation thread. Both
+    threads use the generation's Population: the main thread allocates, clones and mutates rows, and the
+    evaluation thread reads the genotypes of its batch, writes their fitness in place and may drop the last
+    reference to a chromosome. The row bookkeeping and the fitness writes hold the lock of the store, and the
+    evaluation thread never allocates a row, so the arrays only grow on the main thread. The best ever
+    chromosome is copied into a store of its own.
+
+    With a checkpoint path, a Checkpoint is saved every checkpoint_interval generations, once all the
+    batches of the generation are evaluated. load_checkpoint() puts a saved run back, and run() then goes
+    on from the saved generation as if the run had never stopped.
+
+    Attributes
+    ----------
+    _generation: Generation
+        The generation that is evolved.
+    _desired_outcome: List[float]
+        The CA outcomes the chromosomes are tested against, one for each initial state.
+    _fitness_type: str
+        The kind of fitness, 'kl' or 'diff'.
+    _batch_size: int
+        Number of chromosomes handed to the evaluation thread at once.
+    _max_in_flight: int
+        Largest number of batches waiting for evaluation.
+    _probability: int
+        The probability for a mutation to replace a gate with a random new one.
+    _best_chromosome: Chromosome
+        The best chromosome found so far, the best ever chromosome of the generation.
+    _generation_number: int
+        The number of generations evolved so far, 0 for the initial generation.
+    _evaluated: bool
+        True once the current generation is evaluated.
+    _checkpoint_path: str
+        The file the checkpoints are saved to, None for no checkpoints.
+    _checkpoint_interval: int
+        Number of generations between checkpoints.
+    """
+
+    def __init__(self, generation: Generation, desired_outcome: List[float], fitness_type: str = 'kl',
+                 batch_size: int = None, max_in_flight: int = 2, probability: int = 30,
+                 checkpoint_path: str = None, checkpoint_interval: int = 10) -> None:
+        """
+        Pipeline constructor.
+
+        Parameters
+        ----------
+        generation: (Generation)
+            The generation to evolve. create_initial_generation() must have been called.
+        desired_outcome: (List[float])
+            The CA outcomes the chromosomes are tested against, one for each initial state.
+        fitness_type: (str) optional
+            The kind of fitness, 'kl' or 'diff'.
+        batch_size: (int) optional
+            Number of chromosomes handed to the evaluation thread at once. Defaults to a quarter of the
+            generation.
+        max_in_flight: (int) optional
+            Largest number of batches waiting for evaluation.
+        probability: (int) optional
+            The probability for a mutation to replace a gate with a random new one.
+        checkpoint_path: (str) optional
+            Save a Checkpoint to this file during run().
+        checkpoint_interval: (int) optional
+            Number of generations between checkpoints.
+        """
+        if fitness_type not in ['diff', 'kl']:
+            raise ValueError(fitness_type + " is not a supported fitness type")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        self._generation = generation
+        self._desired_outcome = desired_outcome
+        self._fitness_type = fitness_type
+        self._batch_size = batch_size if batch_size is not None else max(1, len(generation.get_chromosome_list()) // 4)
+        self._max_in_flight = max_in_flight
+        self._probability = probability
+        self._best_chromosome: Chromosome = None
+        self._generation_number: int = 0
+        self._evaluated: bool = False
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_interval = checkpoint_interval
+
+    def get_generation(self) -> Generation:
+        """Returns the generation that is evolved"""
+        return self._generation
+
+    def get_best_chromosome(self) -> Chromosome:
+        """Returns the best chromosome found so far"""
+        return self._best_chromosome
+
+    def get_best_fitness(self) -> float:
+        """Returns the fitness of the best chromosome found so far"""
+        if self._best_chromosome is None:
+            return None
+        return self._best_chromosome.get_fitness_score()
+
+    def get_generation_number(self) -> int:
+        """Returns the number of generations evolved so far"""
+        return self._generation_number
+
+    def save_checkpoint(self, path: str) -> None:
+        """Saves the generation, the random number generators, the generation number and the best chromosome"""
+        Checkpoint.from_generation(self._generation, self._generation_number, self._best_chromosome).save(path)
+
+    def load_checkpoint(self, path: str) -> None:
+        """Puts a run saved with save_checkpoint() back into the generation, which needs the same settings"""
+        checkpoint = Checkpoint.load(path)
+        best_chromosome = checkpoint.restore(self._generation)
+        # Checkpoints without a best ever chromosome give the best chromosome, which lives in the store.
+        if self._generation.get_best_ever_chromosome() is None and best_chromosome is not None:
+            self._generation.set_best_ever_chromosome(best_chromosome)
+        self._best_chromosome = self._generation.get_best_ever_chromosome()
+        self._generation_number = checkpoint.get_generation_number()
+        self._evaluated = True
+
+    def run(self, generations: int, target_fitness: float = 0.01, callback=None) -> Chromosome:
+        """
+        Evaluates the current generation, unless it is evaluated already, and evolves it until the
+        given generation number.
+
+        Parameters
+        ----------
+        generations: (int)
+            The generation number to stop at. A restored run continues from its saved generation number.
+        target_fitness: (float) optional
+            The run stops once the best fitness of a generation is below this value.
+        callback: optional
+            Called as callback(generation_number, generation) after every generation is evaluated,
+            with generation number 0 for the initial generation.
+
+        Returns
+        -------
+        best_chromosome: Chromosome
+            The best chromosome found.
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            in_flight = collections.deque()
+            if not self._evaluated:
+                for i in range(0, len(self._generation.get_chromosome_list()), self._batch_size):
+                    self._submit(executor, in_flight, self._generation.get_chromosome_list()[i:i + self._batch_size])
+                self._finish_generation(in_flight, callback)
+
+            while self._generation_number < generations:
+                if self.get_best_fitness() < target_fitness:
+                    break
+
+                probability_list = self._generation.prepare_next_generation()
+                batch = self._generation.get_chromosome_list().copy()
+                while not self._generation.is_full():
+                    batch.extend(self._generation.breed_offspring_batch(probability_list,
+                                                                        max(1, self._batch_size - len(batch)),
+                                                                        self._probability))
+                    if len(batch) >= self._batch_size:
+                        self._submit(executor, in_flight, batch)
+                        batch = []
+
+                if batch:
+                    self._submit(executor, in_flight, batch)
+                self._generation_number = self._generation_number + 1
+                self._finish_generation(in_flight, callback)
+
+        return self._best_chromosome
+
+    def _submit(self, executor: ThreadPoolExecutor, in_flight: collections.deque,
+                chromosome_list: List[Chromosome]) -> None:
+        """Hands a batch to the evaluation thread, first waiting for the oldest batch if the queue is full"""
+        while len(in_flight) >= self._max_in_flight:
+            in_flight.popleft().result()
+        in_flight.append(executor.submit(self._generation.evaluate_chromosomes, chromosome_list,
+                                         self._desired_outcome, self._fitness_type))
+
+    def _finish_generation(self, in_flight: collections.deque, callback) -> None:
+        """Waits for every batch of the generation, updates the best chromosome and saves a checkpoint when due"""
+        while in_flight:
+            in_flight.popleft().result()
+        self._evaluated = True
+        self._best_chromosome = self._generation.get_best_ever_chromosome()
+
+        if self._checkpoint_path is not None and self._generation_number % self._checkpoint_interval == 0:
+            self.save_checkpoint(self._checkpoint_path)
+        if callback is not None:
+            callback(self._generation_number, self._generation)
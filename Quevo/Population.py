@@ -0,0 +1,326 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import math
+import threading
+from typing import List
+
+import numpy as np
+
+from .GateSet import GateSet
+
+
+class Population(object):
+    """
+    A structure of arrays store for the genotypes of many chromosomes with the same gate set.
+
+    Every chromosome is a row of the store: its gates are a (gates, 3) block of small integers, (gate type,
+    target, control), in the genes array, with the angles in the same row of the thetas array and the
+    fitness in the fitness vector. Chromosomes with fewer gates than the width of the store only use the
+    first lengths[row] columns. A Chromosome is a view of its row, so the engines can gather the genotypes
+    of a whole generation with one indexing operation instead of walking Python lists.
+
+    Rows are handed out by allocate() and given back by release(), which Chromosome does when it is
+    garbage collected. The arrays grow by doubling, so views of them are only valid until the next allocation.
+
+    Rows are copy-on-write: share() lets a clone use the row of the chromosome it was cloned from, and
+    make_writable() gives it a copy of its own the first time it writes a gene or angle. The fitness is a
+    score of the genotype, not part of it, so set_fitness() writes it in place, to every clone of the row.
+
+    The row bookkeeping, allocate(), share(), make_writable(), release() and the growth of the arrays, and
+    set_fitness() hold a lock, so another thread can score rows, clone and drop chromosomes while one thread
+    breeds. Only the thread that breeds may allocate rows, since a view taken by another thread would miss
+    the writes made after the arrays grow.
+
+    The batch operators clone_rows(), mutate_rows() and randomize_rows() breed, mutate and repair many rows
+    with a few NumPy operations. They follow the rules of the Chromosome methods, but draw their random
+    numbers from a NumPy generator.
+
+    Attributes
+    ----------
+    _gate_set: GateSet
+        The compiled gate set of the chromosomes, shared by every store with the same gate types.
+    _qubits: int
+        The number of qubits of the chromosomes.
+    _genes: np.ndarray
+        The gates of every row, with shape (capacity, gates, 3).
+    _thetas: np.ndarray
+        The angles of every row, with shape (capacity, gates).
+    _fitness: np.ndarray
+        The fitness of every row.
+    _lengths: np.ndarray
+        The number of gates of every row.
+    _references: List[int]
+        The number of chromosomes that use each row.
+    _free: List[int]
+        The rows that are not in use.
+    _lock: threading.RLock
+        Held while the row bookkeeping or the fitness vector is changed.
+    """
+
+    def __init__(self, gate_types: List[str], qubits: int = 3, gates: int = 0, capacity: int = 16) -> None:
+        """
+        Population constructor.
+
+        Parameters
+        ----------
+        gate_types: (List[str])
+            The gate set of the chromosomes.
+        qubits: (int) optional
+            The number of qubits of the chromosomes.
+        gates: (int) optional
+            The initial width of the store. It grows when a longer chromosome is stored.
+        capacity: (int) optional
+            The initial number of rows. It grows when more rows are allocated.
+        """
+        self._gate_set = GateSet.get(gate_types)
+        self._qubits = qubits
+        self._genes = np.zeros((capacity, gates, 3), dtype=np.int16)
+        self._thetas = np.zeros((capacity, gates))
+        self._fitness = np.zeros(capacity)
+        self._lengths = np.zeros(capacity, dtype=np.int32)
+        self._references: List[int] = [0] * capacity
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Returns the number of rows in use"""
+        return len(self._lengths) - len(self._free)
+
+    def get_gate_set(self) -> GateSet:
+        """Returns the compiled gate set of the chromosomes"""
+        return self._gate_set
+
+    def get_gate_types(self) -> List[str]:
+        """Returns the gate set of the chromosomes"""
+        return self._gate_set.get_gate_types()
+
+    def get_gate_dict(self) -> dict:
+        """Returns the table that holds gates and integers"""
+        return self._gate_set.get_gate_dict()
+
+    def get_qubits(self) -> int:
+        """Returns the number of qubits of the chromosomes"""
+        return self._qubits
+
+    def get_genes(self) -> np.ndarray:
+        """Returns the gates of every row, with shape (capacity, gates, 3)"""
+        return self._genes
+
+    def get_thetas(self) -> np.ndarray:
+        """Returns the angles of every row, with shape (capacity, gates)"""
+        return self._thetas
+
+    def get_fitness(self) -> np.ndarray:
+        """Returns the fitness of every row"""
+        return self._fitness
+
+    def get_lengths(self) -> np.ndarray:
+        """Returns the number of gates of every row"""
+        return self._lengths
+
+    def get_references(self) -> List[int]:
+        """Returns the number of chromosomes that use each row"""
+        return self._references
+
+    def allocate(self) -> int:
+        """Returns a free row, with no gates and fitness 0, growing the store if it is full"""
+        with self._lock:
+            if not self._free:
+                self._resize(2 * len(self._lengths) or 1, self._genes.shape[1])
+            row = self._free.pop()
+            self._lengths[row] = 0
+            self._fitness[row] = 0
+            self._references[row] = 1
+            return row
+
+    def share(self, row: int) -> int:
+        """Adds a user to a row and returns it, for a clone that reads the row until it writes"""
+        with self._lock:
+            self._references[row] += 1
+            return row
+
+    def make_writable(self, row: int) -> int:
+        """Returns a row only the caller uses: the row itself, or a new copy of it if it is shared"""
+        with self._lock:
+            if self._references[row] == 1:
+                return row
+            copy_row = self.allocate()
+            self.copy_row(row, copy_row)
+            self._references[row] -= 1
+            return copy_row
+
+    def release(self, row: int) -> None:
+        """Removes a user from a row, and gives the row back to the store when it has no users left"""
+        with self._lock:
+            self._references[row] -= 1
+            if self._references[row] == 0:
+                self._free.append(row)
+
+    def set_fitness(self, row: int, score: float) -> None:
+        """Sets the fitness of a row in place, for every chromosome that uses the row"""
+        with self._lock:
+            self._fitness[row] = score
+
+    def reserve_gates(self, gates: int) -> None:
+        """Widens the store to hold at least the given number of gates per row"""
+        if gates > self._genes.shape[1]:
+            self._resize(len(self._lengths), max(gates, 2 * self._genes.shape[1]))
+
+    def _resize(self, capacity: int, gates: int) -> None:
+        """Copies the arrays into larger ones"""
+        with self._lock:
+            old_capacity, old_gates = self._genes.shape[0], self._genes.shape[1]
+            genes = np.zeros((capacity, gates, 3), dtype=np.int16)
+            thetas = np.zeros((capacity, gates))
+            genes[:old_capacity, :old_gates] = self._genes
+            thetas[:old_capacity, :old_gates] = self._thetas
+            self._genes = genes
+            self._thetas = thetas
+            self._fitness = np.concatenate([self._fitness, np.zeros(capacity - old_capacity)])
+            self._lengths = np.concatenate([self._lengths, np.zeros(capacity - old_capacity, dtype=np.int32)])
+            self._references = self._references + [0] * (capacity - old_capacity)
+            self._free = list(range(capacity - 1, old_capacity - 1, -1)) + self._free
+
+    def set_genotype(self, row: int, integer_list: List[int], theta_list: List[float]) -> None:
+        """Stores an integer list and a theta list, with one angle per three integers, in a row"""
+        gates = len(theta_list)
+        self.reserve_gates(gates)
+        self._genes[row, :gates] = np.reshape(integer_list, (gates, 3))
+        self._thetas[row, :gates] = theta_list
+        self._lengths[row] = gates
+
+    def copy_row(self, source: int, destination: int) -> None:
+        """Copies the genotype and fitness of one row to another"""
+        gates = self._lengths[source]
+        self._genes[destination, :gates] = self._genes[source, :gates]
+        self._thetas[destination, :gates] = self._thetas[source, :gates]
+        self._lengths[destination] = gates
+        self._fitness[destination] = self._fitness[source]
+
+    def clone_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Copies the genotype and fitness of several rows to new rows, and returns the new rows"""
+        with self._lock:
+            clone_rows = np.array([self.allocate() for i in range(0, len(rows))], dtype=np.intp)
+            self._genes[clone_rows] = self._genes[rows]
+            self._thetas[clone_rows] = self._thetas[rows]
+            self._lengths[clone_rows] = self._lengths[rows]
+            self._fitness[clone_rows] = self._fitness[rows]
+            return clone_rows
+
+    def randomize_rows(self, rows: np.ndarray, gates: int, random_generator: np.random.Generator) -> None:
+        """Fills several rows with random valid gates and angles, like Chromosome.generate_random_chromosome()"""
+        self.reserve_gates(gates)
+        genes = np.empty((len(rows), gates, 3), dtype=np.int64)
+        genes[:, :, 0] = random_generator.integers(0, len(self._gate_set), (len(rows), gates))
+        genes[:, :, 1:] = random_generator.integers(0, self._qubits, (len(rows), gates, 2))
+        genes = genes.reshape(-1, 3)
+        self._repair(genes, random_generator)
+
+        parametric = self._gate_set.get_parametric()[genes[:, 0]]
+        thetas = np.where(parametric, random_generator.uniform(0, 2 * math.pi, len(genes)), 0)
+        self._genes[rows, :gates] = genes.reshape(len(rows), gates, 3)
+        self._thetas[rows, :gates] = thetas.reshape(len(rows), gates)
+        self._lengths[rows] = gates
+
+    def mutate_rows(self, rows: np.ndarray, probability: int, random_generator: np.random.Generator) -> None:
+        """
+        Mutates one random gate in each of several rows, like Chromosome.mutate_chromosome(): with the given
+        probability in percent the gate is replaced with a random one, otherwise its qubit connections are
+        changed. The mutated gates are then repaired, and get a new angle if they are parametric and changed.
+
+        Parameters
+        ----------
+        rows: np.ndarray
+            The rows to mutate, each at most once, all with at least one gate.
+        probability: int
+            Value Between 0 and 100. The probability of replacing the gate.
+        random_generator: np.random.Generator
+            The generator the random numbers are drawn from.
+        """
+        count = len(rows)
+        replace = random_generator.integers(0, 100, count) <= probability
+        gate_index = random_generator.integers(0, self._lengths[rows])
+        old_genes = self._genes[rows, gate_index].astype(np.int64)
+
+        # A new connection is drawn from the other qubits-1 qubits, so it always differs from the old one.
+        connections = random_generator.integers(0, self._qubits - 1, (count, 2))
+        connections = connections + (connections >= old_genes[:, 1:])
+        genes = old_genes.copy()
+        genes[~replace, 1:] = connections[~replace]
+        genes[replace, 0] = random_generator.integers(0, len(self._gate_set), int(replace.sum()))
+        genes[replace, 1:] = random_generator.integers(0, self._qubits, (int(replace.sum()), 2))
+        self._repair(genes, random_generator)
+
+        changed = (genes != old_genes).any(axis=1)
+        new_thetas = random_generator.uniform(0, 2 * math.pi, count)
+        thetas = np.where(changed, new_thetas, self._thetas[rows, gate_index])
+        self._genes[rows, gate_index] = genes
+        self._thetas[rows, gate_index] = np.where(self._gate_set.get_parametric()[genes[:, 0]], thetas, 0)
+
+    def _repair(self, genes: np.ndarray, random_generator: np.random.Generator) -> None:
+        """Gives the two qubit gates among the (gates, 3) genes that act on one qubit twice a valid connection"""
+        invalid = self._gate_set.get_two_qubit()[genes[:, 0]] & (genes[:, 1] == genes[:, 2])
+        first = invalid & (genes[:, 1] == 0)
+        last = invalid & (genes[:, 1] == self._qubits - 1)
+        middle = invalid & ~first & ~last
+        genes[first, 1] = random_generator.integers(1, self._qubits, int(first.sum()))
+        genes[last, 2] = random_generator.integers(0, self._qubits - 1, int(last.sum()))
+        genes[middle, 2] = genes[middle, 1] - 1
+
+    @staticmethod
+    def gather(chromosome_list: list) -> tuple:
+        """
+        Returns the genotypes of several chromosomes as padded arrays, with one gather per array when they
+        share a store.
+
+        Returns
+        -------
+        genes: np.ndarray
+            The gates, with shape (chromosomes, gates, 3), zero after the last gate of each chromosome.
+        thetas: np.ndarray
+            The angles, with shape (chromosomes, gates).
+        lengths: np.ndarray
+            The number of gates of each chromosome.
+        """
+        stores = {id(chromosome.get_population()) for chromosome in chromosome_list}
+        if len(stores) == 1:
+            population = chromosome_list[0].get_population()
+            rows = np.array([chromosome.get_row() for chromosome in chromosome_list], dtype=np.intp)
+            lengths = population.get_lengths()[rows]
+            gates = int(lengths.max())
+            genes = population.get_genes()[rows, :gates]
+            thetas = population.get_thetas()[rows, :gates]
+            padding = np.arange(gates) >= lengths[:, None]
+            genes[padding] = 0
+            thetas[padding] = 0
+            return genes, thetas, lengths
+
+        lengths = np.array([chromosome.get_length() // 3 for chromosome in chromosome_list], dtype=np.int32)
+        gates = int(lengths.max()) if len(chromosome_list) > 0 else 0
+        genes = np.zeros((len(chromosome_list), gates, 3), dtype=np.int16)
+        thetas = np.zeros((len(chromosome_list), gates))
+        for i in range(0, len(chromosome_list)):
+            genes[i, :lengths[i]] = chromosome_list[i].get_gene_array()
+            thetas[i, :lengths[i]] = chromosome_list[i].get_theta_array()
+        return genes, thetas, lengths
+
+    @staticmethod
+    def gather_fitness(chromosome_list: list) -> np.ndarray:
+        """Returns the fitness of several chromosomes as a vector, with one gather when they share a store"""
+        stores = {id(chromosome.get_population()) for chromosome in chromosome_list}
+        if len(stores) == 1:
+            rows = np.array([chromosome.get_row() for chromosome in chromosome_list], dtype=np.intp)
+            return chromosome_list[0].get_population().get_fitness()[rows]
+        return np.array([chromosome.get_fitness_score() for chromosome in chromosome_list], dtype=np.float64)
@@ -0,0 +1,186 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+from typing import List
+
+import numpy as np
+
+from .Backend import SampledBackend
+
+
+class ShotAllocator(object):
+    """
+    Adaptive shot allocation for the sampled engine. Instead of drawing the full shot budget for every
+    chromosome at once, the shots are drawn in increments, and after each increment a confidence interval
+    is kept on every chromosome's fitness.
+
+    A chromosome is rejected, and gets no more shots, when the lower bound of its fitness is above the
+    elite cutoff: the upper bound of the survivors-th best chromosome. It can then no longer be one of the
+    parents picked by Generation.set_parent_list(). The remaining contenders are sampled until they reach
+    the full budget, so the surviving chromosomes are scored with exactly the same number of shots as before.
+
+    The interval of each probability is the Agresti-Coull interval. Both fitness functions are sums of
+    convex terms, one per CA initial state, so the fitness bounds are found term by term.
+
+    Attributes
+    ----------
+    _increment: int
+        Number of shots drawn for each contender per round.
+    _survivors: int
+        Number of chromosomes kept as parents, the elite cutoff.
+    _confidence: float
+        Width of the confidence intervals in standard deviations.
+    _shots_used: int
+        Total number of shots drawn, summed over all circuits and initial states.
+    _shots_budget: int
+        Total number of shots the same evaluations would have drawn without early rejection.
+    """
+
+    _KL_FLOOR = 0.0001
+
+    def __init__(self, increment: int = 256, survivors: int = 4, confidence: float = 3.0) -> None:
+        """
+        ShotAllocator constructor.
+
+        Parameters
+        ----------
+        increment: (int) optional
+            Number of shots drawn for each contender per round.
+        survivors: (int) optional
+            Number of chromosomes kept as parents, the elite cutoff.
+        confidence: (float) optional
+            Width of the confidence intervals in standard deviations.
+        """
+        self._increment = increment
+        self._survivors = survivors
+        self._confidence = confidence
+        self._shots_used: int = 0
+        self._shots_budget: int = 0
+
+    def __repr__(self) -> str:
+        """Returns the shot counters of the allocator"""
+        return ("ShotAllocator(shots_used=" + str(self._shots_used)
+                + ", shots_budget=" + str(self._shots_budget) + ")")
+
+    def get_shots_used(self) -> int:
+        """Returns the total number of shots drawn"""
+        return self._shots_used
+
+    def get_shots_budget(self) -> int:
+        """Returns the total number of shots the evaluations would have drawn without early rejection"""
+        return self._shots_budget
+
+    def get_saved_ratio(self) -> float:
+        """Returns the share of the shot budget that was saved by early rejection"""
+        if self._shots_budget == 0:
+            return 0.0
+        return 1 - self._shots_used / self._shots_budget
+
+    def find_fitness(self, backend: SampledBackend, circuits: list, desired_outcome: List[float],
+                     fitness_type: str, fitness_function, known_fitness: List[float] = None) -> List[float]:
+        """
+        Finds the fitness of several circuits, drawing the shots adaptively.
+
+        Parameters
+        ----------
+        backend: (SampledBackend)
+            The sampled engine the shots are drawn from.
+        circuits: list
+            The circuits to evaluate.
+        desired_outcome: List[float]
+            The CA outcomes the circuits are tested against, one for each initial state.
+        fitness_type: str
+            The kind of fitness, 'diff' or 'kl'.
+        fitness_function:
+            Calculates the fitness from the found and the desired probabilities.
+        known_fitness: (List[float]) optional
+            Fitness values of chromosomes that are not simulated, i.e. found in the fitness cache.
+            They take part in the elite cutoff.
+
+        Returns
+        -------
+        fitness_list: List[float]
+            The fitness of each circuit, in the same order as the circuits.
+        """
+        if not isinstance(backend, SampledBackend):
+            raise ValueError("Adaptive shot allocation needs the 'sampled' backend")
+        if fitness_type not in ['diff', 'kl']:
+            raise ValueError(fitness_type + " is not a supported fitness type")
+        if not circuits:
+            return []
+
+        shots = backend.get_shots()
+        exact_probabilities = backend.find_exact_probabilities(circuits)
+        desired = np.asarray(desired_outcome, dtype=float)
+        known = np.asarray(known_fitness if known_fitness is not None else [], dtype=float)
+
+        ones = np.zeros(exact_probabilities.shape, dtype=np.int64)
+        drawn = 0
+        active = np.ones(len(circuits), dtype=bool)
+        shots_used = np.zeros(len(circuits), dtype=np.int64)
+
+        while drawn < shots:
+            step = min(self._increment, shots - drawn)
+            ones[active] += backend.sample_ones(exact_probabilities[active], step)
+            drawn = drawn + step
+            shots_used[active] = drawn
+            if drawn >= shots:
+                break
+
+            lower, upper = self._find_fitness_bounds(ones, shots_used, desired, fitness_type)
+            all_upper = np.concatenate([upper, known])
+            if len(all_upper) <= self._survivors:
+                continue
+            cutoff = np.partition(all_upper, self._survivors - 1)[self._survivors - 1]
+            active &= lower <= cutoff
+            if not active.any():
+                break
+
+        states = exact_probabilities.shape[1]
+        self._shots_used = self._shots_used + int(shots_used.sum()) * states
+        self._shots_budget = self._shots_budget + shots * len(circuits) * states
+
+        found = ones / shots_used[:, None]
+        return [fitness_function(found[i].tolist(), desired_outcome) for i in range(0, len(circuits))]
+
+    def _find_fitness_bounds(self, ones: np.ndarray, shots_used: np.ndarray, desired: np.ndarray,
+                             fitness_type: str) -> tuple:
+        """Returns the lower and upper confidence bounds of the absolute fitness of every circuit"""
+        z_squared = self._confidence ** 2
+        n = shots_used[:, None] + z_squared
+        center = (ones + z_squared / 2) / n
+        width = self._confidence * np.sqrt(center * (1 - center) / n)
+        low = np.clip(center - width, 0.0, 1.0)
+        high = np.clip(center + width, 0.0, 1.0)
+
+        if fitness_type == 'diff':
+            term_upper = np.maximum(np.abs(low - desired), np.abs(high - desired))
+            term_lower = np.where((low <= desired) & (desired <= high), 0.0,
+                                  np.minimum(np.abs(low - desired), np.abs(high - desired)))
+        else:
+            q = np.where(desired != 0, desired, self._KL_FLOOR)
+            term_upper = np.maximum(self._kl_term(low, q), self._kl_term(high, q))
+            term_lower = self._kl_term(np.clip(q / np.e, low, high), q)
+
+        lower = term_lower.sum(axis=1)
+        upper = term_upper.sum(axis=1)
+
+        abs_lower = np.where((lower <= 0) & (upper >= 0), 0.0, np.minimum(np.abs(lower), np.abs(upper)))
+        abs_upper = np.maximum(np.abs(lower), np.abs(upper))
+        return abs_lower, abs_upper
+
+    def _kl_term(self, p: np.ndarray, q: np.ndarray) -> np.ndarray:
+        """Returns the relative entropy term p log(p / q), with p floored like in the Kullback-Liebler fitness"""
+        p = np.maximum(p, self._KL_FLOOR)
+        return p * np.log(p / q)
@@ -0,0 +1,191 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import math
+from typing import List
+
+from .Chromosome import Chromosome
+from .GateSet import GateSet
+
+
+class Simplifier(object):
+    """
+    A peephole simplification pass that turns a chromosome into a shorter chromosome with the same
+    probability of measuring one for every CA initial state. The original chromosome is left untouched.
+
+    The passes are repeated until the gate list stops changing:
+
+    * Cancellation: a self-inverse gate ('h', 'x', 'y', 'z', 'cx', 'swap', 'toffoli') is removed together
+      with an identical earlier gate, if no gate in between touches any of their qubits. 'rxx' and 'rzz'
+      on the same pair are merged by adding their angles, and removed if the angle is a multiple of 2 pi.
+    * Light cone: gates that can not affect the measured qubit are removed.
+    * Measurement tail: after the last 'h' or 'rxx' only permutations and phases remain, so 'z' and 'rzz'
+      there are removed and 'y' is replaced by 'x' (if 'x' is in the gate set).
+
+    The gates are handled as [opcode, b, c, theta], and the passes read the properties of a gate from the
+    opcode tables of the chromosome's GateSet instead of comparing gate names.
+
+    Attributes
+    ----------
+    _qubits: int
+        The number of qubits in the register.
+    _measured_qubit: int
+        The qubit that is measured.
+    """
+
+    def __init__(self, qubits: int = 3, measured_qubit: int = 0) -> None:
+        """
+        Simplifier constructor.
+
+        Parameters
+        ----------
+        qubits: (int) optional
+            The number of qubits in the register.
+        measured_qubit: (int) optional
+            The qubit that is measured.
+        """
+        self._qubits = qubits
+        self._measured_qubit = measured_qubit
+
+    def get_qubits(self) -> int:
+        """Returns the number of qubits in the register"""
+        return self._qubits
+
+    def simplify(self, chromosome: Chromosome) -> Chromosome:
+        """
+        Returns a simplified copy of the chromosome.
+
+        Parameters
+        ----------
+        chromosome: (Chromosome)
+            The chromosome to simplify.
+
+        Returns
+        -------
+        simplified: (Chromosome)
+            A new chromosome with the same gate types and an equal or shorter gate list.
+        """
+        gate_set = chromosome.get_gate_set()
+        gate_list = self._to_gate_list(chromosome)
+
+        length = -1
+        while length != len(gate_list):
+            length = len(gate_list)
+            gate_list = self._cancel_and_merge(gate_list, gate_set)
+            gate_list = self._remove_outside_light_cone(gate_list, gate_set)
+            gate_list = self._remove_measurement_tail(gate_list, gate_set)
+
+        integer_list = []
+        theta_list = []
+        for a, b, c, theta in gate_list:
+            integer_list.extend([a, b, c])
+            theta_list.append(theta)
+
+        simplified = Chromosome(gate_set.get_gate_types(), chromosome.get_qubits())
+        simplified.set_genotype(integer_list, theta_list)
+        return simplified
+
+    @staticmethod
+    def _to_gate_list(chromosome: Chromosome) -> List[list]:
+        """Returns the chromosome's gates as a list of [opcode, b, c, theta]"""
+        genes = chromosome.get_gene_array().tolist()
+        theta_list = chromosome.get_theta_array().tolist()
+        return [[a, b, c, theta] for (a, b, c), theta in zip(genes, theta_list)]
+
+    def _get_qubits(self, gate: list, gate_set: GateSet) -> List[int]:
+        """Returns the qubits a gate acts on"""
+        return gate_set.get_gate_qubits(gate[0], gate[1], gate[2], self._qubits)
+
+    def _is_same_operation(self, gate: list, other: list, gate_set: GateSet) -> bool:
+        """Returns True if two gates are the same operation, ignoring the angle"""
+        if gate[0] != other[0]:
+            return False
+        if gate_set.get_symmetric()[gate[0]]:
+            return {gate[1], gate[2]} == {other[1], other[2]}
+        return self._get_qubits(gate, gate_set) == self._get_qubits(other, gate_set)
+
+    @staticmethod
+    def _is_identity_angle(theta: float) -> bool:
+        """Returns True if a rotation by theta is the identity up to a global phase"""
+        remainder = theta % (2 * math.pi)
+        return min(remainder, 2 * math.pi - remainder) < 1e-12
+
+    def _cancel_and_merge(self, gate_list: List[list], gate_set: GateSet) -> List[list]:
+        """Removes cancelling pairs of self-inverse gates and merges rotations on the same pair"""
+        parametric = gate_set.get_parametric()
+        self_inverse = gate_set.get_self_inverse()
+        simplified: List[list] = []
+
+        for gate in gate_list:
+            gate = list(gate)
+            if parametric[gate[0]] and self._is_identity_angle(gate[3]):
+                continue
+
+            qubits = set(self._get_qubits(gate, gate_set))
+            previous_index = None
+            for j in range(len(simplified) - 1, -1, -1):
+                if qubits.intersection(self._get_qubits(simplified[j], gate_set)):
+                    previous_index = j
+                    break
+
+            if previous_index is not None and self._is_same_operation(gate, simplified[previous_index], gate_set):
+                if self_inverse[gate[0]]:
+                    simplified.pop(previous_index)
+                    continue
+                elif parametric[gate[0]]:
+                    theta = (simplified[previous_index][3] + gate[3]) % (2 * math.pi)
+                    if self._is_identity_angle(theta):
+                        simplified.pop(previous_index)
+                    else:
+                        simplified[previous_index][3] = theta
+                    continue
+
+            simplified.append(gate)
+
+        return simplified
+
+    def _remove_outside_light_cone(self, gate_list: List[list], gate_set: GateSet) -> List[list]:
+        """Removes the gates that can not affect the measured qubit"""
+        light_cone = {self._measured_qubit}
+        simplified: List[list] = []
+
+        for gate in reversed(gate_list):
+            qubits = self._get_qubits(gate, gate_set)
+            if light_cone.intersection(qubits):
+                light_cone.update(qubits)
+                simplified.append(gate)
+
+        simplified.reverse()
+        return simplified
+
+    def _remove_measurement_tail(self, gate_list: List[list], gate_set: GateSet) -> List[list]:
+        """Removes the phases from the gates after the last 'h' or 'rxx', which do not change the measurement"""
+        diagonal = gate_set.get_diagonal()
+        monomial = gate_set.get_monomial()
+        y = gate_set.get_opcode('y') if gate_set.has_gate('y') and gate_set.has_gate('x') else None
+        simplified: List[list] = []
+        tail = True
+
+        for gate in reversed(gate_list):
+            if tail and diagonal[gate[0]]:
+                continue
+            elif tail and gate[0] == y:
+                simplified.append([gate_set.get_opcode('x'), gate[1], gate[2], 0])
+            else:
+                if not monomial[gate[0]]:
+                    tail = False
+                simplified.append(gate)
+
+        simplified.reverse()
+        return simplified
@@ -0,0 +1,211 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+from typing import List
+
+import numpy as np
+
+from .Chromosome import Chromosome
+from .GateSet import GATES, GateSet, X
+
+
+class Statevector(object):
+    """
+    A pure NumPy statevector simulator for the gates a chromosome can hold.
+
+    The state is stored as a tensor with one axis of length two per qubit, where axis k is qubit k.
+    Flattening the tensor therefore gives the usual statevector with qubit 0 as the most significant bit,
+    which makes basis state i the same as the i-th Cellular Automata (CA) starting state in Circuit.
+
+    Attributes
+    ----------
+    _qubits: int
+        The number of qubits in the register.
+    _state: np.ndarray
+        The complex amplitudes of the register.
+    """
+
+    def __init__(self, qubits: int = 3) -> None:
+        """
+        Statevector constructor. The register starts out in the all zero state.
+
+        Parameters
+        ----------
+        qubits: (int) optional
+            The number of qubits in the register.
+        """
+        self._qubits = qubits
+        self._state = np.zeros((2,) * qubits, dtype=complex)
+        self._state[(0,) * qubits] = 1
+
+    def __repr__(self) -> str:
+        """Returns the flattened statevector as a string"""
+        return str(self.get_state())
+
+    def get_state(self) -> np.ndarray:
+        """Returns the flattened statevector"""
+        return self._state.reshape(-1)
+
+    def initialize_initial_states(self, triplet: List[int]) -> None:
+        """
+        Initializes a Cellular Automata (CA) state in the register by flipping the qubits set to one.
+
+        Parameters
+        ----------
+        triplet: List[int]
+            A list of integers in {0,1} representing one of the CA starting possibilities.
+        """
+        for qubit in range(0, len(triplet)):
+            if triplet[qubit] == 1:
+                self.apply_matrix(X, [qubit])
+
+    def apply_matrix(self, matrix: np.ndarray, qubits: List[int]) -> None:
+        """
+        Applies a gate matrix to the given qubits of the register.
+
+        Parameters
+        ----------
+        matrix: np.ndarray
+            A 2^k x 2^k matrix, where k is the number of qubits the gate acts on.
+        qubits: List[int]
+            The qubits the gate acts on, in the same order as the matrix basis.
+        """
+        k = len(qubits)
+        tensor = matrix.reshape((2,) * 2 * k)
+        state = np.tensordot(tensor, self._state, axes=(list(range(k, 2 * k)), qubits))
+        self._state = np.moveaxis(state, list(range(0, k)), qubits)
+
+    def apply_gate(self, gate: str, b: int, c: int, theta: float = 0) -> None:
+        """
+        Applies a gate from the chromosome gate table to the register. The name is looked up once in the
+        GateSet of all gates, see apply_opcode().
+
+        Parameters
+        ----------
+        gate: str
+            The gate notation, i.e. 'h' or 'cx'.
+        b: int
+            The second integer of the gate triplet.
+        c: int
+            The third integer of the gate triplet.
+        theta: (float) optional
+            The gate angle, used by 'rxx' and 'rzz'.
+        """
+        if gate not in GATES:
+            print(gate + " is not a valid gate!")
+            return
+        gate_set = GateSet.get(list(GATES))
+        self.apply_opcode(gate_set, gate_set.get_opcode(gate), b, c, theta)
+
+    def apply_opcode(self, gate_set: GateSet, a: int, b: int, c: int, theta: float = 0) -> None:
+        """
+        Applies a gate triplet to the register, with the gate given as an opcode of a gate set.
+
+        Parameters
+        ----------
+        gate_set: GateSet
+            The gate set the opcode belongs to.
+        a: int
+            The opcode, the first integer of the gate triplet.
+        b: int
+            The second integer of the gate triplet.
+        c: int
+            The third integer of the gate triplet.
+        theta: (float) optional
+            The gate angle, used by the parametric gates.
+        """
+        self.apply_matrix(gate_set.get_matrix(a, theta), gate_set.get_gate_qubits(a, b, c, self._qubits))
+
+    def apply_chromosome(self, chromosome: Chromosome) -> None:
+        """
+        Applies every gate in the chromosome to the register.
+
+        Parameters
+        ----------
+        chromosome: (Chromosome)
+            The chromosome that describes the circuit.
+        """
+        gate_set = chromosome.get_gate_set()
+        for (a, b, c), theta in zip(chromosome.get_gene_array().tolist(), chromosome.get_theta_array().tolist()):
+            self.apply_opcode(gate_set, a, b, c, theta)
+
+    def probability_of_one(self, qubit: int = 0) -> float:
+        """Returns the exact probability of measuring the given qubit as one"""
+        return float(np.sum(np.abs(np.take(self._state, 1, axis=qubit)) ** 2))
+
+
+class Unitary(Statevector):
+    """
+    The full circuit unitary of a register, built by applying gates to the identity.
+
+    The tensor has one axis per qubit and a trailing axis for the column, so column i holds the
+    output state of the i-th Cellular Automata (CA) starting state. Reading the probability of one
+    from every column evaluates all the starting states from a single pass over the gates.
+    """
+
+    def __init__(self, qubits: int = 3) -> None:
+        """
+        Unitary constructor. The register starts out as the identity.
+
+        Parameters
+        ----------
+        qubits: (int) optional
+            The number of qubits in the register.
+        """
+        super().__init__(qubits)
+        self._state = np.eye(2 ** qubits, dtype=complex).reshape((2,) * qubits + (2 ** qubits,))
+
+    def get_state(self) -> np.ndarray:
+        """Returns the unitary as a 2^n x 2^n matrix"""
+        return self._state.reshape(2 ** self._qubits, 2 ** self._qubits)
+
+    def initialize_initial_states(self, triplet: List[int]) -> None:
+        """
+        Flips the qubits set to one, like Statevector.initialize_initial_states(). On the identity this moves
+        the starting state to column 0, so probability_of_one() and column 0 then follow that starting state.
+        Every other starting state stays available, use get_column() to read the output state of any of them.
+
+        Parameters
+        ----------
+        triplet: List[int]
+            A list of integers in {0,1} representing one of the CA starting possibilities.
+        """
+        super().initialize_initial_states(triplet)
+
+    def get_column(self, triplet: List[int]) -> np.ndarray:
+        """
+        Returns the column of the unitary for a Cellular Automata (CA) starting state, i.e. the output state
+        of the circuit when it starts in that state.
+
+        Parameters
+        ----------
+        triplet: List[int]
+            A list of integers in {0,1} representing one of the CA starting possibilities.
+
+        Returns
+        -------
+        column: np.ndarray
+            The 2^n amplitudes of the output state.
+        """
+        index = int(''.join(str(bit) for bit in triplet), 2)
+        return self.get_state()[:, index].copy()
+
+    def probabilities_of_one(self, qubit: int = 0) -> List[float]:
+        """Returns the exact probability of measuring the given qubit as one for every starting state"""
+        ones = np.abs(np.take(self._state, 1, axis=qubit)) ** 2
+        return ones.reshape(-1, 2 ** self._qubits).sum(axis=0).tolist()
+
+    def probability_of_one(self, qubit: int = 0) -> float:
+        """Returns the probability of one for the all zero starting state"""
+        return self.probabilities_of_one(qubit)[0]
@@ -0,0 +1,230 @@
+#  Copyright 2022 Sebastian T. Overskott Github link: https://github.com/Overskott/Quevo
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+from typing import List
+
+import numpy as np
+
+from .Chromosome import Chromosome
+from .GateSet import GateSet
+
+
+class Tableau(object):
+    """
+    A stabilizer (Clifford tableau) simulator for chromosomes built only from Clifford gates.
+
+    The tableau follows Aaronson and Gottesman (2004): rows 0 to n-1 are the destabilizers and rows n to
+    2n-1 the stabilizers of the register. Each qubit column of the x and z bits is stored as a Python int
+    with one bit per row, so every gate is a handful of integer bit operations.
+
+    All gate phase updates are independent of the phases themselves, so the phase bits are stored as the
+    change from the all zero starting state. The X gates that prepare a CA starting state only flip the
+    phase of the stabilizer of that qubit, which lets probabilities_of_one() read the exact outcome for
+    every starting state from one pass over the gates.
+
+    Each Clifford gate is a method, and apply_chromosome() calls them through a table indexed by the
+    opcodes of the chromosome's GateSet, built once per gate set, so the gate names are never compared
+    while a chromosome is simulated.
+
+    Attributes
+    ----------
+    _qubits: int
+        The number of qubits in the register.
+    _x: List[int]
+        The x bits of each qubit column, one bit per row.
+    _z: List[int]
+        The z bits of each qubit column, one bit per row.
+    _r: int
+        The phase bits of the rows, relative to the all zero starting state.
+    _mask: int
+        Bit mask covering all 2n rows.
+    """
+
+    CLIFFORD_GATES = ['h', 'x', 'y', 'z', 'cx', 'swap']
+
+    # For every gate set used so far: the gate methods indexed by opcode, None for the gates the tableau
+    # can not simulate, and a boolean array of the opcodes that are Clifford gates.
+    _operations: dict = {}
+
+    def __init__(self, qubits: int = 3) -> None:
+        """
+        Tableau constructor. The register starts out in the all zero state.
+
+        Parameters
+        ----------
+        qubits: (int) optional
+            The number of qubits in the register.
+        """
+        self._qubits = qubits
+        self._x: List[int] = [1 << q for q in range(0, qubits)]
+        self._z: List[int] = [1 << (qubits + q) for q in range(0, qubits)]
+        self._r: int = 0
+        self._mask: int = (1 << (2 * qubits)) - 1
+
+    @classmethod
+    def is_clifford(cls, chromosome: Chromosome) -> bool:
+        """Returns True if every gate in the chromosome is a Clifford gate the tableau can simulate"""
+        operations, clifford = cls._get_operations(chromosome.get_gate_set())
+        return bool(clifford[chromosome.get_gene_array()[:, 0]].all())
+
+    @classmethod
+    def _get_operations(cls, gate_set: GateSet) -> tuple:
+        """Returns the gate methods of a gate set indexed by opcode, and which opcodes are Clifford gates"""
+        operations = cls._operations.get(gate_set)
+        if operations is None:
+            method_list = [cls._GATE_METHODS.get(gate) for gate in gate_set.get_gate_types()]
+            clifford = np.array([method is not None for method in method_list], dtype=bool)
+            operations = cls._operations.setdefault(gate_set, (method_list, clifford))
+        return operations
+
+    def apply_gate(self, gate: str, b: int, c: int, theta: float = 0) -> None:
+        """
+        Applies a Clifford gate from the chromosome gate table to the tableau.
+
+        Parameters
+        ----------
+        gate: str
+            The gate notation, i.e. 'h' or 'cx'.
+        b: int
+            The second integer of the gate triplet.
+        c: int
+            The third integer of the gate triplet.
+        theta: (float) optional
+            Not used, Clifford gates have no angle.
+        """
+        method = self._GATE_METHODS.get(gate)
+        if method is None:
+            raise ValueError(gate + " is not a Clifford gate!")
+        method(self, b, c)
+
+    def _apply_h(self, b: int, c: int) -> None:
+        """Applies a Hadamard gate to qubit b"""
+        self._r ^= self._x[b] & self._z[b]
+        self._x[b], self._z[b] = self._z[b], self._x[b]
+
+    def _apply_cx(self, b: int, c: int) -> None:
+        """Applies a C-NOT gate with control b and target c"""
+        x = self._x
+        z = self._z
+        self._r ^= x[b] & z[c] & ~(x[c] ^ z[b]) & self._mask
+        x[c] ^= x[b]
+        z[b] ^= z[c]
+
+    def _apply_x(self, b: int, c: int) -> None:
+        """Applies a Pauli X gate to qubit b"""
+        self._r ^= self._z[b]
+
+    def _apply_swap(self, b: int, c: int) -> None:
+        """Swaps qubits b and c"""
+        x = self._x
+        z = self._z
+        x[b], x[c] = x[c], x[b]
+        z[b], z[c] = z[c], z[b]
+
+    def _apply_y(self, b: int, c: int) -> None:
+        """Applies a Pauli Y gate to qubit b"""
+        self._r ^= self._x[b] ^ self._z[b]
+
+    def _apply_z(self, b: int, c: int) -> None:
+        """Applies a Pauli Z gate to qubit b"""
+        self._r ^= self._x[b]
+
+    _GATE_METHODS: dict = {'h': _apply_h, 'cx': _apply_cx, 'x': _apply_x, 'swap': _apply_swap,
+                           'y': _apply_y, 'z': _apply_z}
+
+    def apply_chromosome(self, chromosome: Chromosome) -> None:
+        """
+        Applies every gate in the chromosome to the tableau.
+
+        Parameters
+        ----------
+        chromosome: (Chromosome)
+            A chromosome with only Clifford gates.
+        """
+        operations, clifford = self._get_operations(chromosome.get_gate_set())
+        for a, b, c in chromosome.get_gene_array().tolist():
+            operation = operations[a]
+            if operation is None:
+                raise ValueError(chromosome.get_gate_set().get_name(a) + " is not a Clifford gate!")
+            operation(self, b, c)
+
+    def _get_row(self, row: int) -> tuple:
+        """Returns the x and z bits of a row as two ints with one bit per qubit"""
+        row_x = 0
+        row_z = 0
+        for q in range(0, self._qubits):
+            row_x |= ((self._x[q] >> row) & 1) << q
+            row_z |= ((self._z[q] >> row) & 1) << q
+        return row_x, row_z
+
+    def _phase_exponent(self, row_x: int, row_z: int, h_x: int, h_z: int) -> int:
+        """Returns the sum of the g function from Aaronson and Gottesman when multiplying a row into h"""
+        total = 0
+        for q in range(0, self._qubits):
+            x1 = (row_x >> q) & 1
+            z1 = (row_z >> q) & 1
+            x2 = (h_x >> q) & 1
+            z2 = (h_z >> q) & 1
+            if x1 == 1 and z1 == 1:
+                total = total + z2 - x2
+            elif x1 == 1:
+                total = total + z2 * (2 * x2 - 1)
+            elif z1 == 1:
+                total = total + x2 * (1 - 2 * z2)
+        return total
+
+    def probabilities_of_one(self, qubit: int = 0) -> List[float]:
+        """
+        Returns the exact probability of measuring the given qubit as one for every CA starting state.
+        The outcome of a stabilizer state is either random (0.5) or deterministic (0 or 1).
+
+        Parameters
+        ----------
+        qubit: (int) optional
+            The measured qubit.
+
+        Returns
+        -------
+        probabilities: (List[float])
+            One probability for each starting state, with qubit 0 as the most significant bit.
+        """
+        n = self._qubits
+        states = 2 ** n
+
+        if self._x[qubit] >> n:
+            return [0.5] * states
+
+        h_x = 0
+        h_z = 0
+        phase = 0
+        selected_qubits = 0
+        for i in range(0, n):
+            if (self._x[qubit] >> i) & 1:
+                row_x, row_z = self._get_row(i + n)
+                phase = phase + self._phase_exponent(row_x, row_z, h_x, h_z) + 2 * ((self._r >> (i + n)) & 1)
+                h_x ^= row_x
+                h_z ^= row_z
+                selected_qubits |= 1 << i
+
+        outcome = (phase % 4) // 2
+
+        probabilities = []
+        for state in range(0, states):
+            state_bits = 0
+            for q in range(0, n):
+                state_bits |= ((state >> (n - 1 - q)) & 1) << q
+            flips = bin(state_bits & selected_qubits).count('1')
+            probabilities.append(float(outcome ^ (flips & 1)))
+
+        return probabilities
@@ -1,3 +1,19 @@
 from .Chromosome import Chromosome
 from .Circuit import Circuit
+from .Population import Population
+from .GateSet import GateSet
 from .Generation import Generation
+from .Statevector import Statevector, Unitary
+from .GateCache import GateCache
+from .OperatorProducts import OperatorProducts
+from .FitnessCache import FitnessCache
+from .Simplifier import Simplifier
+from .Tableau import Tableau
+from .ShotAllocator import ShotAllocator
+from .NoiseModel import NoiseModel
+from .DensityMatrix import DensityMatrix
+from .ParallelEvaluator import ParallelEvaluator
+from .Checkpoint import Checkpoint
+from .Pipeline import Pipeline
+from .IslandModel import IslandModel
+from .Backend import Backend, get_backend, get_backend_names, get_default_backend, register_backend, select_backend
@@ -0,0 +1,106 @@
+import copy
+import importlib.util
+import math
+from unittest import TestCase, skipIf
+
+import numpy as np
+
+from Quevo import Chromosome, Circuit, Generation, NoiseModel, ShotAllocator, get_backend, select_backend
+from Quevo.Backend import NoisyBackend, SampledBackend, StabilizerBackend, StatevectorBackend, TableauBackend
+
+
+class TestBackend(TestCase):
+
+    def test_get_backend_by_name(self):
+        assert isinstance(get_backend('statevector'), StatevectorBackend)
+        assert isinstance(get_backend('unitary'), StatevectorBackend)
+
+    def test_get_backend_returns_instance(self):
+        backend = get_backend('statevector')
+        assert get_backend(backend) is backend
+
+    @skipIf(importlib.util.find_spec('qiskit_aer') is None, "the default AER engine needs qiskit-aer")
+    def test_default_backend_is_shared(self):
+        chromosome = Chromosome(['h', 'x', 'cx'])
+        assert Circuit(chromosome).get_backend() is Circuit(chromosome).get_backend()
+        assert Generation(4, 5).get_backend() is get_backend(None)
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            get_backend('not a backend')
+
+    def test_supports(self):
+        assert StabilizerBackend.supports(['h', 'cx'])
+        assert not StabilizerBackend.supports(['h', 'rzz'])
+        assert not StabilizerBackend.supports(['h'], exact=True)
+
+    def test_select_backend(self):
+        assert isinstance(select_backend(['h', 'toffoli'], exact=True), StatevectorBackend)
+        assert isinstance(select_backend(['h', 'cx']), TableauBackend)
+        assert isinstance(select_backend(['h'], noise=True, exact=True), NoisyBackend)
+
+    def test_generation_shares_backend(self):
+        generation = Generation(4, 5, 'statevector')
+        generation.create_initial_generation(['h', 'x', 'cx'])
+        generation.run_generation_diff([0.5] * 8)
+        chromosome = generation.get_best_chromosome()
+        circuit = Circuit(chromosome, 'statevector')
+        assert math.isclose(circuit.find_chromosome_fitness([0.5] * 8), chromosome.get_fitness_score())
+
+    def test_circuit_probabilities(self):
+        chromosome = Chromosome(['h', 'x', 'cx'])
+        chromosome.set_integer_list([1, 0, 0])
+        circuit = Circuit(chromosome, 'statevector')
+        assert circuit.find_probabilities() == [1, 1, 1, 1, 0, 0, 0, 0]
+
+    def test_incremental_offspring(self):
+        gate_types = ['cx', 'x', 'h', 'rxx', 'rzz', 'swap', 'z', 'y', 'toffoli']
+        parent = Chromosome(gate_types)
+        parent.generate_random_chromosome(30)
+        offspring = copy.deepcopy(parent)
+        offspring.set_parent(parent)
+        offspring.mutate_chromosome(50)
+
+        incremental = StatevectorBackend()
+        full = StatevectorBackend(incremental=False)
+        probabilities = incremental.find_probabilities(Circuit(offspring, incremental))
+        assert parent.get_products() is not None
+        assert offspring.get_parent() is None
+        assert np.allclose(probabilities, full.find_probabilities(Circuit(offspring, full)))
+
+    def test_sampled_backend(self):
+        chromosome = Chromosome(['h', 'x', 'cx'])
+        chromosome.set_integer_list([0, 0, 0])
+        circuit = Circuit(chromosome, 'statevector')
+        probabilities = SampledBackend(shots=1000, seed=1).find_generation_probabilities([circuit] * 4)
+        assert np.array(probabilities).shape == (4, 8)
+        assert np.allclose(probabilities, 0.5, atol=0.1)
+        assert probabilities == SampledBackend(shots=1000, seed=1).find_generation_probabilities([circuit] * 4)
+        assert not SampledBackend.supports(['h'], exact=True)
+
+    def test_shot_allocator_rejects_hopeless_chromosomes(self):
+        backend = SampledBackend(shots=2048, seed=1)
+        circuits = []
+        for integer_list in [[1, 0, 0]] * 4 + [[0, 0, 1]] * 6:
+            chromosome = Chromosome(['h', 'x', 'cx'])
+            chromosome.set_integer_list(integer_list)
+            circuits.append(Circuit(chromosome, backend))
+
+        shot_allocator = ShotAllocator(increment=256)
+        fitness_list = shot_allocator.find_fitness(backend, circuits, [1, 1, 1, 1, 0, 0, 0, 0], 'diff',
+                                                   Circuit.calculate_difference_fitness)
+        assert fitness_list[:4] == [0] * 4
+        assert min(fitness_list[4:]) > 2
+        assert shot_allocator.get_saved_ratio() > 0.5
+
+    def test_noisy_backend_can_not_simplify(self):
+        with self.assertRaises(ValueError):
+            Generation(4, 5, 'noisy', simplify=True)
+
+    def test_noisy_backend(self):
+        chromosome = Chromosome(['h', 'x', 'cx'])
+        chromosome.set_integer_list([1, 0, 0])
+        backend = NoisyBackend(noise_model=NoiseModel(amplitude_damping=0.1, readout_error=0.05))
+        probabilities = Circuit(chromosome, backend).find_probabilities()
+        assert np.allclose(probabilities, [0.9 * 0.95 + 0.1 * 0.05] * 4 + [0.05] * 4)
+        assert math.isclose(Circuit(chromosome, backend).find_init_state_probability([1, 0, 0]), 0.05)
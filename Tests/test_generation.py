@@ -0,0 +1,484 @@
+import collections
+import copy
+import gc
+import math
+import os
+import pickle
+import random
+import shutil
+import tempfile
+from unittest import TestCase
+
+from Quevo import Checkpoint, Chromosome, Circuit, FitnessCache, Generation, IslandModel, ParallelEvaluator, Pipeline, Population
+
+GATE_TYPES = ['cx', 'x', 'h', 'rxx', 'rzz', 'swap', 'z', 'y', 'toffoli']
+DESIRED_OUTCOME = [0.394221, 0.094721, 0.239492, 0.408455, 0.0, 0.730203, 0.915034, 1.0]
+
+
+class TestFitnessCache(TestCase):
+
+    def test_hit_and_miss(self):
+        fitness_cache = FitnessCache()
+        chromosome = Chromosome(GATE_TYPES)
+        chromosome.generate_random_chromosome(5)
+        key = FitnessCache.make_key(chromosome, DESIRED_OUTCOME, 'kl')
+
+        assert fitness_cache.get(key) is None
+        fitness_cache.put(key, 1.5)
+        assert fitness_cache.get(key) == 1.5
+        assert fitness_cache.get_hits() == 1
+        assert fitness_cache.get_misses() == 1
+
+    def test_key_includes_gate_set_and_qubits(self):
+        chromosome = Chromosome(['h', 'x', 'cx'])
+        chromosome.set_genotype([0, 1, 0], [0])
+        other_gate_order = Chromosome(['x', 'h', 'cx'])
+        other_gate_order.set_genotype([0, 1, 0], [0])
+        more_qubits = Chromosome(['h', 'x', 'cx'], 5)
+        more_qubits.set_genotype([0, 1, 0], [0])
+
+        key = FitnessCache.make_key(chromosome, DESIRED_OUTCOME, 'kl')
+        assert key != FitnessCache.make_key(other_gate_order, DESIRED_OUTCOME, 'kl')
+        assert key != FitnessCache.make_key(more_qubits, DESIRED_OUTCOME, 'kl')
+
+    def test_lru_eviction(self):
+        fitness_cache = FitnessCache(2)
+        fitness_cache.put('a', 1)
+        fitness_cache.put('b', 2)
+        fitness_cache.get('a')
+        fitness_cache.put('c', 3)
+        assert len(fitness_cache) == 2
+        assert fitness_cache.get('b') is None
+        assert fitness_cache.get('a') == 1
+
+    def test_disabled(self):
+        fitness_cache = FitnessCache(0)
+        fitness_cache.put('a', 1)
+        assert len(fitness_cache) == 0
+
+
+class TestGeneration(TestCase):
+
+    def test_elites_are_cached(self):
+        generation = Generation(10, 10, 'statevector')
+        generation.create_initial_generation(GATE_TYPES)
+        generation.run_generation_kl(DESIRED_OUTCOME)
+        generation.evolve_into_next_generation()
+        generation.run_generation_kl(DESIRED_OUTCOME)
+        assert generation.get_fitness_cache().get_hits() >= 4
+
+    def test_sampled_duplicates_are_sampled_separately(self):
+        generation = Generation(6, 1, 'sampled')
+        chromosome_list = []
+        for i in range(0, 6):
+            chromosome = Chromosome(['h', 'x', 'cx'])
+            chromosome.set_genotype([0, 0, 0], [0])
+            chromosome_list.append(chromosome)
+        generation.set_population(chromosome_list, [])
+        generation.run_generation_diff([0.5] * 8)
+        assert len({duplicate.get_fitness_score() for duplicate in chromosome_list}) > 1
+
+    def test_radius_two(self):
+        generation = Generation(6, 10, 'statevector', radius=2)
+        generation.create_initial_generation(GATE_TYPES)
+        generation.run_generation_diff([0.5] * 32)
+        assert generation.get_qubits() == 5
+        for chromosome in generation._chromosome_list:
+            assert max(chromosome.get_integer_list()[1::3] + chromosome.get_integer_list()[2::3]) < 5
+            assert chromosome.get_fitness_score() <= 16 + 1e-9
+
+    def test_radius_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            Generation(6, 10, 'statevector', radius=0)
+        with self.assertRaises(ValueError):
+            IslandModel(2, 6, 5, GATE_TYPES, DESIRED_OUTCOME, generation_options={'radius': 0})
+
+    def test_desired_outcome_must_match_the_qubits(self):
+        generation = Generation(6, 10, 'statevector', radius=2)
+        generation.create_initial_generation(GATE_TYPES)
+        with self.assertRaises(ValueError):
+            generation.run_generation_kl(DESIRED_OUTCOME)
+        with self.assertRaises(ValueError):
+            Circuit.calculate_difference_fitness([0.5] * 8, [0.5] * 4)
+
+    def test_chromosome_needs_three_qubits(self):
+        with self.assertRaises(ValueError):
+            Chromosome(GATE_TYPES, 2)
+
+    def test_batched_matches_per_chromosome(self):
+        generation = Generation(20, 10, 'statevector')
+        generation.create_initial_generation(GATE_TYPES)
+        batched_generation = Generation(20, 10, 'statevector', batched=True)
+        batched_generation._chromosome_list = [copy.deepcopy(chromosome)
+                                               for chromosome in generation._chromosome_list]
+
+        generation.run_generation_kl(DESIRED_OUTCOME)
+        batched_generation.run_generation_kl(DESIRED_OUTCOME)
+        for chromosome, batched_chromosome in zip(generation._chromosome_list, batched_generation._chromosome_list):
+            assert math.isclose(chromosome.get_fitness_score(), batched_chromosome.get_fitness_score(),
+                                abs_tol=1e-9)
+
+    def test_vectorized_breeding(self):
+        populations = []
+        for i in range(0, 2):
+            random.seed(9)
+            generation = Generation(30, 12, 'statevector', vectorized_breeding=True)
+            generation.create_initial_generation(GATE_TYPES)
+            generation.run_generation_kl(DESIRED_OUTCOME)
+            generation.evolve_into_next_generation()
+            populations.append([chromosome.get_integer_list() for chromosome in generation.get_chromosome_list()])
+
+        assert populations[0] == populations[1]
+        assert len(generation.get_chromosome_list()) == 30
+        assert generation.get_chromosome_list()[:4] == generation.get_parent_list()
+        for chromosome in generation.get_chromosome_list():
+            integer_list = chromosome.get_integer_list()
+            for i in range(0, len(integer_list), 3):
+                gate = GATE_TYPES[integer_list[i]]
+                if gate in ['cx', 'swap', 'rzz', 'rxx']:
+                    assert integer_list[i + 1] != integer_list[i + 2]
+                if gate not in ['rzz', 'rxx']:
+                    assert chromosome.get_theta_list()[i // 3] == 0
+
+    def test_parent_selection_matches_sort(self):
+        generation = Generation(40, 4, 'statevector')
+        generation.create_initial_generation(GATE_TYPES)
+        for chromosome in generation.get_chromosome_list():
+            chromosome.set_fitness_score(random.choice([0.25, 0.5, math.inf, random.random()]))
+
+        generation.set_parent_list()
+        expected = sorted(generation.get_chromosome_list())[:4]
+        assert all(parent is chromosome for parent, chromosome in zip(generation.get_parent_list(), expected))
+
+    def test_best_is_tracked_on_evaluation(self):
+        generation = Generation(12, 8, 'statevector')
+        generation.create_initial_generation(GATE_TYPES)
+        generation.run_generation_kl(DESIRED_OUTCOME)
+        best_ever_fitness = generation.get_best_ever_fitness()
+        assert generation.get_best_chromosome() is min(generation.get_chromosome_list())
+        assert best_ever_fitness == generation.get_best_chromosome().get_fitness_score()
+
+        for i in range(0, 3):
+            generation.evolve_into_next_generation()
+            generation.run_generation_kl(DESIRED_OUTCOME)
+            assert generation.get_best_chromosome() is min(generation.get_chromosome_list())
+            best_ever_fitness = min(best_ever_fitness, generation.get_best_chromosome().get_fitness_score())
+            assert generation.get_best_ever_fitness() == best_ever_fitness
+
+        immigrant = generation.get_best_chromosome().detach()
+        immigrant.set_fitness_score(0)
+        generation.replace_worst_chromosomes([immigrant])
+        assert generation.get_best_chromosome() is immigrant
+        assert generation.get_best_ever_fitness() == 0
+
+    def test_batched_needs_batched_backend(self):
+        with self.assertRaises(ValueError):
+            Generation(4, 5, 'tableau', batched=True)
+
+    def test_parallel_evaluator_keeps_order(self):
+        generation = Generation(9, 10, 'statevector')
+        generation.create_initial_generation(GATE_TYPES)
+        with ParallelEvaluator('statevector', 2) as evaluator:
+            parallel_generation = Generation(9, 10, evaluator=evaluator)
+            parallel_generation._chromosome_list = generation._chromosome_list
+            probabilities = parallel_generation.find_generation_probabilities()
+
+        for found, expected in zip(probabilities, generation.find_generation_probabilities()):
+            assert all(math.isclose(a, b, abs_tol=1e-9) for a, b in zip(found, expected))
+
+    def test_seeded_parallel_evaluator_repeats(self):
+        generation = Generation(6, 10, 'statevector')
+        generation.create_initial_generation(GATE_TYPES)
+        runs = []
+        for i in range(0, 2):
+            with ParallelEvaluator('sampled', 1, seed=11) as evaluator:
+                runs.append(evaluator.find_generation_probabilities(generation.get_chromosome_list()))
+        assert runs[0] == runs[1]
+
+
+class TestPipeline(TestCase):
+
+    def test_matches_sequential_loop(self):
+        random.seed(7)
+        generation = Generation(10, 8, 'statevector')
+        generation.create_initial_generation(GATE_TYPES)
+        generation.run_generation_kl(DESIRED_OUTCOME)
+        for i in range(0, 5):
+            generation.evolve_into_next_generation()
+            generation.run_generation_kl(DESIRED_OUTCOME)
+
+        random.seed(7)
+        pipelined_generation = Generation(10, 8, 'statevector')
+        pipelined_generation.create_initial_generation(GATE_TYPES)
+        pipeline = Pipeline(pipelined_generation, DESIRED_OUTCOME, batch_size=3, max_in_flight=2)
+        pipeline.run(5, target_fitness=0)
+
+        for chromosome, pipelined_chromosome in zip(generation.get_chromosome_list(),
+                                                    pipelined_generation.get_chromosome_list()):
+            assert chromosome.get_integer_list() == pipelined_chromosome.get_integer_list()
+            assert chromosome.get_fitness_score() == pipelined_chromosome.get_fitness_score()
+        assert pipeline.get_best_fitness() <= generation.get_best_fitness()
+
+    def test_vectorized_matches_sequential_loop(self):
+        random.seed(13)
+        generation = Generation(10, 8, 'statevector', vectorized_breeding=True)
+        generation.create_initial_generation(GATE_TYPES)
+        generation.run_generation_kl(DESIRED_OUTCOME)
+        for i in range(0, 5):
+            generation.evolve_into_next_generation()
+            generation.run_generation_kl(DESIRED_OUTCOME)
+
+        for batch_size in [1, 3, 4, 10]:
+            random.seed(13)
+            pipelined_generation = Generation(10, 8, 'statevector', vectorized_breeding=True)
+            pipelined_generation.create_initial_generation(GATE_TYPES)
+            Pipeline(pipelined_generation, DESIRED_OUTCOME, batch_size=batch_size).run(5, target_fitness=0)
+
+            for chromosome, pipelined_chromosome in zip(generation.get_chromosome_list(),
+                                                        pipelined_generation.get_chromosome_list()):
+                assert chromosome.get_integer_list() == pipelined_chromosome.get_integer_list()
+                assert chromosome.get_theta_list() == pipelined_chromosome.get_theta_list()
+                assert chromosome.get_fitness_score() == pipelined_chromosome.get_fitness_score()
+
+    def test_best_chromosome_is_a_copy(self):
+        generation = Generation(8, 6, 'sampled')
+        generation.create_initial_generation(GATE_TYPES)
+        pipeline = Pipeline(generation, DESIRED_OUTCOME)
+        pipeline.run(3, target_fitness=0)
+
+        best_fitness = pipeline.get_best_fitness()
+        assert pipeline.get_best_chromosome() is generation.get_best_ever_chromosome()
+        assert all(pipeline.get_best_chromosome().get_population() is not chromosome.get_population()
+                   for chromosome in generation.get_chromosome_list())
+        generation.run_generation_kl(DESIRED_OUTCOME)
+        assert pipeline.get_best_fitness() == best_fitness
+
+    def test_store_stays_consistent(self):
+        random.seed(11)
+        generation = Generation(12, 6, 'statevector', vectorized_breeding=True)
+        generation.create_initial_generation(GATE_TYPES)
+        pipeline = Pipeline(generation, DESIRED_OUTCOME, batch_size=2, max_in_flight=3)
+        pipeline.run(8, target_fitness=0)
+
+        population = generation.get_population()
+        rows = collections.Counter(chromosome.get_row() for chromosome in gc.get_objects()
+                                   if isinstance(chromosome, Chromosome) and chromosome.get_population() is population)
+        references = population.get_references()
+        assert all(references[row] == rows[row] for row in range(0, len(references)))
+        assert len(population) == len(rows)
+
+        check_generation = Generation(12, 6, 'statevector')
+        check_generation.create_initial_generation(GATE_TYPES)
+        for chromosome in generation.get_chromosome_list():
+            assert len(chromosome) == 18
+            genes = chromosome.get_gene_array()
+            assert ((genes[:, 0] < len(GATE_TYPES)) & (genes[:, 1:] < 3).all(axis=1)).all()
+            two_qubit = chromosome.get_gate_set().get_two_qubit()[genes[:, 0]]
+            assert (genes[two_qubit, 1] != genes[two_qubit, 2]).all()
+
+            copied = Chromosome(GATE_TYPES)
+            copied.set_genotype(chromosome.get_integer_list(), chromosome.get_theta_list())
+            check_generation.evaluate_chromosomes([copied], DESIRED_OUTCOME, 'kl')
+            assert math.isclose(copied.get_fitness_score(), chromosome.get_fitness_score(), abs_tol=1e-9)
+
+    def test_resumed_best_chromosome_is_a_copy(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run.ckpt')
+            generation = Generation(8, 6, 'statevector')
+            generation.create_initial_generation(GATE_TYPES)
+            Pipeline(generation, DESIRED_OUTCOME, checkpoint_path=path).run(2, target_fitness=0)
+
+            resumed_generation = Generation(8, 6, 'statevector')
+            resumed_pipeline = Pipeline(resumed_generation, DESIRED_OUTCOME)
+            resumed_pipeline.load_checkpoint(path)
+            best_chromosome = resumed_pipeline.run(2, target_fitness=100)
+
+        assert best_chromosome is resumed_generation.get_best_ever_chromosome()
+        assert best_chromosome.get_population() is not resumed_generation.get_population()
+        assert best_chromosome.get_fitness_score() == generation.get_best_ever_fitness()
+
+    def test_resume_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run.ckpt')
+            random.seed(3)
+            generation = Generation(8, 6, 'sampled')
+            generation.create_initial_generation(GATE_TYPES)
+            pipeline = Pipeline(generation, DESIRED_OUTCOME, checkpoint_path=path, checkpoint_interval=3)
+            pipeline.run(3, target_fitness=0)
+            shutil.copy(path, path + '.3')
+            pipeline.run(6, target_fitness=0)
+
+            random.seed(5)
+            resumed_generation = Generation(8, 6, 'sampled')
+            resumed_pipeline = Pipeline(resumed_generation, DESIRED_OUTCOME)
+            resumed_pipeline.load_checkpoint(path + '.3')
+            resumed_pipeline.run(6, target_fitness=0)
+
+        assert resumed_pipeline.get_generation_number() == 6
+        assert resumed_pipeline.get_best_fitness() == pipeline.get_best_fitness()
+        for chromosome, resumed_chromosome in zip(generation.get_chromosome_list(),
+                                                  resumed_generation.get_chromosome_list()):
+            assert chromosome.get_integer_list() == resumed_chromosome.get_integer_list()
+            assert chromosome.get_theta_list() == resumed_chromosome.get_theta_list()
+            assert chromosome.get_fitness_score() == resumed_chromosome.get_fitness_score()
+
+
+class TestCheckpoint(TestCase):
+
+    def test_save_and_load(self):
+        generation = Generation(6, 5, 'statevector')
+        generation.create_initial_generation(GATE_TYPES)
+        generation.run_generation_kl(DESIRED_OUTCOME)
+        generation.set_parent_list()
+        state = random.getstate()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run.ckpt')
+            Checkpoint.from_generation(generation, 7, generation.get_parent_list()[0]).save(path)
+            random.random()
+            checkpoint = Checkpoint.load(path)
+            restored_generation = Generation(6, 5, 'statevector')
+            best_chromosome = checkpoint.restore(restored_generation)
+            del checkpoint
+
+        assert random.getstate() == state
+        assert best_chromosome is restored_generation.get_parent_list()[0]
+        assert [chromosome.get_integer_list() for chromosome in restored_generation.get_chromosome_list()] == \
+               [chromosome.get_integer_list() for chromosome in generation.get_chromosome_list()]
+        assert [chromosome.get_fitness_score() for chromosome in restored_generation.get_parent_list()] == \
+               [chromosome.get_fitness_score() for chromosome in generation.get_parent_list()]
+
+    def test_best_ever_is_restored(self):
+        generation = Generation(6, 5, 'statevector')
+        generation.create_initial_generation(GATE_TYPES)
+        generation.run_generation_kl(DESIRED_OUTCOME)
+        best_ever = generation.get_best_ever_chromosome()
+        best_ever.set_fitness_score(0.125)
+        generation.evolve_into_next_generation()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run.ckpt')
+            Checkpoint.from_generation(generation, 1).save(path)
+            restored_generation = Generation(6, 5, 'statevector')
+            restored_generation.create_initial_generation(GATE_TYPES)
+            restored_generation.run_generation_kl(DESIRED_OUTCOME)
+            restored_generation.set_population(restored_generation.get_chromosome_list(), [])
+            assert restored_generation.get_best_ever_chromosome() is None
+            Checkpoint.load(path).restore(restored_generation)
+
+        assert restored_generation.get_best_ever_fitness() == 0.125
+        assert restored_generation.get_best_ever_chromosome().get_integer_list() == best_ever.get_integer_list()
+
+
+class TestIslandModel(TestCase):
+
+    def test_ring_destinations(self):
+        with IslandModel(3, 6, 5, GATE_TYPES, DESIRED_OUTCOME, seed=1) as island_model:
+            assert island_model.find_destinations() == [1, 2, 0]
+
+    def test_seeded_run_is_reproducible(self):
+        best_fitness = []
+        for i in range(0, 2):
+            with IslandModel(2, 6, 5, GATE_TYPES, DESIRED_OUTCOME, migration_interval=2, topology='random',
+                             seed=4) as island_model:
+                island_model.run(6, target_fitness=0)
+                best_fitness.append(island_model.get_best_fitness())
+                assert len(island_model.get_fitness_history()) == 6
+                assert island_model.get_best_fitness() <= min(island_model.get_fitness_history()[-1])
+        assert best_fitness[0] == best_fitness[1]
+
+
+class TestPopulation(TestCase):
+
+    def test_chromosomes_share_the_store(self):
+        population = Population(GATE_TYPES)
+        chromosome = Chromosome(GATE_TYPES, population=population)
+        chromosome.set_genotype([3, 0, 1, 1, 2, 2], [0.5, 0])
+        offspring = copy.deepcopy(chromosome)
+        offspring.set_genotype([3, 0, 1, 1, 2, 2, 0, 1, 0], [0.25, 0, 0])
+
+        assert offspring.get_population() is population
+        assert chromosome.get_integer_list() == [3, 0, 1, 1, 2, 2]
+        assert chromosome.get_theta_list() == [0.5, 0]
+        assert len(population) == 2
+
+        genes, thetas, lengths = Population.gather([offspring, chromosome])
+        assert genes.shape == (2, 3, 3)
+        assert genes[1, 2].tolist() == [0, 0, 0]
+        assert thetas[0].tolist() == [0.25, 0, 0]
+        assert lengths.tolist() == [3, 2]
+
+    def test_clone_copies_on_write(self):
+        population = Population(GATE_TYPES)
+        chromosome = Chromosome(GATE_TYPES, population=population)
+        chromosome.generate_random_chromosome(6)
+        chromosome.set_fitness_score(0.5)
+        clone = chromosome.clone()
+        assert clone.get_row() == chromosome.get_row()
+        assert len(population) == 1
+        clone.set_fitness_score(0.5)
+        assert clone.get_row() == chromosome.get_row()
+
+        clone.mutate_chromosome(30)
+        assert clone.get_row() != chromosome.get_row()
+        assert len(population) == 2
+        assert clone.get_fitness_score() == 0.5
+        changed = [clone.get_integer_list()[i:i + 3] != chromosome.get_integer_list()[i:i + 3]
+                   for i in range(0, 18, 3)]
+        assert sum(changed) <= 1
+
+    def test_deepcopy_has_its_own_fitness(self):
+        population = Population(GATE_TYPES)
+        chromosome = Chromosome(GATE_TYPES, population=population)
+        chromosome.generate_random_chromosome(4)
+        chromosome.set_fitness_score(0.5)
+        deep_copy = copy.deepcopy(chromosome)
+        deep_copy.set_fitness_score(2.0)
+
+        assert deep_copy.get_population() is population
+        assert deep_copy.get_row() != chromosome.get_row()
+        assert deep_copy.get_integer_list() == chromosome.get_integer_list()
+        assert chromosome.get_fitness_score() == 0.5
+
+    def test_lists_are_copies_and_arrays_are_views(self):
+        chromosome = Chromosome(GATE_TYPES)
+        chromosome.set_genotype([3, 0, 1, 1, 2, 2], [0.5, 0])
+        with self.assertWarns(UserWarning):
+            chromosome.get_integer_list()[0] = 1
+        with self.assertWarns(UserWarning):
+            chromosome.get_theta_list().append(0.25)
+        assert chromosome.get_integer_list() == [3, 0, 1, 1, 2, 2]
+        assert chromosome.get_theta_list() == [0.5, 0]
+
+        genes = chromosome.get_gene_array()
+        assert genes.tolist() == [[3, 0, 1], [1, 2, 2]]
+        assert chromosome.get_theta_array().tolist() == [0.5, 0]
+        assert not genes.flags.writeable
+        assert not chromosome.get_theta_array().flags.writeable
+
+    def test_rows_are_reused(self):
+        population = Population(GATE_TYPES, capacity=2)
+        for i in range(0, 10):
+            chromosome = Chromosome(GATE_TYPES, population=population)
+            chromosome.generate_random_chromosome(4)
+        del chromosome
+        assert len(population) == 0
+        assert population.get_genes().shape[0] == 2
+
+    def test_pickle_round_trip(self):
+        generation = Generation(4, 5, 'statevector')
+        generation.create_initial_generation(GATE_TYPES)
+        chromosome = generation.get_chromosome_list()[0]
+        chromosome.set_fitness_score(0.75)
+        unpickled = pickle.loads(pickle.dumps(chromosome))
+        assert unpickled.get_population() is not generation.get_population()
+        assert unpickled.get_integer_list() == chromosome.get_integer_list()
+        assert unpickled.get_theta_list() == chromosome.get_theta_list()
+        assert unpickled.get_fitness_score() == 0.75
+
+
+class TestCircuit(TestCase):
+
+    def test_generate_starting_states(self):
+        assert Circuit.generate_starting_states(3)[3] == [0, 1, 1]
+        assert len(Circuit.generate_starting_states(5)) == 32
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+IMPORT_TIME_BUDGET = 1.0  # seconds
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestImport(TestCase):
+
+    def test_import_is_lazy_and_fast(self):
+        script = ("import sys, time\n"
+                  "start = time.perf_counter()\n"
+                  "import Quevo\n"
+                  "print(time.perf_counter() - start, 'qiskit' in sys.modules, 'scipy' in sys.modules)\n")
+        output = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_ROOT, capture_output=True,
+                                text=True, check=True).stdout.split()
+
+        assert float(output[0]) < IMPORT_TIME_BUDGET
+        assert output[1] == 'False'
+        assert output[2] == 'False'
+
+    def test_statevector_circuit_does_not_import_qiskit(self):
+        script = ("import sys\n"
+                  "import Quevo\n"
+                  "chromosome = Quevo.Chromosome(['h', 'x', 'cx'])\n"
+                  "chromosome.generate_random_chromosome(5)\n"
+                  "Quevo.Circuit(chromosome, 'statevector').print_ca_outcomes([0.5] * 8)\n"
+                  "print('qiskit' in sys.modules)\n")
+        output = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_ROOT, capture_output=True,
+                                text=True, check=True).stdout.split()
+
+        assert output[-1] == 'False'
@@ -0,0 +1,234 @@
+import math
+import pickle
+from unittest import TestCase
+
+import numpy as np
+
+from Quevo import Chromosome, DensityMatrix, GateCache, GateSet, NoiseModel, Simplifier, Statevector, Tableau, Unitary
+
+
+class TestStatevector(TestCase):
+
+    def test_initial_state(self):
+        statevector = Statevector()
+        assert statevector.probability_of_one() == 0.0
+
+    def test_initialize_initial_states(self):
+        statevector = Statevector()
+        statevector.initialize_initial_states([1, 0, 1])
+        assert statevector.get_state()[5] == 1
+        assert statevector.probability_of_one() == 1.0
+
+    def test_hadamard(self):
+        statevector = Statevector()
+        statevector.apply_gate('h', 0, 0)
+        assert math.isclose(statevector.probability_of_one(), 0.5)
+
+    def test_cx_control_is_second_integer(self):
+        statevector = Statevector()
+        statevector.initialize_initial_states([0, 1, 0])
+        statevector.apply_gate('cx', 1, 0)
+        assert math.isclose(statevector.probability_of_one(), 1.0)
+
+    def test_toffoli(self):
+        statevector = Statevector()
+        statevector.initialize_initial_states([0, 1, 1])
+        statevector.apply_gate('toffoli', 0, 0)
+        assert math.isclose(statevector.probability_of_one(), 1.0)
+
+    def test_rxx(self):
+        statevector = Statevector()
+        statevector.apply_gate('rxx', 0, 1, math.pi / 2)
+        assert math.isclose(statevector.probability_of_one(), 0.5)
+
+    def test_apply_chromosome(self):
+        chromosome = Chromosome(['h', 'x', 'cx'])
+        chromosome.set_integer_list([1, 2, 0, 2, 2, 0])
+        statevector = Statevector()
+        statevector.apply_chromosome(chromosome)
+        assert math.isclose(statevector.probability_of_one(), 1.0)
+
+
+class TestGateSet(TestCase):
+
+    def test_shared_and_compiled(self):
+        gate_types = ['cx', 'x', 'h', 'rxx', 'rzz', 'swap', 'z', 'y', 'toffoli']
+        gate_set = GateSet.get(gate_types)
+        assert GateSet.get(list(gate_types)) is gate_set
+        assert Chromosome(gate_types).get_gate_set() is gate_set
+        assert pickle.loads(pickle.dumps(gate_set)) is gate_set
+
+        assert gate_set.get_opcode('rxx') == 3
+        assert gate_set.get_parametric().tolist() == [False, False, False, True, True, False, False, False, False]
+        assert gate_set.get_two_qubit().tolist() == [True, False, False, True, True, True, False, False, False]
+        assert gate_set.get_gate_qubits(8, 0, 0) == [1, 2, 0]
+        assert np.allclose(gate_set.get_matrix(4, math.pi), np.diag([-1j, 1j, 1j, -1j]))
+        assert gate_set.get_diagonal().tolist() == [False, False, False, False, True, False, True, False, False]
+        assert gate_set.get_symmetric().tolist() == [False, False, False, True, True, True, False, False, False]
+        assert gate_set.has_gate('y') and not gate_set.has_gate('cz')
+
+    def test_unknown_gate(self):
+        with self.assertRaises(ValueError):
+            GateSet.get(['h', 'cz'])
+
+
+class TestUnitary(TestCase):
+
+    def test_identity(self):
+        unitary = Unitary()
+        assert unitary.probabilities_of_one() == [0, 0, 0, 0, 1, 1, 1, 1]
+
+    def test_matches_statevector(self):
+        chromosome = Chromosome(['cx', 'x', 'h', 'rxx', 'rzz', 'swap', 'z', 'y', 'toffoli'])
+        chromosome.generate_random_chromosome(20)
+        unitary = Unitary()
+        unitary.apply_chromosome(chromosome)
+        probabilities = unitary.probabilities_of_one()
+
+        for i in range(0, 8):
+            statevector = Statevector()
+            statevector.initialize_initial_states([i >> 2 & 1, i >> 1 & 1, i & 1])
+            statevector.apply_chromosome(chromosome)
+            assert math.isclose(probabilities[i], statevector.probability_of_one(), abs_tol=1e-12)
+
+    def test_initial_states_and_columns(self):
+        chromosome = Chromosome(['cx', 'x', 'h', 'rxx', 'rzz', 'swap', 'z', 'y', 'toffoli'])
+        chromosome.generate_random_chromosome(20)
+        unitary = Unitary()
+        unitary.apply_chromosome(chromosome)
+
+        for triplet in [[0, 0, 0], [0, 1, 1], [1, 0, 1]]:
+            statevector = Statevector()
+            statevector.initialize_initial_states(triplet)
+            statevector.apply_chromosome(chromosome)
+            initialized = Unitary()
+            initialized.initialize_initial_states(triplet)
+            initialized.apply_chromosome(chromosome)
+            assert np.allclose(unitary.get_column(triplet), statevector.get_state())
+            assert math.isclose(initialized.probability_of_one(), statevector.probability_of_one(), abs_tol=1e-12)
+
+
+class TestGateCache(TestCase):
+
+    def test_size(self):
+        gate_cache = GateCache(['h', 'cx', 'rzz', 'toffoli'])
+        assert len(gate_cache) == 9 + 6 + 6 + 9
+
+    def test_parametric_operator(self):
+        gate_cache = GateCache(['rxx'])
+        operator = gate_cache.get_operator(0, 0, 1, math.pi)
+        assert math.isclose(abs(operator[6, 0]), 1.0)
+
+    def test_matches_unitary(self):
+        gate_types = ['cx', 'x', 'h', 'rxx', 'rzz', 'swap', 'z', 'y', 'toffoli']
+        chromosome = Chromosome(gate_types)
+        chromosome.generate_random_chromosome(20)
+        unitary = Unitary()
+        unitary.apply_chromosome(chromosome)
+        gate_cache = GateCache(gate_types)
+        assert np.allclose(gate_cache.get_chromosome_unitary(chromosome), unitary.get_state())
+
+    def test_population_unitaries(self):
+        gate_types = ['cx', 'x', 'h', 'rxx', 'rzz', 'swap', 'z', 'y', 'toffoli']
+        gate_cache = GateCache(gate_types)
+        chromosome_list = []
+        for gates in [3, 12, 7]:
+            chromosome = Chromosome(gate_types)
+            chromosome.generate_random_chromosome(gates)
+            chromosome_list.append(chromosome)
+
+        unitaries = gate_cache.get_population_unitaries(chromosome_list)
+        assert unitaries.shape == (3, 8, 8)
+        for i in range(0, 3):
+            assert np.allclose(unitaries[i], gate_cache.get_chromosome_unitary(chromosome_list[i]))
+
+    def test_population_unitaries_five_qubits(self):
+        gate_types = ['cx', 'x', 'h', 'rxx', 'rzz', 'swap', 'z', 'y', 'toffoli']
+        gate_cache = GateCache(gate_types, 5)
+        chromosome_list = []
+        for gates in [20, 15]:
+            chromosome = Chromosome(gate_types, 5)
+            chromosome.generate_random_chromosome(gates)
+            chromosome_list.append(chromosome)
+
+        unitaries = gate_cache.get_population_unitaries(chromosome_list)
+        for i in range(0, 2):
+            assert np.allclose(unitaries[i], gate_cache.get_chromosome_unitary(chromosome_list[i]))
+
+
+class TestSimplifier(TestCase):
+
+    def test_cancel_pairs(self):
+        chromosome = Chromosome(['h', 'x', 'cx'])
+        chromosome.set_integer_list([1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0])
+        assert Simplifier().simplify(chromosome).get_integer_list() == []
+        assert chromosome.get_length() == 12
+
+    def test_merge_rotations(self):
+        chromosome = Chromosome(['rzz', 'h'])
+        chromosome.set_genotype([1, 0, 0, 0, 0, 1, 0, 1, 0, 1, 0, 0], [0, 1.0, 2.0, 0])
+        simplified = Simplifier().simplify(chromosome)
+        assert simplified.get_integer_list() == [1, 0, 0, 0, 0, 1, 1, 0, 0]
+        assert math.isclose(simplified.get_theta_list()[1], 3.0)
+
+    def test_light_cone(self):
+        chromosome = Chromosome(['h', 'cx'])
+        chromosome.set_integer_list([0, 0, 0, 0, 2, 0, 1, 2, 1])
+        assert Simplifier().simplify(chromosome).get_integer_list() == [0, 0, 0]
+
+    def test_same_probabilities(self):
+        gate_types = ['cx', 'x', 'h', 'rxx', 'rzz', 'swap', 'z', 'y', 'toffoli']
+        chromosome = Chromosome(gate_types)
+        chromosome.generate_random_chromosome(30)
+        gate_cache = GateCache(gate_types)
+        simplified = Simplifier().simplify(chromosome)
+        assert np.allclose(gate_cache.probabilities_of_one(gate_cache.get_chromosome_unitary(chromosome)),
+                           gate_cache.probabilities_of_one(gate_cache.get_chromosome_unitary(simplified)))
+
+
+class TestTableau(TestCase):
+
+    def test_is_clifford(self):
+        chromosome = Chromosome(['h', 'cx', 'toffoli'])
+        chromosome.set_integer_list([0, 0, 0, 1, 0, 1])
+        assert Tableau.is_clifford(chromosome)
+
+        chromosome = Chromosome(['h', 'cx', 'toffoli'])
+        chromosome.set_integer_list([0, 0, 0, 2, 0, 1])
+        assert not Tableau.is_clifford(chromosome)
+
+    def test_matches_unitary(self):
+        gate_types = ['h', 'x', 'y', 'z', 'cx', 'swap']
+        gate_cache = GateCache(gate_types)
+        for i in range(0, 20):
+            chromosome = Chromosome(gate_types)
+            chromosome.generate_random_chromosome(15)
+            tableau = Tableau()
+            tableau.apply_chromosome(chromosome)
+            unitary = gate_cache.get_chromosome_unitary(chromosome)
+            assert np.allclose(tableau.probabilities_of_one(), gate_cache.probabilities_of_one(unitary))
+
+
+class TestDensityMatrix(TestCase):
+
+    def test_noiseless_batch_matches_unitary(self):
+        gate_types = ['cx', 'x', 'h', 'rxx', 'rzz', 'swap', 'z', 'y', 'toffoli']
+        gate_cache = GateCache(gate_types)
+        chromosome_list = []
+        for gates in [5, 8]:
+            chromosome = Chromosome(gate_types)
+            chromosome.generate_random_chromosome(gates)
+            chromosome_list.append(chromosome)
+
+        density_matrix = DensityMatrix(gate_cache, chromosomes=2)
+        density_matrix.apply_chromosomes(chromosome_list)
+        for i in range(0, 2):
+            unitary = gate_cache.get_chromosome_unitary(chromosome_list[i])
+            assert np.allclose(density_matrix.probabilities_of_one()[i], gate_cache.probabilities_of_one(unitary))
+
+    def test_full_depolarizing(self):
+        chromosome = Chromosome(['h', 'x', 'cx'])
+        chromosome.set_integer_list([1, 0, 0])
+        density_matrix = DensityMatrix(GateCache(['h', 'x', 'cx']), NoiseModel(depolarizing=1.0))
+        density_matrix.apply_chromosomes([chromosome])
+        assert np.allclose(density_matrix.probabilities_of_one(), 0.5)